@@ -0,0 +1,3 @@
+from . import cases, harness
+
+__all__ = ["cases", "harness"]
@@ -0,0 +1,84 @@
+"""Benchmarks the enhancements, filters, statistics & connectivity routines.
+
+Run from the image_processing directory:
+
+>>> python -m benchmarks --sizes 0.25 1 --cases "filter.*"
+>>> python -m benchmarks --sizes 20 --cases "connectivity.*" --channels 1
+>>> python -m benchmarks --save  # record the baselines
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+
+from . import cases  # noqa: F401, registers the cases
+from .harness import (
+    DTYPES,
+    THRESHOLD,
+    Frame,
+    compare,
+    load_baselines,
+    run,
+    save_baselines,
+    select,
+)
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__)
+    parser.add_argument(
+        "--sizes", type=float, nargs="+", default=[0.25, 1, 4], help="megapixels"
+    )
+    parser.add_argument("--dtypes", nargs="+", default=list(DTYPES), choices=DTYPES)
+    parser.add_argument("--channels", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--cases", nargs="+", help="glob patterns of case names")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument(
+        "--save", action="store_true", help="record the results as the baselines"
+    )
+    parser.add_argument("--list", action="store_true", help="list the cases")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    args = parse_args(argv)
+    selected = select(args.cases)
+    if args.list:
+        for case in selected:
+            print(f"{case.name:<36} {', '.join(case.dtypes)}")
+        return 0
+
+    frames = [
+        Frame(size, dtype, channels)
+        for size in args.sizes
+        for dtype in args.dtypes
+        for channels in args.channels
+    ]
+    measurements = []
+    for measurement in run(selected, frames, args.repeat):
+        print(measurement, flush=True)
+        measurements.append(measurement)
+
+    baselines = load_baselines(args.baselines)
+    if args.save:
+        save_baselines(args.baselines, measurements, baselines)
+        print(f"Saved {len(measurements)} baselines to {args.baselines}")
+        return 0
+
+    regressions = compare(measurements, baselines, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+import numpy as np
+
+from src.image_enhancement.ie import Contrast, ImageEnhancement
+from src.image_props.image import Image
+from src.image_props.image_stats import ImageStatistics, channel_histograms
+from src.utils.files.file_utils import FileUtils as uti
+from src.utils.image_enhancement.filters.border_treatment import BorderType
+from src.utils.image_enhancement.filters.linear.kernels import KernelName
+from src.utils.image_props.connectivity import Connectivity
+from src.utils.matrices import arithmetic
+
+from .harness import case
+
+UINT8 = ("uint8",)
+INTEGERS = ("uint8", "uint16")
+ALL = ("uint8", "uint16", "float32")
+GRAY = (1,)
+ANY = (1, 3)
+
+
+def image(matrix: np.ndarray) -> Image:
+    open_type = uti.ImageType.COLOR if matrix.ndim == 3 else uti.ImageType.GRAYSCALE
+    return Image.from_array(matrix, "bench", open_type=open_type)
+
+
+def enhancement(
+    operation: Callable[[ImageEnhancement], Any], lazy: bool = False
+) -> Callable[[np.ndarray], Callable[[], Any]]:
+    """A case running operation on an ImageEnhancement of the frame, computing what
+    lazy mode left pending.
+    """
+
+    def setup(matrix: np.ndarray) -> Callable[[], Any]:
+        ie = ImageEnhancement(image(matrix), lazy)
+        return lambda: operation(ie).compute()
+
+    return setup
+
+
+# point operations
+
+
+for name, operation, channels in [
+    ("negative", lambda ie: ie.image_negative(), ANY),
+    ("stretch_contrast", lambda ie: ie.stretch_contrast(20), GRAY),
+    ("contract_contrast", lambda ie: ie.contract_contrast(20), GRAY),
+    (
+        "gray_level_slicing",
+        lambda ie: ie.gray_level_slicing((np.uint8(80), np.uint8(160))),
+        ANY,
+    ),
+    ("bit_plane_slicing", lambda ie: ie.bit_plane_slicing(np.uint8(4)), ANY),
+    ("histogram_equalization", lambda ie: ie.histogram_equalization(), ANY),
+]:
+    case(f"enhance.{name}", UINT8, channels)(enhancement(operation))
+
+case("enhance.lazy_chain", UINT8, GRAY)(
+    enhancement(
+        lambda ie: ie.stretch_contrast(20).image_negative().histogram_equalization(),
+        lazy=True,
+    )
+)
+
+
+@case("enhance.image_subtracting", UINT8, ANY)
+def _image_subtracting(matrix: np.ndarray) -> Callable[[], Any]:
+    ie = ImageEnhancement(image(matrix))
+    other = image(np.roll(matrix, 3, axis=1))
+    return lambda: ie.image_subtracting(other)
+
+
+@case("contrast.hist_dic", UINT8, GRAY)
+def _hist_dic(matrix: np.ndarray) -> Callable[[], Any]:
+    img = image(matrix)
+    return lambda: Contrast.get_hist_dic(img, (np.uint8(0), np.uint8(255)))
+
+
+# filters
+
+
+for name, operation, dtypes, max_megapixels in [
+    ("averaging", lambda ie: ie.averaging(), ALL, None),
+    (
+        "gaussian.5x5",
+        lambda ie: ie.linear_filter(KernelName.GAUSSIAN, size="5x5"),
+        ALL,
+        None,
+    ),
+    (
+        "circular.reflect",
+        lambda ie: ie.linear_filter(KernelName.CIRCULAR, BorderType.REFLECT),
+        ALL,
+        None,
+    ),
+    ("median.3x3", lambda ie: ie.median(3), ALL, None),
+    ("median.9x9", lambda ie: ie.median(9), ALL, 16),
+    ("median.21x21", lambda ie: ie.median(21), UINT8, 16),
+    ("median.51x51", lambda ie: ie.median(51), UINT8, 1),
+    ("kuwahara.r2", lambda ie: ie.kuwahara(2), ALL, 16),
+]:
+    case(f"filter.{name}", dtypes, ANY, max_megapixels)(enhancement(operation))
+
+
+# statistics
+
+
+@case("stats.moments", ALL, ANY)
+def _moments(matrix: np.ndarray) -> Callable[[], Any]:
+    img = image(matrix)
+    return lambda: ImageStatistics(img).moments
+
+
+@case("stats.channel_histograms", UINT8, ANY)
+def _channel_histograms(matrix: np.ndarray) -> Callable[[], Any]:
+    return lambda: channel_histograms(matrix)
+
+
+# connectivity
+
+
+for name in ("n4", "n8", "nm"):
+
+    @case(f"connectivity.{name}", INTEGERS, GRAY)
+    def _connectivity(matrix: np.ndarray, name: str = name) -> Callable[[], Any]:
+        top = int(np.iinfo(matrix.dtype).max)
+        connectivity = Connectivity(matrix, np.arange(top // 2, top + 1))
+        return getattr(connectivity, name)
+
+    # the low bit of the noise, half of the pixels in speckles: the most runs &
+    # merges per pixel, far from the few large components of the threshold above
+    @case(f"connectivity.noise.{name}", INTEGERS, GRAY)
+    def _noise(matrix: np.ndarray, name: str = name) -> Callable[[], Any]:
+        top = int(np.iinfo(matrix.dtype).max)
+        connectivity = Connectivity(matrix, np.arange(1, top + 1, 2))
+        return getattr(connectivity, name)
+
+
+# arithmetic
+
+
+for name in ("subtract", "absdiff"):
+
+    @case(f"arithmetic.{name}", INTEGERS, ANY)
+    def _arithmetic(matrix: np.ndarray, name: str = name) -> Callable[[], Any]:
+        other = np.roll(matrix, 3, axis=1)
+        return lambda: getattr(arithmetic, name)(matrix, other, out=matrix)
+
+
+@case("arithmetic.blend", INTEGERS, ANY)
+def _blend(matrix: np.ndarray) -> Callable[[], Any]:
+    other = np.roll(matrix, 3, axis=1)
+    return lambda: arithmetic.blend(matrix, other, 0.25, out=matrix)
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import platform
+import time
+import tracemalloc
+from fnmatch import fnmatch
+from typing import Any, Callable, Iterable, Iterator
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# a case gets a fresh frame and returns the call to time, so that setup & in place
+# changes of one repetition don't leak into the next one
+Setup = Callable[[np.ndarray], Callable[[], Any]]
+
+SIZES = (0.25, 1, 4, 16, 20, 100)
+DTYPES = ("uint8", "uint16", "float32")
+# a change is a regression when it is slower or uses more memory by this fraction
+THRESHOLD = 0.5
+# times & peak memory below these are noise (timer resolution, interpreter &
+# bookkeeping allocations)
+MIN_SECONDS = 1e-3
+MIN_PEAK_BYTES = 1 << 20
+# fast cases are repeated past the requested amount for this long, so that the best
+# run is not one slowed down by the rest of the machine
+TIME_BUDGET = 0.25
+MAX_RUNS = 100
+
+
+class Frame:
+    def __init__(self, megapixels: float, dtype: str = "uint8", channels: int = 1):
+        """The spec of a synthetic frame, 4:3 like most sensors.
+
+        Args:
+            megapixels (float): The amount of pixels, in millions.
+            dtype (str, optional): The pixel type. Defaults to "uint8".
+            channels (int, optional): 1 for grayscale, 3 for BGR. Defaults to 1.
+        """
+        self.megapixels = megapixels
+        self.dtype = np.dtype(dtype)
+        self.channels = channels
+        rows = max(int(round(np.sqrt(megapixels * 1e6 * 3 / 4))), 1)
+        self.shape = (rows, max(int(round(rows * 4 / 3)), 1))
+        if channels > 1:
+            self.shape += (channels,)
+
+    @property
+    def pixels(self) -> int:
+        return self.shape[0] * self.shape[1]
+
+    @property
+    def key(self) -> str:
+        return f"{self.megapixels:g}MP-{self.dtype.name}-c{self.channels}"
+
+    def make(self) -> np.ndarray:
+        """A smooth gradient with noise, so histograms, sorts & components behave
+        as on photographs rather than on constant or uniformly random frames.
+        """
+        rng = np.random.default_rng(0)
+        m, n = self.shape[:2]
+        rows = np.linspace(0, 160, m, dtype=np.float32)[:, None]
+        cols = np.linspace(0, 60, n, dtype=np.float32)[None, :]
+        frame = rows + cols
+        if self.channels > 1:
+            frame = frame[..., None] + np.arange(self.channels, dtype=np.float32) * 10
+
+        frame += rng.normal(0, 12, frame.shape).astype(np.float32)
+        np.clip(frame, 0, 255, out=frame)
+        if self.dtype == np.uint16:
+            frame *= 257
+
+        return frame.astype(self.dtype)
+
+
+class Case:
+    def __init__(
+        self,
+        name: str,
+        setup: Setup,
+        dtypes: tuple[str, ...] = ("uint8",),
+        channels: tuple[int, ...] = (1,),
+        max_megapixels: float | None = None,
+    ) -> None:
+        """An operation to benchmark.
+
+        Args:
+            name (str): A dotted name, e.g. "filter.median.3x3".
+            setup (Setup): Builds the inputs from a frame & returns the call to time.
+            dtypes (tuple, optional): The pixel types it supports.
+            channels (tuple, optional): The channel counts it supports.
+            max_megapixels (float, optional): Skip larger frames, for operations whose
+            memory or time would not fit on a workstation.
+        """
+        self.name = name
+        self.setup = setup
+        self.dtypes = dtypes
+        self.channels = channels
+        self.max_megapixels = max_megapixels
+
+    def supports(self, frame: Frame) -> bool:
+        return (
+            frame.dtype.name in self.dtypes
+            and frame.channels in self.channels
+            and (self.max_megapixels is None or frame.megapixels <= self.max_megapixels)
+        )
+
+
+CASES: dict[str, Case] = {}
+
+
+def case(
+    name: str,
+    dtypes: tuple[str, ...] = ("uint8",),
+    channels: tuple[int, ...] = (1,),
+    max_megapixels: float | None = None,
+) -> Callable[[Setup], Setup]:
+    """Registers a setup function as a benchmark case, see Case."""
+
+    def register(setup: Setup) -> Setup:
+        if name in CASES:
+            raise ValueError(f"Duplicate benchmark case {name!r}")
+
+        CASES[name] = Case(name, setup, dtypes, channels, max_megapixels)
+        return setup
+
+    return register
+
+
+class Measurement:
+    def __init__(
+        self, case: str, frame: str, seconds: float, pixels: int, peak_bytes: int
+    ) -> None:
+        """The cost of one case on one frame.
+
+        Args:
+            case (str): The case name.
+            frame (str): The frame key.
+            seconds (float): The best time over the repetitions.
+            pixels (int): The pixels of the frame.
+            peak_bytes (int): The peak of memory allocated through Python & NumPy
+            while the case ran, buffers allocated inside cv2 are not traced.
+        """
+        self.case = case
+        self.frame = frame
+        self.seconds = seconds
+        self.pixels = pixels
+        self.peak_bytes = peak_bytes
+
+    @property
+    def key(self) -> str:
+        return f"{self.case}@{self.frame}"
+
+    @property
+    def megapixels_per_second(self) -> float:
+        return self.pixels / 1e6 / self.seconds if self.seconds else float("inf")
+
+    def to_dict(self) -> dict[str, float | int]:
+        return {
+            "seconds": self.seconds,
+            "megapixels_per_second": self.megapixels_per_second,
+            "peak_bytes": self.peak_bytes,
+        }
+
+    def __str__(self) -> str:
+        return (
+            f"{self.case:<36} {self.frame:<20} {self.seconds * 1e3:>10.2f} ms "
+            f"{self.megapixels_per_second:>10.1f} MP/s "
+            f"{self.peak_bytes / 2**20:>9.1f} MiB"
+        )
+
+
+def measure(case: Case, matrix: np.ndarray, key: str, repeat: int = 3) -> Measurement:
+    """Times a case on a frame, keeping the best of at least repeat runs (more for
+    fast cases, see TIME_BUDGET), then traces its memory in a separate run so the
+    tracing doesn't slow the timed ones down.
+    """
+    best, spent, runs = float("inf"), 0.0, 0
+    while runs < repeat or (spent < TIME_BUDGET and runs < MAX_RUNS):
+        call = case.setup(matrix.copy())
+        start = time.perf_counter()
+        call()
+        seconds = time.perf_counter() - start
+        best, spent, runs = min(best, seconds), spent + seconds, runs + 1
+
+    call = case.setup(matrix.copy())
+    tracemalloc.start()
+    try:
+        call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    m, n = matrix.shape[:2]
+    return Measurement(case.name, key, best, m * n, peak)
+
+
+def select(patterns: Iterable[str] | None = None) -> list[Case]:
+    """The registered cases matching any of the glob patterns, all by default."""
+    patterns = list(patterns or ["*"])
+    return [
+        case
+        for name, case in CASES.items()
+        if any(fnmatch(name, pattern) for pattern in patterns)
+    ]
+
+
+def run(
+    cases: Iterable[Case], frames: Iterable[Frame], repeat: int = 3
+) -> Iterator[Measurement]:
+    """Measures every case on every frame it supports, one frame in memory at a
+    time.
+    """
+    cases = list(cases)
+    for frame in frames:
+        supported = [case for case in cases if case.supports(frame)]
+        if not supported:
+            continue
+
+        matrix = frame.make()
+        for case in supported:
+            yield measure(case, matrix, frame.key, repeat)
+
+
+def machine() -> dict[str, Any]:
+    """What the timings depend on, stored with the baselines."""
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+    }
+
+
+def load_baselines(path: str) -> dict[str, Any]:
+    if not os.path.exists(path):
+        return {"machine": machine(), "results": {}}
+
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_baselines(
+    path: str, measurements: Iterable[Measurement], baselines: dict | None = None
+) -> dict[str, Any]:
+    """Records the measurements as the new baselines, keeping the other entries of
+    the existing ones.
+    """
+    baselines = baselines or load_baselines(path)
+    baselines["machine"] = machine()
+    for measurement in measurements:
+        baselines["results"][measurement.key] = measurement.to_dict()
+
+    with open(path, "w") as file:
+        json.dump(baselines, file, indent=2, sort_keys=True)
+        file.write("\n")
+
+    return baselines
+
+
+class Regression:
+    def __init__(self, key: str, metric: str, baseline: float, current: float):
+        self.key = key
+        self.metric = metric
+        self.baseline = baseline
+        self.current = current
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float("inf")
+
+    def __str__(self) -> str:
+        return (
+            f"{self.key}: {self.metric} {self.baseline:.4g} -> {self.current:.4g} "
+            f"({self.ratio:.2f}x)"
+        )
+
+
+def compare(
+    measurements: Iterable[Measurement],
+    baselines: dict[str, Any],
+    threshold: float = THRESHOLD,
+) -> list[Regression]:
+    """The measurements slower, or using more memory, than their baseline by more
+    than the threshold. Cases without a baseline are not regressions.
+    """
+    if baselines.get("machine") and baselines["machine"] != machine():
+        log.warning("The baselines were recorded on another machine or setup")
+
+    regressions = []
+    for measurement in measurements:
+        baseline = baselines.get("results", {}).get(measurement.key)
+        if baseline is None:
+            continue
+
+        seconds = max(baseline["seconds"], MIN_SECONDS)
+        if measurement.seconds > seconds * (1 + threshold):
+            regressions.append(
+                Regression(
+                    measurement.key, "seconds", baseline["seconds"], measurement.seconds
+                )
+            )
+
+        peak = max(baseline["peak_bytes"], MIN_PEAK_BYTES)
+        if measurement.peak_bytes > peak * (1 + threshold):
+            regressions.append(
+                Regression(
+                    measurement.key,
+                    "peak_bytes",
+                    baseline["peak_bytes"],
+                    measurement.peak_bytes,
+                )
+            )
+
+    return regressions
@@ -1,3 +1,6 @@
-from . import image_enhancement, image_props, utils
+from .utils.lazy import submodules
 
 __all__ = ["utils", "image_enhancement", "image_props"]
+
+# the subpackages pull in cv2, load them on first use rather than with the package
+__getattr__, __dir__ = submodules(__name__, __all__)
@@ -1,4 +1,5 @@
-from .filters import filters
-from . import ie
+from src.utils.lazy import submodules
 
-__all__ = ["ie", "filters"]
+__all__ = ["ie", "filters", "point_ops", "batch", "stream"]
+
+__getattr__, __dir__ = submodules(__name__, __all__)
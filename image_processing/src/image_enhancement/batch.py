@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import glob
+import logging
+import os
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Iterable, Iterator
+
+from src.utils.files.cache import ResultCache, file_fingerprint, pixels_fingerprint
+from src.utils.files.file_utils import FileUtils as uti
+
+from ..image_props.image import Image
+from .ie import ImageEnhancement
+
+log = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff", ".npy")
+# part of every cache key, bump it when an operation changes its results
+CACHE_VERSION = 1
+FINGERPRINTS = ("stat", "pixels")
+
+
+class Recipe:
+    def __init__(self, steps: list[tuple[str, tuple, dict]] | None = None) -> None:
+        """A picklable list of ImageEnhancement calls, recorded by chaining them:
+
+        >>> Recipe().stretch_contrast(20).histogram_equalization()
+
+        Args:
+            steps (list, optional): (method name, args, kwargs) of each call.
+        """
+        self.steps = steps or []
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or not callable(getattr(ImageEnhancement, name, None)):
+            raise AttributeError(f"ImageEnhancement has no operation {name!r}")
+
+        def record(*args: Any, **kwargs: Any) -> Recipe:
+            return Recipe(self.steps + [(name, args, kwargs)])
+
+        return record
+
+    def apply(self, ie: ImageEnhancement) -> ImageEnhancement:
+        for name, args, kwargs in self.steps:
+            ie = getattr(ie, name)(*args, **kwargs)
+
+        return ie
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def __repr__(self) -> str:
+        return "Recipe(" + ".".join(name for name, _, _ in self.steps) + ")"
+
+
+class BatchResult:
+    def __init__(
+        self,
+        path: str,
+        seconds: float,
+        pixels: int = 0,
+        error: str | None = None,
+        cached: bool = False,
+    ) -> None:
+        """The outcome of running a recipe on one image.
+
+        Args:
+            path (str): The image path.
+            seconds (float): Decode, enhancement & save time.
+            pixels (int, optional): The amount of pixels processed. Defaults to 0.
+            error (str, optional): The traceback, if the image failed.
+            cached (bool, optional): Whether the result was read from the cache.
+        """
+        self.path = path
+        self.seconds = seconds
+        self.pixels = pixels
+        self.error = error
+        self.cached = cached
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class BatchReport:
+    def __init__(self, results: list[BatchResult], seconds: float) -> None:
+        self.results = results
+        self.seconds = seconds
+
+    @property
+    def failed(self) -> list[BatchResult]:
+        return [result for result in self.results if not result.ok]
+
+    @property
+    def cached(self) -> int:
+        return sum(result.cached for result in self.results)
+
+    @property
+    def images_per_second(self) -> float:
+        return len(self.results) / self.seconds if self.seconds else 0.0
+
+    @property
+    def megapixels_per_second(self) -> float:
+        pixels = sum(result.pixels for result in self.results)
+        return pixels / 1e6 / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{len(self.results)} images ({len(self.failed)} failed, "
+            f"{self.cached} cached) in "
+            f"{self.seconds:.2f}s: {self.images_per_second:.1f} images/s, "
+            f"{self.megapixels_per_second:.1f} MP/s"
+        )
+
+
+def enhance(
+    path: str,
+    recipe: Recipe,
+    open_type=uti.ImageType.GRAYSCALE,
+    cache: ResultCache | None = None,
+    fingerprint: str = "stat",
+) -> tuple[ImageEnhancement, bool]:
+    """Applies a recipe to an image, through the result cache when given.
+
+    Args:
+        path (str): The image path.
+        recipe (Recipe): The enhancement to apply.
+        open_type (ImageType): How to open the image.
+        cache (ResultCache, optional): Where to look the result up & store it.
+        fingerprint (str, optional): How to identify the input in the cache key:
+        "stat" by its path, size & modification time, without decoding it on a
+        hit, or "pixels" by the hash of its decoded pixels, which also hits for
+        copies & touched files. Defaults to "stat".
+
+    Returns:
+        tuple[ImageEnhancement, bool]: The enhanced image & whether it was cached.
+        Cached results can only be reset() with the "pixels" fingerprint.
+    """
+    if cache is None:
+        return recipe.apply(ImageEnhancement(Image(path, open_type), lazy=True)), False
+
+    if fingerprint not in FINGERPRINTS:
+        raise ValueError(f"Unknown fingerprint {fingerprint!r}, not in {FINGERPRINTS}")
+
+    img = None
+    if fingerprint == "pixels":
+        img = Image(path, open_type)
+        source = pixels_fingerprint(img.pixels)
+    else:
+        source = file_fingerprint(path)
+
+    key = cache.key(CACHE_VERSION, source, open_type, recipe.steps)
+    hit = cache.get(key)
+    if hit is not None:
+        matrix, meta = hit
+        absolute = uti.get_absolute_path(path)
+        result = Image.from_array(matrix, meta["name"], absolute, open_type)
+        # reset() goes back to the source when it was decoded for its fingerprint, a
+        # "stat" hit doesn't decode it just to keep it
+        original = img if img is not None else result
+        ie = ImageEnhancement(original, keep_original=img is not None)
+        ie.img = result
+        ie.filters = meta["filters"]
+        return ie, True
+
+    if img is None:
+        img = Image(path, open_type)
+    ie = recipe.apply(ImageEnhancement(img, lazy=True))
+    ie.compute()
+    cache.put(key, ie.img.pixels, name=ie.img.name, filters=ie.filters)
+    return ie, False
+
+
+def _process(
+    path: str,
+    recipe: Recipe,
+    open_type,
+    save: bool,
+    extension: str | None,
+    cache: ResultCache | None = None,
+    fingerprint: str = "stat",
+) -> BatchResult:
+    start = time.perf_counter()
+    try:
+        ie, cached = enhance(path, recipe, open_type, cache, fingerprint)
+        ie.compute()
+        if save:
+            ie.save_img(extension)
+
+        return BatchResult(
+            path, time.perf_counter() - start, ie.img.pixels.size, cached=cached
+        )
+    except Exception:
+        return BatchResult(
+            path, time.perf_counter() - start, error=traceback.format_exc()
+        )
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        recipe: Recipe,
+        workers: int | None = None,
+        max_in_flight: int | None = None,
+        open_type=uti.ImageType.GRAYSCALE,
+        save: bool = True,
+        extension: str | None = None,
+        cache: ResultCache | None = None,
+        fingerprint: str = "stat",
+    ) -> None:
+        """Runs a recipe over many images on a pool of processes.
+
+        Each worker decodes, enhances and saves an image, so the stages of
+        different images overlap across the pool.
+
+        Args:
+            recipe (Recipe): The enhancement to apply.
+            workers (int, optional): Pool size. Defaults to the amount of CPUs.
+            max_in_flight (int, optional): Images submitted but not finished yet,
+            bounds memory on large jobs. Defaults to 4 per worker.
+            open_type (ImageType): How to open the images.
+            save (bool, optional): Save the results with save_img(). Defaults to True.
+            extension (str, optional): The format to save in, see save_img().
+            cache (ResultCache, optional): Serve the results of images processed
+            before with the same recipe from the cache, see enhance().
+            fingerprint (str, optional): How the cache identifies the images, see
+            enhance(). Defaults to "stat".
+        """
+        self.recipe = recipe
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or 4 * self.workers
+        self.open_type = open_type
+        self.save = save
+        self.extension = extension
+        self.cache = cache
+        self.fingerprint = fingerprint
+
+    @staticmethod
+    def collect(source: str | Iterable[str]) -> Iterator[str]:
+        """Lists the images of a directory, a glob pattern or an iterable of paths."""
+        if not isinstance(source, str):
+            yield from source
+        elif os.path.isdir(source):
+            for entry in sorted(os.scandir(source), key=lambda e: e.name):
+                _, extension = os.path.splitext(entry.name)
+                if entry.is_file() and extension.lower() in IMAGE_EXTENSIONS:
+                    yield entry.path
+        else:
+            yield from sorted(glob.iglob(source, recursive=True))
+
+    def run(self, source: str | Iterable[str]) -> BatchReport:
+        start = time.perf_counter()
+        results: list[BatchResult] = []
+        paths = self.collect(source)
+
+        with ProcessPoolExecutor(self.workers) as pool:
+            in_flight: set[Future[BatchResult]] = set()
+            for path in paths:
+                if len(in_flight) >= self.max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    results.extend(self._gather(done))
+
+                in_flight.add(
+                    pool.submit(
+                        _process,
+                        path,
+                        self.recipe,
+                        self.open_type,
+                        self.save,
+                        self.extension,
+                        self.cache,
+                        self.fingerprint,
+                    )
+                )
+
+            results.extend(self._gather(wait(in_flight).done))
+
+        if self.cache is not None:
+            # every worker only tracks what it added itself
+            self.cache.evict()
+
+        report = BatchReport(results, time.perf_counter() - start)
+        log.info(f"Batch {self.recipe} done: {report}")
+        return report
+
+    @staticmethod
+    def _gather(done: Iterable[Future[BatchResult]]) -> list[BatchResult]:
+        results = [future.result() for future in done]
+        for result in results:
+            if not result.ok:
+                log.warning(f"Failed to process {result.path}:\n{result.error}")
+
+        return results
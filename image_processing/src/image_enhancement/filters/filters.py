@@ -7,7 +7,14 @@ from ...utils.image_enhancement.filters.border_treatment import (
     BorderTreatment,
     BorderType,
 )
+from ...utils.image_enhancement.filters.linear.convolution import (
+    Strategy,
+    choose_strategy,
+    convolve,
+)
 from ...utils.image_enhancement.filters.linear.kernels import KERNEL_DICT, KernelName
+from ...utils.image_enhancement.filters.non_linear.kuwahara import kuwahara
+from ...utils.image_enhancement.filters.non_linear.median import median
 
 
 class Filter(ABC):
@@ -25,57 +32,117 @@ class Filter(ABC):
 
 
 class LinearFilter(Filter):
-    def __init__(self, img: Image, kernel: KernelName, border_type: BorderType):
+    def __init__(
+        self,
+        img: Image,
+        kernel: KernelName | np.ndarray,
+        border_type: BorderType,
+        size: str = "3x3",
+    ):
         """
         Initializes a Filters object with the given image, kernel, and border type.
 
         Args:
             img (Image): The input image.
-            kernel (KernelName): The name of the kernel to be used for filtering.
+            kernel (KernelName | np.ndarray): The name of the kernel to be used for
+            filtering, or the kernel itself.
             border_type (BorderType): The type of border to be used for filtering.
+            size (str, optional): The kernel size, for kernels that come in several
+            sizes (e.g. gaussian "3x3" or "5x5"). Defaults to "3x3".
 
         Returns:
             None
         """
         super().__init__(img, border_type)
         self._border_type = border_type
-        self._kernel_name = kernel
-        self._kernel = KERNEL_DICT[kernel]
+        self._size = size
+        self.set_filter_type = kernel
 
     @property
     def filter_type(self) -> str:
         return self._kernel_name.value.capitalize()
 
     @filter_type.setter
-    def set_filter_type(self, kernel: KernelName):
-        self._kernel_name = kernel
-        self._kernel = KERNEL_DICT[kernel]
+    def set_filter_type(self, kernel: KernelName | np.ndarray):
+        if isinstance(kernel, KernelName):
+            self._kernel_name = kernel
+            self._kernel = KERNEL_DICT[kernel]
+            if isinstance(self._kernel, dict):
+                self._kernel = self._kernel[self._size]
+        else:
+            self._kernel_name = KernelName.CUSTOM
+            self._kernel = np.asarray(kernel, dtype=np.float64)
+
+    @property
+    def kernel(self) -> np.ndarray:
+        return self._kernel
+
+    @property
+    def strategy(self) -> Strategy:
+        """How apply() convolves the image: directly, separably or through the FFT."""
+        return choose_strategy(self._kernel, self.img.pixels.shape)
+
+    def apply(self) -> Image:
+        """Convolves the image with the kernel, tile by tile for tiled images.
+
+        Returns:
+            Image: The filtered image.
+        """
+        halo = max(self._kernel.shape) // 2
+        return self.img.map_tiles(
+            lambda block: convolve(block, self._kernel, self._border_type),
+            halo,
+            self._border_type,
+        )
 
 
 class NonLinearFilter(Filter):
     def __init__(
         self,
         img: Image,
+        border_type: BorderType = BorderType.IGNORE,
     ):
         """
         Initializes a Filters object with an image and a kernel.
 
         Args:
             img (Image): The input image.
+            border_type (BorderType, optional): The type of border to be used for
+            filtering. Defaults to BorderType.IGNORE.
         """
-        super().__init__(img)
+        super().__init__(img, border_type)
 
-    def median(self):
-        pass
+    def median(self, box_size: int = 3) -> Image:
+        """Replaces every pixel with the median of its neighbourhood, removing salt &
+        pepper noise while keeping edges.
 
-    def kuwahara(self):
-        pass
+        Args:
+            box_size (int, optional): The odd size of the neighbourhood. Defaults to 3.
 
-    def _region_split(self):
-        pass
+        Returns:
+            Image: The filtered image.
+        """
+        return self.img.map_tiles(
+            lambda block: median(block, box_size, self._border_type),
+            box_size // 2,
+            self._border_type,
+        )
 
-    def _region_variance(self):
-        pass
+    def kuwahara(self, radius: int = 2) -> Image:
+        """Smooths the image while keeping edges, every pixel takes the mean of the
+        most uniform quadrant of its neighbourhood.
+
+        Args:
+            radius (int, optional): The neighbourhood radius. Defaults to 2.
+
+        Returns:
+            Image: The filtered image.
+        """
+        return self.img.map_tiles(
+            lambda block: kuwahara(block, radius, self._border_type),
+            radius,
+            self._border_type,
+        )
 
 
 # class Filter:
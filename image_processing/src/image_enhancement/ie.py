@@ -1,24 +1,50 @@
 from __future__ import annotations
 
 import logging
+from concurrent.futures import Future
 from typing import Any
 
-import cv2
 import numpy as np
 
 from src.utils.files.file_utils import FileUtils as uti
+from src.utils.files.writer import ImageWriter, write_image
+from src.utils.lazy import lazy_import
 
 from ..image_props.image import Image
 from ..image_props.image_stats import ImageStatistics as stats
-from .filters.filters import Filter
+from ..utils import profiling
+from ..utils.image_enhancement.filters.border_treatment import BorderType
+from ..utils.image_enhancement.filters.linear.kernels import KernelName
+from ..utils.matrices import arithmetic
+from .filters.filters import LinearFilter, NonLinearFilter
+from .point_ops import LEVELS, PointOperation
+
+cv2 = lazy_import("cv2")
 
 log = logging.getLogger(__name__)
 
 
 class ImageEnhancement:
-    def __init__(self, img: Image) -> None:
+    def __init__(
+        self, img: Image, lazy: bool = False, keep_original: bool = True
+    ) -> None:
+        """Initializes an ImageEnhancement object.
+
+        Args:
+            img (Image): The image to enhance.
+            lazy (bool, optional): Record point operations instead of applying them.
+            Consecutive ones are fused into a single lookup table and the image is
+            only materialized on compute(), show() or save_img(). Defaults to False.
+            keep_original (bool, optional): Keep a copy of the image for reset(), it
+            shares the pixels until the first in place operation copies them. Pass
+            False for images that are never reset, to let operations work in place
+            on their pixels. Defaults to True.
+        """
         self.img = img
+        self._original = img.copy() if keep_original else None
         self.filters: list[str] = []
+        self.lazy = lazy
+        self._pending: PointOperation | None = None
 
     def filters_applied(self) -> int:
         """filters amount
@@ -37,17 +63,57 @@ class ImageEnhancement:
         x = self.img.name.split("_")[:-1]
         self.img.name = "_".join(x)
 
+    def _point_op(self, op: PointOperation) -> None:
+        if not self.lazy:
+            profiling.note(path="lut")
+            self.img = op(self.img)
+            return
+
+        # deferred & fused with the pending ones, nothing touches the pixels yet
+        profiling.note(path="lazy")
+        self._pending = op if self._pending is None else self._pending.then(op)
+
+    @profiling.profiled
+    def histogram(self) -> np.ndarray:
+        """The histogram of the image as it would be after the pending operations.
+
+        The image caches its histogram until its pixels change, and point operations
+        carry it over, so a chain of them only counts the pixels once. In lazy mode
+        the pending lookup table remaps the bins of the source histogram.
+        """
+        hist = Contrast.histogram(self.img)
+        if self._pending is None:
+            return hist
+
+        return self._pending.remap(hist)
+
+    @profiling.profiled
+    def compute(self) -> ImageEnhancement:
+        """Materializes the pending operations with a single pass over the image."""
+        if self._pending is None:
+            return self
+
+        profiling.note(path="fused", fused=self._pending.name)
+        self.img = self._pending(self.img)
+        self._pending = None
+        return self
+
+    @profiling.profiled
     def stretch_contrast(self, percent: int) -> ImageEnhancement:
-        self.img = Contrast.stretch_contrast(self.img, percent)
+        hist = self.histogram() if self.lazy else None
+        self._point_op(Contrast.stretch_contrast_op(self.img, percent, hist))
         self.add_filter("contrast_stretch")
 
         return self
 
+    @profiling.profiled
     def contract_contrast(self, percent: int) -> ImageEnhancement:
-        self.img = Contrast.contract_contrast(self.img, percent)
+        hist = self.histogram() if self.lazy else None
+        self._point_op(Contrast.contract_contrast_op(self.img, percent, hist))
         self.add_filter("contrast_contracted")
         return self
 
+    @profiling.profiled
     def gray_level_slicing(
         self, range: tuple[np.uint8, np.uint8], boost_type: str = "up"
     ) -> ImageEnhancement:
@@ -66,73 +132,172 @@ class ImageEnhancement:
         Returns:
             ImageEnhancement: The updated ImageEnhancement object.
         """
-        self.img = Contrast.gray_level_slicing(self.img, range, boost_type)
+        self._point_op(Contrast.gray_level_slicing_op(range, boost_type))
         self.add_filter("gray_level_slicing")
         return self
 
+    @profiling.profiled
     def bit_plane_slicing(self, plane: np.uint8) -> ImageEnhancement:
-        self.img = Contrast.bit_plane_slicing(self.img, plane)
+        self._point_op(Contrast.bit_plane_slicing_op(plane))
         self.add_filter("bit_plane_slicing")
         return self
 
+    @profiling.profiled
     def averaging(self) -> ImageEnhancement:
-        self.img = Filter.averaging(self.img)
-        self.add_filter("averaged")
+        return self.linear_filter(KernelName.AVERAGING, name="averaged")
+
+    @profiling.profiled
+    def linear_filter(
+        self,
+        kernel: KernelName | np.ndarray,
+        border_type: BorderType = BorderType.IGNORE,
+        size: str = "3x3",
+        name: str | None = None,
+    ) -> ImageEnhancement:
+        """Convolves the image with one of the kernels of KERNEL_DICT, or any other.
+
+        Args:
+            kernel (KernelName | np.ndarray): The kernel.
+            border_type (BorderType, optional): Defaults to BorderType.IGNORE.
+            size (str, optional): The size of kernels that come in several sizes.
+            name (str, optional): The filter name appended to the image name.
+            Defaults to the kernel name.
+
+        Returns:
+            ImageEnhancement: The updated ImageEnhancement object.
+        """
+        self.compute()
+        linear = LinearFilter(self.img, kernel, border_type, size)
+        profiling.note(path=linear.strategy.value)
+        self.img = linear.apply()
+        self.add_filter(name or linear.filter_type.lower())
+        return self
+
+    @profiling.profiled
+    def median(
+        self, box_size: int = 3, border_type: BorderType = BorderType.IGNORE
+    ) -> ImageEnhancement:
+        """Median filters the image, see NonLinearFilter.median().
+
+        Args:
+            box_size (int, optional): The odd size of the neighbourhood. Defaults to 3.
+            border_type (BorderType, optional): Defaults to BorderType.IGNORE.
+
+        Returns:
+            ImageEnhancement: The updated ImageEnhancement object.
+        """
+        self.compute()
+        self.img = NonLinearFilter(self.img, border_type).median(box_size)
+        self.add_filter("median")
+        return self
+
+    @profiling.profiled
+    def kuwahara(
+        self, radius: int = 2, border_type: BorderType = BorderType.IGNORE
+    ) -> ImageEnhancement:
+        """Kuwahara filters the image, see NonLinearFilter.kuwahara().
+
+        Args:
+            radius (int, optional): The neighbourhood radius. Defaults to 2.
+            border_type (BorderType, optional): Defaults to BorderType.IGNORE.
+
+        Returns:
+            ImageEnhancement: The updated ImageEnhancement object.
+        """
+        self.compute()
+        self.img = NonLinearFilter(self.img, border_type).kuwahara(radius)
+        self.add_filter("kuwahara")
         return self
 
+    @profiling.profiled
     def histogram_equalization(
         self, range: tuple[np.uint8, np.uint8] = (np.uint8(0), np.uint8(255))
     ) -> ImageEnhancement:
-        self.img = Contrast.apply_hist_equalization(self.img, range=range)
+        if self.img.channels == 1:
+            self._point_op(Contrast.equalization_op(self.histogram(), range))
+        else:
+            self.compute()
+            self.img = Contrast.equalize_luminance(self.img, range)
+
         self.add_filter("histogram_equalized")
         return self
 
+    @profiling.profiled
+    def apply_point_op(self, op: PointOperation) -> ImageEnhancement:
+        """Applies an already computed point operation, e.g. a histogram equalization
+        mapping taken from another frame.
+        """
+        self._point_op(op)
+        self.add_filter(op.name)
+        return self
+
+    @profiling.profiled
     def show(self) -> None:
         """Displays the image on a named window.
 
         Returns:
             None
         """
+        self.compute()
         name = uti.image_title(self.img.name)
         cv2.namedWindow(name, cv2.WINDOW_NORMAL)
         window = cv2.getWindowImageRect(name)
         cv2.moveWindow(name, *uti.get_center_screen(window))  # bug
-        cv2.imshow(name, self.img.matrix)
+        cv2.imshow(name, self.img.pixels)
         cv2.waitKey(0)
         cv2.destroyAllWindows()
 
-    def save_img(self) -> None:
+    @profiling.profiled
+    def save_img(
+        self, extension: str | None = None, writer: ImageWriter | None = None
+    ) -> Future[str] | None:
         """Saves the filtered image to a file.
 
+        Args:
+            extension (str, optional): The file format, defaults to the one of the
+            original image. ".npy" & raw (".raw", ".bin", ".gray") frames are stored
+            uncompressed, so later runs can memory-map them instead of decoding.
+            writer (ImageWriter, optional): Encode & write in the background, with
+            its encode parameters, instead of before returning.
+
         Returns:
-            None
+            Future[str] | None: The pending write, when given a writer.
         """
-        _, extension = uti.get_basename_extension(self.img.path)
+        self.compute()
+        if extension is None:
+            _, extension = uti.get_basename_extension(self.img.path)
         loc = "res/filt/"
         EXPORT_DIR = uti.get_absolute_path(loc)
 
-        uti.create_folder(EXPORT_DIR)
-
         img_path = EXPORT_DIR + self.img.name + extension
         log.info(f"Saving image {self.img.name} to -> {loc} 💾 ...")
-        cv2.imwrite(img_path, self.img.matrix)
+        if writer is not None:
+            # a copy shares the pixels, later in place operations copy them first
+            return writer.submit(img_path, self.img.copy())
 
+        uti.create_folder(EXPORT_DIR)
+        write_image(img_path, self.img.pixels)
+        return None
+
+    @profiling.profiled
     def reset(self) -> ImageEnhancement:
         """Resets the image back to the original
 
         Return: None
         """
-        self.img = Image(self.img.path, self.img.open_type)
+        if self._original is None:
+            raise RuntimeError("The original image was not kept, see keep_original")
+
+        # of the same class, tile size & all, files aren't read again
+        self.img = self._original.copy()
+        self.filters = []
+        self._pending = None
         return self
 
     # A great use for this is the airport's baggage check-in conveyor which sees
+    @profiling.profiled
     def image_negative(self) -> ImageEnhancement:
-        L = self.img.levels
-        for row in range(len(self.img.matrix)):
-            for col in range(len(self.img.matrix[row])):
-                self.img.matrix[row][col] = (L - 1) - self.img.matrix[row][col]
-
-        self.img.update()
+        self._point_op(Contrast.negative_op())
         flag = "negative"
         # if the previous filter was the same filter as this
         # then they're just going to cancel each other
@@ -144,19 +309,23 @@ class ImageEnhancement:
 
         return self
 
+    @profiling.profiled
     def image_subtracting(self, img: Image) -> ImageEnhancement:
         if self.img.resolution != img.resolution:
             raise TypeError(
                 "Both images should be of the same resolution & scenery, and only differ in motion"
             )
 
+        self.compute()
+
         # for (row, col), _ in np.ndenumerate(img.matrix):
         #     diff = int(self.img.matrix[row, col]) - int(img.matrix[row, col])
         #     # saturated technique (like in cv2) instead of taking abs
         #     self.img.matrix[row, col] = max(0, diff)
 
-        diff = self.img.matrix.astype(int) - img.matrix.astype(int)
-        self.img.matrix = np.clip(diff, 0, 255).astype(np.uint8)
+        # saturated in uint8 & in place, no wider temporaries
+        matrix = self.img.mutable_matrix()
+        arithmetic.subtract(matrix, img.pixels, out=matrix)
 
         self.img.update()
         return self
@@ -166,69 +335,66 @@ class Contrast:
     @classmethod
     # r1 > s1 & r2 < s2
     def stretch_contrast(cls, img: Image, percent: int) -> Image:
-        r1, r2, s1, s2 = cls._get_r_s(img, percent, "stretch")
-
-        for row in range(len(img.matrix)):
-            for col in range(len(img.matrix[0])):
-                curr = img.matrix[row][col]
-                if curr <= r1:
-                    img.matrix[row][col] = curr * s1 / r1
-
-                elif curr <= r2:
-                    m = (s2 - s1) / (r2 - r1)
-                    img.matrix[row][col] = curr * m + s1 - r1 * m
-
-                else:
-                    L = img.levels  # 256
-                    m = ((L - 1) - s2) / ((L - 1) - r2)
-                    img.matrix[row][col] = (
-                        curr * m + (L - 1) - (L - 1) * (L - s2) / (L - r2)
-                    )
-
-        img.update()
-        return img
+        return cls.stretch_contrast_op(img, percent)(img)
 
     # r1 < s1 & r2 > s2
     @classmethod
     def contract_contrast(cls, img: Image, percent: int) -> Image:
-        r1, r2, s1, s2 = cls._get_r_s(img, percent, "contract")
+        return cls.contract_contrast_op(img, percent)(img)
+
+    @classmethod
+    def stretch_contrast_op(
+        cls, img: Image, percent: int, hist: np.ndarray | None = None
+    ) -> PointOperation:
+        r1, r2, s1, s2 = cls._get_r_s(img, percent, "stretch", hist)
+        return cls._piecewise_linear_op(r1, r2, s1, s2, "contrast_stretch")
+
+    @classmethod
+    def contract_contrast_op(
+        cls, img: Image, percent: int, hist: np.ndarray | None = None
+    ) -> PointOperation:
+        r1, r2, s1, s2 = cls._get_r_s(img, percent, "contract", hist)
+        return cls._piecewise_linear_op(r1, r2, s1, s2, "contrast_contracted")
 
-        for row in range(len(img.matrix)):
-            for col in range(len(img.matrix[0])):
-                curr = img.matrix[row][col]
-                if curr <= r1:
-                    img.matrix[row][col] = curr * s1 / r1
+    @classmethod
+    def _piecewise_linear_op(
+        cls, r1: float, r2: float, s1: float, s2: float, name: str
+    ) -> PointOperation:
+        """Compiles the three segment contrast transformation through (r1, s1) & (r2, s2).
 
-                elif curr <= r2:
-                    m = (s2 - s1) / (r2 - r1)
-                    img.matrix[row][col] = curr * m + s1 - r1 * m
+        Every level is evaluated with the same arithmetic the per-pixel version used,
+        so applying the table is bit-exact with it.
+        """
+        L = LEVELS
 
-                else:
-                    L = img.levels
-                    m = ((L - 1) - s2) / ((L - 1) - r2)
-                    img.matrix[row][col] = (
-                        curr * m + (L - 1) - (L - 1) * (L - s2) / (L - r2)
-                    )
+        def transform(curr: np.ndarray) -> np.ndarray:
+            low = curr * s1 / r1
+            m = (s2 - s1) / (r2 - r1)
+            mid = curr * m + s1 - r1 * m
+            # levels above r2 don't occur in the image they were computed from
+            r, s = np.float64(r2), np.float64(s2)
+            m = ((L - 1) - s) / ((L - 1) - r)
+            high = curr * m + (L - 1) - (L - 1) * (L - s) / (L - r)
+            return np.where(curr <= r1, low, np.where(curr <= r2, mid, high))
 
-        img.update()
-        return img
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return PointOperation.from_function(transform, name)
 
     @classmethod
     def _get_r_s(
-        cls, img: Image, percent: int, type: str
+        cls, img: Image, percent: int, type: str, hist: np.ndarray | None = None
     ) -> tuple[float, float, float, float]:
         if type not in ["stretch", "contract"]:
             raise TypeError('Contrast manipulation type must be "stretch" or "contract')
 
-        r1 = img.matrix.min()
-        r2 = img.matrix.max()
+        r1, r2 = cls._bounds(img, hist)
 
         if type == "stretch":
-            s1 = r1 - (r1 * percent / 100 % (img.levels))
-            s2 = r2 - (r2 * percent / 100 % (img.levels))
+            s1 = r1 - (r1 * percent / 100 % LEVELS)
+            s2 = r2 - (r2 * percent / 100 % LEVELS)
         else:
-            s1 = r1 + (r1 * percent / 100 % (img.levels))
-            s2 = r2 + (r2 * percent / 100) % (img.levels)
+            s1 = r1 + (r1 * percent / 100 % LEVELS)
+            s2 = r2 + (r2 * percent / 100) % LEVELS
 
         r2 = max(0.2, r2)
         r1 = max(0.1, r1)
@@ -236,19 +402,38 @@ class Contrast:
         s2 = max(0.1, s2)
         return (r1, r2, s1, s2)
 
+    @classmethod
+    def _bounds(
+        cls, img: Image, hist: np.ndarray | None = None
+    ) -> tuple[np.uint8, np.uint8]:
+        """The darkest & brightest levels of the image, read off its histogram when
+        one is given instead of scanning the matrix.
+        """
+        if hist is None:
+            moments = stats(img).moments
+            bounds = (moments.minimum, moments.maximum) if moments.count else None
+        else:
+            present = np.flatnonzero(hist.reshape(-1, LEVELS).sum(axis=0))
+            bounds = (present[0], present[-1]) if len(present) else None
+
+        # no pixels at all, the full range maps them as well as any
+        low, high = bounds or (0, LEVELS - 1)
+        return (np.uint8(low), np.uint8(high))
+
     @classmethod
     def _inside_range(cls, number, range: tuple) -> bool:
         """Checks if a number is inside a given range.
 
         Args:
-            number (int): The number to check.
+            number (int | np.ndarray): The number (or levels) to check.
             range (tuple): A tuple representing the range to check.
 
         Returns:
-            bool: True if the number is inside the range, False otherwise.
+            bool: True if the number is inside the range, False otherwise,
+            elementwise for arrays.
         """
         # return number > range[0] and number < range[1]
-        return range[0] < number < range[1]
+        return (range[0] < number) & (number < range[1])
 
     @classmethod
     def gray_level_slicing(
@@ -261,14 +446,17 @@ class Contrast:
         range -- the range of colors to boost
         type -- the type of boosting, either "up" or "down"
         """
-        color = 0 if boost_type == "down" else img.levels - 1
-        for (row, col), pixel in np.ndenumerate(img.matrix):
-            if not cls._inside_range(pixel, range):
-                continue
-            img.matrix[row][col] = color
+        return cls.gray_level_slicing_op(range, boost_type)(img)
 
-        img.update()
-        return img
+    @classmethod
+    def gray_level_slicing_op(
+        cls, range: tuple[np.uint8, np.uint8], boost_type: str = "up"
+    ) -> PointOperation:
+        color = 0 if boost_type == "down" else LEVELS - 1
+        return PointOperation.from_function(
+            lambda levels: np.where(cls._inside_range(levels, range), color, levels),
+            "gray_level_slicing",
+        )
 
     @classmethod
     def _plane(cls, number: np.uint8) -> np.uint8:
@@ -309,82 +497,147 @@ class Contrast:
         Keyword arguments:
         bit -- the bit to highlight
         """
+        return cls.bit_plane_slicing_op(plane)(img)
+
+    @classmethod
+    def bit_plane_slicing_op(cls, plane: np.uint8) -> PointOperation:
         if plane <= 0 or plane > 8:
             raise ValueError("Bit plane must be between 1 and 8")
 
         planes = [np.uint8(plane) for plane in range(plane - 1, 8)]
-        print(planes)
-        for (row, col), pixel in np.ndenumerate(img.matrix):
-            img.matrix[row][col] = cls.apply_plane(pixel, planes)
+        log.debug(f"Slicing bit planes {planes}")
+        return PointOperation.from_function(
+            lambda levels: cls.apply_plane(levels, planes), "bit_plane_slicing"
+        )
 
-        img.update()
-        return img
+    @classmethod
+    def negative_op(cls) -> PointOperation:
+        return PointOperation.from_function(
+            lambda levels: (LEVELS - 1) - levels, "negative"
+        )
 
     @classmethod
     def full_range(cls, img: Image, range: tuple[np.uint8, np.uint8]) -> bool:
-        img_range = (0, img.levels - 1)
+        img_range = (0, LEVELS - 1)
         return img_range == range
 
     @classmethod
-    def get_hist_dic(
+    def histogram(cls, img: Image) -> np.ndarray:
+        """Counts every gray level of the image in a single pass.
+
+        Returns:
+            np.ndarray: 256 counts, entry r holds the amount of pixels of level r.
+        """
+        return stats(img).histogram()
+
+    @classmethod
+    def hist_equalization_op(
         cls, img: Image, range: tuple[np.uint8, np.uint8]
-    ) -> dict[int, dict[str, (int | float)]]:
-        m, n = img.resolution
-        res = m * n
-        L = img.levels
-
-        # in case it was in_range
-        min_val = max_val = delta = 0
-
-        full_range = cls.full_range(img, range)
-
-        if not full_range:
-            min_val, max_val = range
-            delta = max_val - min_val
-
-        hist_dic: dict = {}
-        for _, pixel in np.ndenumerate(img.matrix):
-            if not full_range and (pixel < min_val or pixel > max_val):
-                continue
-
-            if pixel not in hist_dic:
-                prob = 1 / res
-                hist_dic[pixel] = {
-                    "count": 1,
-                    "probability": prob,
-                    "cumulative": prob,
-                    "lcumulative": (L - 1) * prob,
-                    "new_gray": (
-                        np.uint8(
-                            ((L - 1) * prob) if full_range else (min_val + prob * delta)
-                        )
-                    ),
-                }
-                continue
-
-            hist_dic[pixel]["count"] += 1
-            prob = hist_dic[pixel]["count"] / res
-            hist_dic[pixel]["probability"] = prob
-            hist_dic[pixel]["cumulative"] += prob
-            hist_dic[pixel]["lcumulative"] = (L - 1) * hist_dic[pixel]["cumulative"]
-            hist_dic[pixel]["new_gray"] = np.uint8(
-                ((L - 1) * hist_dic[pixel]["cumulative"])
-                if full_range
-                else (min_val + hist_dic[pixel]["cumulative"] * delta)
+    ) -> PointOperation:
+        """Computes the histogram equalization mapping of an image.
+
+        The mapping is a PointOperation, so once computed it can be applied to
+        other frames (e.g. the rest of a sequence) without recomputing it.
+
+        Args:
+            img (Image): The image whose histogram defines the mapping.
+            range (tuple[np.uint8, np.uint8]): Only levels inside the range are
+            equalized (over the range itself), the rest are left unchanged.
+
+        Returns:
+            PointOperation: The equalization mapping.
+        """
+        return cls.equalization_op(cls.histogram(img), range)
+
+    @classmethod
+    def equalization_op(
+        cls, hist: np.ndarray, range: tuple[np.uint8, np.uint8]
+    ) -> PointOperation:
+        """Builds the equalization mapping from an already counted histogram, a
+        mapping per channel for the histograms of color images.
+        """
+        if hist.ndim == 2:
+            return PointOperation.per_channel(
+                *(cls.equalization_op(channel, range) for channel in hist)
+            )
+
+        levels = np.arange(LEVELS)
+        min_val, max_val = int(range[0]), int(range[1])
+        inside = (min_val <= levels) & (levels <= max_val)
+
+        counts = np.where(inside, hist, 0)
+        total = counts.sum()
+        if total == 0:
+            return PointOperation.identity()
+
+        cdf = np.cumsum(counts) / total
+        new_gray = min_val + cdf * (max_val - min_val)
+        return PointOperation(np.where(inside, new_gray, levels), "histogram_equalized")
+
+    @classmethod
+    def equalize_luminance(cls, img: Image, range: tuple[np.uint8, np.uint8]) -> Image:
+        """Equalizes the luminance of a BGR image, leaving its colors unchanged.
+
+        The image is converted to YCrCb, its Y channel is equalized & converted back,
+        tile by tile: one pass counts Y, another one maps it.
+
+        Args:
+            img (Image): A 3 channels BGR image.
+            range (tuple[np.uint8, np.uint8]): See equalization_op().
+
+        Returns:
+            Image: The equalized image.
+        """
+        if img.channels != 3:
+            raise ValueError(f"Expected a BGR image, got {img.channels} channels")
+        if not img.pixels.size:
+            # nothing to equalize, and cv2 refuses empty arrays
+            return img
+
+        hist = sum(
+            np.bincount(
+                cv2.cvtColor(tile.data, cv2.COLOR_BGR2YCrCb)[..., 0].ravel(),
+                minlength=LEVELS,
             )
+            for tile in img.tiles()
+        )
+        op = cls.equalization_op(hist, range)
 
-        return hist_dic
+        def equalize(block: np.ndarray) -> np.ndarray:
+            ycrcb = cv2.cvtColor(block, cv2.COLOR_BGR2YCrCb)
+            ycrcb[..., 0] = op.apply(ycrcb[..., 0])
+            return cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2BGR)
+
+        return img.map_tiles(equalize)
+
+    @classmethod
+    def get_hist_dic(
+        cls, img: Image, range: tuple[np.uint8, np.uint8]
+    ) -> dict[int, dict[str, (int | float)]]:
+        L = LEVELS
+        min_val, max_val = range
+
+        hist = cls.histogram(img)
+        levels = np.arange(L)
+        present = (hist > 0) & (min_val <= levels) & (levels <= max_val)
+
+        probability = hist / hist.sum()
+        cumulative = np.cumsum(np.where(present, probability, 0))
+        new_gray = cls.equalization_op(hist, range).lut
+
+        return {
+            int(level): {
+                "count": int(hist[level]),
+                "probability": float(probability[level]),
+                "cumulative": float(cumulative[level]),
+                "lcumulative": float((L - 1) * cumulative[level]),
+                "new_gray": new_gray[level],
+            }
+            for level in np.flatnonzero(present)
+        }
 
     @classmethod
     def apply_hist_equalization(
         cls, img: Image, range: tuple[np.uint8, np.uint8]
     ) -> Image:
-        hist_dic = cls.get_hist_dic(img, range)
-        for (row, col), pixel in np.ndenumerate(img.matrix):
-            try:
-                img.matrix[row][col] = hist_dic[pixel]["new_gray"]
-            except KeyError:
-                pass
-
-        img.update()
-        return img
+        return cls.hist_equalization_op(img, range)(img)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from typing import Callable
+
+import numpy as np
+
+from ..image_props.image import Image
+from ..image_props.image_stats import Moments
+
+LEVELS = 256
+
+
+class PointOperation:
+    def __init__(self, lut: np.ndarray, name: str = "") -> None:
+        """A gray level transformation s = T(r) compiled into a lookup table.
+
+        Args:
+            lut (np.ndarray): 256 entries, entry r holds the output level T(r). Or
+            one row of 256 entries per channel, to transform each channel of color
+            images differently.
+            name (str, optional): A label for the transformation. Defaults to "".
+        """
+        lut = np.asarray(lut)
+        if lut.ndim not in (1, 2) or lut.shape[-1] != LEVELS:
+            raise ValueError(
+                f"A lookup table must have {LEVELS} entries, got {lut.shape}"
+            )
+
+        # same semantics as storing the levels into a uint8 matrix: truncate, then wrap
+        self.lut = lut.astype(np.int64).astype(np.uint8)
+        self.lut.flags.writeable = False
+        self.name = name
+
+    @classmethod
+    def per_channel(cls, *ops: PointOperation) -> PointOperation:
+        """Stacks single channel transformations, ops[c] transforms channel c."""
+        name = "_".join(filter(None, (op.name for op in ops)))
+        return cls(np.stack([op.lut for op in ops]), name)
+
+    @property
+    def channels(self) -> int | None:
+        """The amount of channels of a per channel table, None if it is shared."""
+        return len(self.lut) if self.lut.ndim == 2 else None
+
+    @classmethod
+    def identity(cls) -> PointOperation:
+        return cls(np.arange(LEVELS, dtype=np.uint8), "identity")
+
+    @classmethod
+    def from_function(
+        cls, func: Callable[[np.ndarray], np.ndarray], name: str = ""
+    ) -> PointOperation:
+        """Compiles a vectorized transformation by evaluating it once per gray level.
+
+        Args:
+            func (Callable): Maps an array of uint8 levels to their new levels.
+            name (str, optional): A label for the transformation. Defaults to "".
+
+        Returns:
+            PointOperation: The compiled transformation.
+        """
+        return cls(func(np.arange(LEVELS, dtype=np.uint8)), name)
+
+    def then(self, other: PointOperation) -> PointOperation:
+        """Composes two transformations, self is applied first.
+
+        Returns:
+            PointOperation: A single table equivalent to applying both in order.
+        """
+        name = "_".join(filter(None, (self.name, other.name)))
+        shape = np.broadcast_shapes(self.lut.shape, other.lut.shape)
+        lut = np.take_along_axis(
+            np.broadcast_to(other.lut, shape), np.broadcast_to(self.lut, shape), -1
+        )
+        return PointOperation(lut, name)
+
+    def apply(self, matrix: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """Maps every pixel of the matrix through the table with a single gather.
+
+        Args:
+            matrix (np.ndarray): The uint8 pixels to transform, channels last.
+            out (np.ndarray, optional): Where to write the result, may be matrix itself.
+
+        Returns:
+            np.ndarray: The transformed pixels.
+        """
+        if matrix.dtype != np.uint8:
+            raise TypeError(f"Point operations expect uint8 pixels, got {matrix.dtype}")
+
+        if self.lut.ndim == 1:
+            return np.take(self.lut, matrix, out=out)
+
+        if matrix.ndim != 3 or matrix.shape[2] != len(self.lut):
+            raise ValueError(
+                f"A {len(self.lut)} channels table can't transform {matrix.shape} pixels"
+            )
+
+        # the channel index broadcasts against the pixels, one gather for all of them
+        result = self.lut[np.arange(len(self.lut)), matrix]
+        if out is None:
+            return result
+
+        out[...] = result
+        return out
+
+    def remap(self, hist: np.ndarray) -> np.ndarray:
+        """The histogram of the pixels once transformed, from the one before.
+
+        Args:
+            hist (np.ndarray): 256 level counts, or one row of them per channel.
+
+        Returns:
+            np.ndarray: The counts, every bin moved to the level it maps to.
+        """
+        shape = np.broadcast_shapes(self.lut.shape, np.shape(hist))
+        if len(shape) == 1:
+            hist = np.bincount(self.lut, weights=hist, minlength=LEVELS)
+            return hist.astype(np.int64)
+
+        # offset the levels of each channel to remap them all with a single bincount
+        lut = np.broadcast_to(self.lut, shape) + np.arange(shape[0])[:, None] * LEVELS
+        hist = np.broadcast_to(hist, shape)
+        hist = np.bincount(lut.ravel(), weights=hist.ravel(), minlength=lut.size)
+        return hist.astype(np.int64).reshape(shape)
+
+    def __call__(self, img: Image) -> Image:
+        """Transforms the image matrix tile by tile, in place unless its pixels are
+        shared with a copy of the image.
+
+        Statistics already cached on the image are carried over by remapping its
+        histogram, rather than counting the new pixels again.
+        """
+        moments = img.cache.get("moments")
+        if not img.writeable:
+            img.map_tiles(self.apply)
+        else:
+            for tile in img.tiles():
+                self.apply(tile.data, out=tile.data)
+
+            img.update()
+
+        if moments is not None and moments.hist is not None:
+            img.cache["moments"] = Moments.from_hist(self.remap(moments.hist))
+
+        return img
+
+    def __eq__(self, o: object) -> bool:
+        if not isinstance(o, PointOperation):
+            return False
+
+        return np.array_equal(self.lut, o.lut)
+
+    def __hash__(self) -> int:
+        return hash(self.lut.tobytes())
+
+    def cache_key(self) -> tuple[np.ndarray, str]:
+        """Identifies the operation in result cache keys, by its table & its name,
+        which ends up in the filters of the results.
+        """
+        return self.lut, self.name
+
+    def __repr__(self) -> str:
+        return f"PointOperation({self.name!r})"
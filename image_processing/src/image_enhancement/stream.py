@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from src.utils.files.file_utils import FileUtils as uti
+from src.utils.lazy import lazy_import
+
+from ..image_props.image import Image
+from ..utils.matrices.arithmetic import ReferenceFrame
+from .batch import BatchRunner, Recipe
+from .ie import ImageEnhancement
+
+cv2 = lazy_import("cv2")
+
+log = logging.getLogger(__name__)
+
+
+class FrameSource(ABC):
+    """Decodes the frames of a stream, one at a time, into caller owned buffers."""
+
+    def __init__(self, open_type=uti.ImageType.GRAYSCALE) -> None:
+        self.open_type = open_type
+        self.shape: tuple[int, ...] | None = None
+
+    @abstractmethod
+    def read(self, out: np.ndarray | None = None) -> np.ndarray | None:
+        """Decodes the next frame.
+
+        Args:
+            out (np.ndarray, optional): A buffer of a previous frame to decode into.
+
+        Returns:
+            np.ndarray | None: The frame, stored in out when given, None at the end.
+        """
+
+    def close(self) -> None:
+        pass
+
+    def _check(self, frame: np.ndarray) -> None:
+        if self.shape is None:
+            self.shape = frame.shape
+        elif frame.shape != self.shape:
+            raise ValueError(
+                f"The frames of a stream must share one resolution, got {frame.shape}"
+                f" after {self.shape}"
+            )
+
+
+class VideoSource(FrameSource):
+    def __init__(self, source: str | int, open_type=uti.ImageType.GRAYSCALE) -> None:
+        """The frames of a video file or a camera, over cv2.VideoCapture.
+
+        Args:
+            source (str | int): A video path or url, or the index of a camera.
+            open_type (ImageType): Convert the frames to grayscale or keep them BGR.
+        """
+        super().__init__(open_type)
+        self.capture = cv2.VideoCapture(source)
+        if not self.capture.isOpened():
+            raise FileNotFoundError(f"Can't open video {source}")
+
+        self._bgr: np.ndarray | None = None
+
+    @property
+    def fps(self) -> float:
+        return self.capture.get(cv2.CAP_PROP_FPS)
+
+    def read(self, out: np.ndarray | None = None) -> np.ndarray | None:
+        gray = self.open_type == uti.ImageType.GRAYSCALE
+        # the capture decodes into the buffer it is given when the shape matches
+        ok, frame = self.capture.read(self._bgr if gray else out)
+        if not ok:
+            return None
+
+        if gray:
+            self._bgr = frame
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=out)
+
+        self._check(frame)
+        return frame
+
+    def close(self) -> None:
+        self.capture.release()
+
+
+class SequenceSource(FrameSource):
+    def __init__(
+        self, source: str | Iterable[str], open_type=uti.ImageType.GRAYSCALE
+    ) -> None:
+        """The frames of a sequence of image files, in order.
+
+        Args:
+            source (str | Iterable[str]): A directory, a glob pattern or the paths,
+            see BatchRunner.collect().
+            open_type (ImageType): How to open the images.
+        """
+        super().__init__(open_type)
+        self.paths = BatchRunner.collect(source)
+
+    def read(self, out: np.ndarray | None = None) -> np.ndarray | None:
+        path = next(self.paths, None)
+        if path is None:
+            return None
+
+        frame = Image._decode(path, self.open_type)
+        if frame.ndim == 0:
+            raise FileNotFoundError(f"Can't decode {path}")
+
+        self._check(frame)
+        if out is None:
+            return np.array(frame)
+
+        np.copyto(out, frame)
+        return out
+
+
+class FrameReader(threading.Thread):
+    _END = object()
+
+    def __init__(self, source: FrameSource, buffers: int = 4) -> None:
+        """Decodes frames ahead of their processing, on a thread of its own.
+
+        The frames are decoded into a ring of buffers: a buffer only goes back to
+        the reader once the consumer releases the frame it holds, so decoding
+        stays at most buffers frames ahead and nothing is allocated past the first
+        lap of the ring.
+
+        Args:
+            source (FrameSource): The frames.
+            buffers (int, optional): The size of the ring. Defaults to 4.
+        """
+        super().__init__(daemon=True)
+        if buffers < 2:
+            raise ValueError("A frame reader needs at least 2 buffers")
+
+        self.source = source
+        self.slots: list[np.ndarray | None] = [None] * buffers
+        self._free: queue.Queue[int] = queue.Queue()
+        self._filled: queue.Queue = queue.Queue()
+        self._stopping = threading.Event()
+        for slot in range(buffers):
+            self._free.put(slot)
+
+    def run(self) -> None:
+        try:
+            while not self._stopping.is_set():
+                slot = self._free.get()
+                if self._stopping.is_set():
+                    break
+
+                out = self.slots[slot]
+                if out is not None and not out.flags.writeable:
+                    out = None
+
+                frame = self.source.read(out)
+                if frame is None:
+                    break
+
+                self.slots[slot] = frame
+                self._filled.put(slot)
+        except Exception as error:
+            self._filled.put(error)
+        finally:
+            self.source.close()
+            self._filled.put(self._END)
+
+    def frames(self) -> Iterator[tuple[int, np.ndarray]]:
+        """Yields (slot, frame) in decoding order, release() each slot when done."""
+        while True:
+            slot = self._filled.get()
+            if slot is self._END:
+                return
+
+            if isinstance(slot, Exception):
+                raise slot
+
+            yield slot, self.slots[slot]
+
+    def release(self, slot: int, reuse: bool = True) -> None:
+        """Gives a slot back to the reader.
+
+        Args:
+            slot (int): The slot of a frame from frames().
+            reuse (bool, optional): Decode the next frame into the same buffer,
+            False when its pixels are still referenced, e.g. by a copy of the
+            image, so the reader decodes into a new one. Defaults to True.
+        """
+        if not reuse:
+            self.slots[slot] = None
+
+        self._free.put(slot)
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._free.put(-1)
+
+
+class BackgroundModel:
+    def __init__(self, alpha: float = 0.05) -> None:
+        """A running average of the frames of a static scene, subtracted from each
+        new frame to keep only what moves.
+
+        Args:
+            alpha (float, optional): How much of the background each frame replaces,
+            higher values adapt faster to lighting changes but absorb slow objects.
+            Defaults to 0.05.
+        """
+        if not 0 < alpha <= 1:
+            raise ValueError("Alpha must be in (0, 1]")
+
+        self.alpha = alpha
+        self.background: np.ndarray | None = None
+        self._reference: ReferenceFrame | None = None
+        self._delta: np.ndarray | None = None
+
+    @property
+    def levels(self) -> np.ndarray | None:
+        """The background rounded to uint8 levels."""
+        return None if self._reference is None else self._reference.reference
+
+    def update(self, frame: np.ndarray) -> None:
+        """Blends a frame into the background, in place."""
+        if self.background is None:
+            self.background = frame.astype(np.float32)
+            self._reference = ReferenceFrame(frame.copy())
+            self._delta = np.empty_like(self.background)
+            return
+
+        np.subtract(frame, self.background, out=self._delta)
+        self._delta *= self.alpha
+        self.background += self._delta
+        np.rint(self.background, out=self._delta)
+        self.levels[...] = self._delta
+
+    def apply(self, frame: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """Subtracts the background from a frame, then learns the frame.
+
+        The difference saturates at 0 like ImageEnhancement.image_subtracting(), the
+        first frame only initializes the background and comes out black.
+
+        Args:
+            frame (np.ndarray): The uint8 frame.
+            out (np.ndarray, optional): Where to write the foreground, may be frame.
+
+        Returns:
+            np.ndarray: The foreground.
+        """
+        if self.background is None:
+            self.update(frame)
+            if out is None:
+                return np.zeros_like(frame)
+
+            out[...] = 0
+            return out
+
+        # into the buffer of the reference, the frame is still needed to learn it
+        foreground = self._reference.subtract(frame)
+        self.update(frame)
+        if out is None:
+            return foreground.copy()
+
+        out[...] = foreground
+        return out
+
+
+class FrameStream:
+    def __init__(
+        self,
+        source: FrameSource,
+        recipe: Recipe | None = None,
+        background: BackgroundModel | None = None,
+        buffers: int = 4,
+        name: str = "frame",
+    ) -> None:
+        """Runs a recipe over every frame of a stream, with the decoding of the next
+        frames overlapping the processing of the current one.
+
+        Point operations are applied in place, in the buffer the frame was decoded
+        into, so a stream of them allocates nothing per frame. The yielded images
+        share that buffer: they are only valid until the next frame is requested,
+        copy() them to keep them longer (the buffer of a copied frame is left to
+        the copy & replaced in the ring).
+
+        Args:
+            source (FrameSource): The frames.
+            recipe (Recipe, optional): The enhancement of each frame.
+            background (BackgroundModel, optional): Subtract a running background
+            from the enhanced frames, yielding the foreground only.
+            buffers (int, optional): The frames decoded ahead. Defaults to 4.
+            name (str, optional): The images are named name_index.
+        """
+        self.source = source
+        self.recipe = recipe or Recipe()
+        self.background = background
+        self.buffers = buffers
+        self.name = name
+        self.frames = 0
+        self.seconds = 0.0
+
+    @property
+    def fps(self) -> float:
+        return self.frames / self.seconds if self.seconds else 0.0
+
+    def __iter__(self) -> Iterator[Image]:
+        reader = FrameReader(self.source, self.buffers)
+        reader.start()
+        start = time.perf_counter()
+        try:
+            for slot, frame in reader.frames():
+                decoded = Image.from_array(
+                    frame, f"{self.name}_{self.frames}", open_type=self.source.open_type
+                )
+                img = self._process(decoded)
+                self.frames += 1
+                self.seconds = time.perf_counter() - start
+                yield img
+                # another image still shares the slot, e.g. a copy of the frame
+                reader.release(slot, reuse=decoded.writeable)
+        finally:
+            reader.stop()
+            self.seconds = time.perf_counter() - start
+            log.info(f"Stream {self.recipe}: {self.frames} frames, {self.fps:.1f} fps")
+
+    def _process(self, img: Image) -> Image:
+        img = (
+            self.recipe.apply(ImageEnhancement(img, lazy=True, keep_original=False))
+            .compute()
+            .img
+        )
+        if self.background is None:
+            return img
+
+        foreground = img.mutable_matrix()
+        self.background.apply(foreground, out=foreground)
+        return img
+
+    def run(self) -> FrameStream:
+        """Drains the stream, e.g. to measure its throughput."""
+        for _ in self:
+            pass
+
+        return self
@@ -1,3 +1,5 @@
-from . import image, image_stats
+from src.utils.lazy import submodules
 
-__all__ = ["image", "image_stats"]
+__all__ = ["image", "image_stats", "tiled_image"]
+
+__getattr__, __dir__ = submodules(__name__, __all__)
@@ -1,38 +1,501 @@
 from __future__ import annotations
 
-import cv2
+import os
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Iterator
+
 import numpy as np
 
+from src.utils import profiling
 from src.utils.files.file_utils import FileUtils as iuti
+from src.utils.files.storage import MemmapStorage
+from src.utils.image_enhancement.filters.border_treatment import BorderType
+from src.utils.lazy import lazy_import
+from src.utils.matrices.region_selection import synthesize
+
+cv2 = lazy_import("cv2")
+
+
+class Buffer:
+    def __init__(self, array: np.ndarray, borrowed: bool = False) -> None:
+        """The pixel storage of one or more images, shared copy-on-write.
+
+        Args:
+            array (np.ndarray): The pixels.
+            borrowed (bool, optional): The pixels belong to someone else (e.g. the
+            DecodeCache) & are never written, the image modifying them first gets a
+            copy of its own, see detach(). Defaults to False.
+        """
+        # a view of its own, so that sharing the buffer flags it read-only without
+        # touching the array of the caller
+        self.array = array.view()
+        self.writeable = array.flags.writeable and not borrowed
+        self.array.flags.writeable = self.writeable
+        self.borrowed = borrowed
+        # bumped on every change of the pixels, derived data is kept per version
+        self.version = 0
+        self._cache: dict[str, Any] = {}
+        self._cache_version = 0
+        self._owners: dict[int, weakref.ref[Image]] = {}
+
+    def borrow(self) -> Buffer:
+        """A borrowed handle on the pixels, sharing the data derived from them."""
+        buffer = Buffer(self.array, borrowed=True)
+        buffer._cache = self.cache
+        return buffer
+
+    def detach(self, out: np.ndarray | None = None) -> Buffer:
+        """A writeable copy of the pixels, keeping the data derived from them.
+
+        Args:
+            out (np.ndarray, optional): Where to copy the pixels, e.g. a memory-mapped
+            scratch file. Defaults to a new array.
+        """
+        if out is None:
+            out = np.array(self.array)
+        else:
+            np.copyto(out, self.array)
+
+        buffer = Buffer(out)
+        buffer.version = buffer._cache_version = self.version
+        buffer._cache = self.cache
+        return buffer
+
+    @property
+    def cache(self) -> dict[str, Any]:
+        """Data derived from the pixels of the current version."""
+        if self._cache_version != self.version:
+            self._cache = {}
+            self._cache_version = self.version
+
+        return self._cache
+
+    def bump(self) -> int:
+        """Marks the pixels as changed, dropping the data derived from them."""
+        self.version += 1
+        return self.version
+
+    @property
+    def shared(self) -> bool:
+        return sum(ref() is not None for ref in self._owners.values()) > 1
+
+    @property
+    def exposed(self) -> bool:
+        """Whether arrays handed out earlier may still write to the pixels, e.g. a
+        matrix held on to, a slice of it or the array the buffer was made from.
+        """
+        if not self.writeable:
+            return False
+
+        # every view of the pixels references the array owning their memory (numpy
+        # collapses the bases of views of views), beyond this buffer & the argument
+        # of getrefcount nothing should
+        return sys.getrefcount(self.array) > 2 or sys.getrefcount(self.array.base) > 2
+
+    def add(self, owner: Image) -> None:
+        self._owners[id(owner)] = weakref.ref(owner)
+        if self.shared:
+            self.array.flags.writeable = False
+
+    def discard(self, owner: Image) -> None:
+        self._owners.pop(id(owner), None)
+        self.reclaim()
+
+    def reclaim(self) -> bool:
+        """Gives write access back once a single owner is left.
+
+        Returns:
+            bool: Whether the pixels can be written in place.
+        """
+        if not self.shared and self.writeable:
+            self.array.flags.writeable = True
+
+        return self.array.flags.writeable
+
+
+class DecodeCache:
+    def __init__(self, max_bytes: int = 1 << 28) -> None:
+        """The decoded pixels of image files, shared by every Image opened from the
+        same unchanged file instead of decoding it again.
+
+        Every Image gets a borrowed handle on the pixels, copied once it asks for
+        writeable ones (a copy is much cheaper than a decode), so images of a file
+        never see each other's changes. The statistics derived from the pixels are
+        shared until they change. The least recently used files are dropped past
+        max_bytes.
+
+        Args:
+            max_bytes (int, optional): The budget, 0 disables the cache. Defaults
+            to 256 MiB.
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, tuple[tuple[int, int], Buffer]] = (
+            OrderedDict()
+        )
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self, path: str, open_type, decode: Callable[[str, Any], np.ndarray]
+    ) -> Buffer:
+        """A borrowed handle on the pixels of a file, decoded with
+        decode(path, open_type) on a miss.
+
+        Entries are keyed by the absolute path & open type, and only hit while the
+        file keeps the modification time & size it was decoded with.
+        """
+        stat = os.stat(path)
+        key = (os.path.abspath(path), open_type)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                profiling.note(decode="hit")
+                return entry[1].borrow()
+
+        profiling.note(decode="miss")
+        array = decode(path, open_type)
+        self.misses += 1
+        # memory-mapped frames are not decoded to begin with
+        if isinstance(array, np.memmap) or array.nbytes > self.max_bytes:
+            return Buffer(array)
+
+        array.flags.writeable = False
+        buffer = Buffer(array)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1].array.nbytes
+
+            self._entries[key] = (stamp, buffer)
+            self._bytes += array.nbytes
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted.array.nbytes
+
+        return buffer.borrow()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+class Tile:
+    def __init__(
+        self,
+        rows: slice,
+        cols: slice,
+        data: np.ndarray,
+        inner: tuple[slice, slice],
+    ) -> None:
+        """A block of an image.
+
+        Args:
+            rows (slice): The rows of the image the tile covers.
+            cols (slice): The columns of the image the tile covers.
+            data (np.ndarray): The pixels of the tile plus its halo, a view of the image.
+            inner (tuple[slice, slice]): Where the covered region sits inside data.
+        """
+        self.rows = rows
+        self.cols = cols
+        self.data = data
+        self.inner = inner
+
+    @property
+    def region(self) -> tuple[slice, slice]:
+        return (self.rows, self.cols)
 
 
 class Image:
+    tile_size: tuple[int, int] | None = None
+    decode_cache = DecodeCache()
+
     def __init__(self, path: str, open_type=iuti.ImageType.GRAYSCALE) -> None:
         """Initializes an ImageEnhancement object.
 
         Args:
             path (str): The path to the image file.
             open_type (ImageType): The type of the image, either grayscale or color.
+
+        The file is only decoded once while it is in decode_cache, the image
+        copies the decoded pixels on its first read of them.
         """
         self.path = iuti.get_absolute_path(path)
         if not iuti.path_exist(path):
             raise FileNotFoundError(f"File {path} does not exist")
         self.open_type = open_type
-        self.cv = cv2.imread(path, open_type.value)
-        self.matrix = np.array(self.cv).astype(np.uint8)
+        self._buffer: Buffer | None = None
+        self._attach(self.decode_cache.get(path, open_type, self._decode))
         self.name = iuti.extract_file_name(path)
 
+    @staticmethod
+    def _decode(path: str, open_type) -> np.ndarray:
+        """Reads the pixels of a file, .npy frames are memory-mapped (read-only,
+        copied on first write) instead of decoded.
+        """
+        if MemmapStorage.supports(path):
+            return MemmapStorage.open(path)
+
+        return np.asarray(cv2.imread(path, open_type.value)).astype(
+            np.uint8, copy=False
+        )
+
+    @classmethod
+    def from_raw(
+        cls,
+        path: str,
+        shape: tuple[int, ...],
+        open_type=iuti.ImageType.GRAYSCALE,
+        tile_size: tuple[int, int] | None = None,
+    ) -> Image:
+        """Memory-maps a file of raw uint8 pixels, without decoding or copying it.
+
+        Args:
+            path (str): The path to the raw file.
+            shape (tuple[int, ...]): The frame shape.
+            open_type (ImageType): The type of the image, either grayscale or color.
+            tile_size (tuple[int, int], optional): Process the image tile by tile.
+        """
+        if not iuti.path_exist(path):
+            raise FileNotFoundError(f"File {path} does not exist")
+
+        return cls._from_buffer(
+            Buffer(MemmapStorage.open(path, shape)),
+            iuti.extract_file_name(path),
+            iuti.get_absolute_path(path),
+            open_type,
+            tile_size,
+        )
+
+    @classmethod
+    def from_array(
+        cls,
+        matrix: np.ndarray,
+        name: str = "",
+        path: str = "",
+        open_type=iuti.ImageType.GRAYSCALE,
+    ) -> Image:
+        """Wraps already decoded pixels in an Image without copying them.
+
+        Args:
+            matrix (np.ndarray): The pixels.
+            name (str, optional): The image name. Defaults to "".
+            path (str, optional): The file the pixels came from. Defaults to "".
+            open_type (ImageType): The type of the image, either grayscale or color.
+        """
+        return cls._from_buffer(Buffer(matrix), name, path, open_type)
+
+    @classmethod
+    def _from_buffer(
+        cls,
+        buffer: Buffer,
+        name: str,
+        path: str,
+        open_type,
+        tile_size: tuple[int, int] | None = None,
+    ) -> Image:
+        img = cls.__new__(cls)
+        img.path = path
+        img.open_type = open_type
+        img.tile_size = tile_size
+        img._buffer = None
+        img._attach(buffer)
+        img.name = name
+        return img
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """The pixels of the image, safe to modify in place (call update() after).
+
+        Pixels shared with a copy of the image or borrowed from the decode cache
+        are copied first, read them through pixels to avoid that. Memory-mapped
+        read-only files stay read-only, see mutable_matrix().
+        """
+        buffer = self._buffer
+        if buffer.borrowed or (buffer.writeable and not buffer.reclaim()):
+            self._attach(buffer.detach(self.empty_like()))
+
+        return self._buffer.array
+
+    @property
+    def pixels(self) -> np.ndarray:
+        """A read-only view of the pixels, never copied."""
+        pixels = self._buffer.array.view()
+        pixels.flags.writeable = False
+        return pixels
+
+    @matrix.setter
+    def matrix(self, matrix: np.ndarray) -> None:
+        self._attach(Buffer(matrix))
+
+    @property
+    def cv(self) -> np.ndarray:
+        """A view of the pixels for cv2, sharing memory (& write access) with the
+        matrix, call update() after drawing on it.
+        """
+        return self.matrix.view()
+
+    @property
+    def writeable(self) -> bool:
+        """Whether the pixels can be modified in place without copying them first,
+        i.e. no other image still references them.
+        """
+        return self._buffer.reclaim()
+
+    def _attach(self, buffer: Buffer) -> None:
+        if self._buffer is not None:
+            self._buffer.discard(self)
+
+        buffer.add(self)
+        self._buffer = buffer
+
+    def mutable_matrix(self) -> np.ndarray:
+        """Returns pixels that are safe to modify in place, copying them first only
+        when they are shared with another image (or read-only to begin with).
+        """
+        if not self.matrix.flags.writeable:
+            self._attach(self._buffer.detach(self.empty_like()))
+
+        self._buffer.bump()
+        return self._buffer.array
+
+    def empty_like(self) -> np.ndarray:
+        """Allocates uninitialized storage for pixels of the same shape & type."""
+        return np.empty(self.pixels.shape, self.pixels.dtype)
+
+    def tiles(
+        self, halo: int = 0, border_type: BorderType | None = None
+    ) -> Iterator[Tile]:
+        """Splits the image into tiles of tile_size, a single tile when it is None.
+
+        Args:
+            halo (int, optional): Extra rows & columns of the neighbouring tiles to
+            include around each tile (clamped at the image border), so that
+            neighbourhood operations see the same pixels as on the whole image.
+            Defaults to 0.
+            border_type (BorderType, optional): Synthesize the halo of the tiles
+            along the image border with it instead of clamping, for border types
+            that read the opposite side of the image (e.g. BorderType.WRAP).
+
+        Yields:
+            Tile: The tiles, row by row.
+        """
+        # writeable views of pixels that can be modified in place, see writeable
+        matrix = self._buffer.array
+        m, n = matrix.shape[:2]
+        tile_m, tile_n = self.tile_size or (m, n)
+        synthesize_halo = bool(halo and self.tile_size) and border_type not in (
+            None,
+            BorderType.IGNORE,
+        )
+        # a single empty tile for empty images
+        for top in range(0, m or 1, tile_m or 1):
+            for left in range(0, n or 1, tile_n or 1):
+                bottom, right = min(top + tile_m, m), min(left + tile_n, n)
+                r0, c0 = max(top - halo, 0), max(left - halo, 0)
+                r1, c1 = min(bottom + halo, m), min(right + halo, n)
+                clamped = (r0, c0, r1, c1) != (
+                    top - halo,
+                    left - halo,
+                    bottom + halo,
+                    right + halo,
+                )
+                if synthesize_halo and clamped:
+                    r0, c0 = top - halo, left - halo
+                    r1, c1 = bottom + halo, right + halo
+                    data = synthesize(matrix, range(r0, r1), range(c0, c1), border_type)
+                else:
+                    data = matrix[r0:r1, c0:c1]
+
+                yield Tile(
+                    slice(top, bottom),
+                    slice(left, right),
+                    data,
+                    (slice(top - r0, bottom - r0), slice(left - c0, right - c0)),
+                )
+
+    def map_tiles(
+        self,
+        func: Callable[[np.ndarray], np.ndarray],
+        halo: int = 0,
+        border_type: BorderType | None = None,
+    ) -> Image:
+        """Replaces the pixels with func applied tile by tile.
+
+        Args:
+            func (Callable): Maps the pixels of a tile (plus halo) to new pixels of
+            the same shape.
+            halo (int, optional): The neighbourhood radius func needs. Defaults to 0.
+            border_type (BorderType, optional): How func treats the border, see
+            tiles().
+
+        Returns:
+            Image: The updated image.
+        """
+        out = self.empty_like()
+        for tile in self.tiles(halo, border_type):
+            out[tile.region] = func(tile.data)[tile.inner]
+
+        self.matrix = out
+        self.update()
+        return self
+
+    @property
+    def cache(self) -> dict[str, Any]:
+        """Data derived from the pixels (e.g. statistics), dropped on update()."""
+        return self._buffer.cache
+
+    @property
+    def version(self) -> int:
+        """Counts the updates of the pixels, see update()."""
+        return self._buffer.version
+
+    def cached(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Returns the derived data stored under key, computing it on a miss.
+
+        Args:
+            key (str): The name of the data, e.g. "moments".
+            compute (Callable): Derives the data from the current pixels.
+
+        Returns:
+            Any: The data, valid until the next update().
+        """
+        cache = self.cache
+        if key not in cache:
+            profiling.note(**{f"cache.{key}": "miss"})
+            cache[key] = compute()
+        else:
+            profiling.note(**{f"cache.{key}": "hit"})
+
+        return cache[key]
+
     @property
     def levels(self) -> int:
         """returns the maximum of levels in an image, e.g. range 0 -> 255 of grayscale is 256 levels
 
+        Color images have as many levels per channel, each channel is processed on
+        its own.
+
         Return: 256
         """
         # return self.cv.max() + 1  # from 0 to 255 so 256 levels
-        if self.open_type == iuti.ImageType.GRAYSCALE:
+        if self.open_type in (iuti.ImageType.GRAYSCALE, iuti.ImageType.COLOR):
             return 256
-        elif self.open_type == iuti.ImageType.COLOR:
-            return 256**3
         else:
             raise ValueError(f"Unknown open_type: {self.open_type}")
 
@@ -45,28 +508,39 @@ class Image:
         Returns:
             bool: True if equal, False otherwise.
         """
-        if not isinstance(o, Image) or self.matrix.shape != o.matrix.shape:
+        if not isinstance(o, Image) or self.pixels.shape != o.pixels.shape:
             return False
 
-        return np.array_equal(self.matrix, o.matrix)
+        return np.array_equal(self.pixels, o.pixels)
 
     def update(self) -> None:
-        """Responsible for updating the image cv attribute from a modified matrix"""
+        """Responsible for updating the image cv attribute from a modified matrix
 
-        self.cv = self.matrix.copy()
+        The cv attribute is a view of the matrix, so there is nothing to copy,
+        only the version of the pixels is bumped, which drops the data derived from
+        the old ones.
+        """
+        self._buffer.bump()
 
     def copy(self) -> Image:
         """
         Returns a new Image object that is a copy of the current image.
+
+        Both images share the pixels until either one is modified, nothing is read
+        from disk or copied up front. Unless arrays of the pixels handed out before
+        (e.g. a matrix or cv view held on to) could still modify them, the copy
+        then gets a snapshot of its own.
         """
-        new = Image(self.path, self.open_type)
-        new.matrix = self.matrix
-        new.cv = self.cv
-        new.name = self.name
-        return new
+        buffer = self._buffer
+        if buffer.exposed:
+            buffer = buffer.detach(self.empty_like())
+
+        return type(self)._from_buffer(
+            buffer, self.name, self.path, self.open_type, self.tile_size
+        )
 
     def __len__(self) -> int:
-        return len(self.matrix)
+        return len(self.pixels)
 
     @property
     def resolution(self) -> tuple[int, int]:
@@ -75,5 +549,10 @@ class Image:
         Returns:
             tuple: The resolution of the image.
         """
-        m, n = self.matrix.shape
+        m, n = self.pixels.shape[:2]
         return (m, n)
+
+    @property
+    def channels(self) -> int:
+        """The amount of values per pixel, 1 for grayscale & 3 for BGR images."""
+        return self.pixels.shape[2] if self.pixels.ndim == 3 else 1
@@ -1,88 +1,287 @@
+from __future__ import annotations
+
 import logging
+from concurrent.futures import Future
 from math import sqrt
+from typing import Iterable
 
-import cv2
-import matplotlib.pyplot as plt
+import numpy as np
 
 from src.image_props.image import Image
 from src.utils.files.file_utils import FileUtils as uti
+from src.utils.files.writer import ImageWriter, write_image
+from src.utils.image_props.histogram_plot import render_histogram
+from src.utils.lazy import lazy_import
+
+cv2 = lazy_import("cv2")
 
 log = logging.getLogger(__name__)
 
+LEVELS = 256
+BACKENDS = ("canvas", "matplotlib")
+
+
+def channel_histograms(matrix: np.ndarray) -> np.ndarray:
+    """Counts the levels of uint8 pixels with a single bincount.
+
+    The levels of channel c are offset by c * 256, so the bins of every channel
+    come out of the same pass.
+
+    Returns:
+        np.ndarray: 256 counts, or channels x 256 for multi-channel pixels.
+    """
+    if matrix.ndim == 2:
+        return np.bincount(matrix.ravel(), minlength=LEVELS)
+
+    channels = matrix.shape[2]
+    offsets = np.arange(channels, dtype=np.uint16) * LEVELS
+    hist = np.bincount((matrix + offsets).ravel(), minlength=channels * LEVELS)
+    return hist.reshape(channels, LEVELS)
+
+
+class Moments:
+    def __init__(
+        self,
+        count: int = 0,
+        mean: float = 0.0,
+        m2: float = 0.0,
+        minimum: int | float | None = None,
+        maximum: int | float | None = None,
+        hist: np.ndarray | None = None,
+    ) -> None:
+        """Summary statistics of a set of pixels that can be merged with the ones of
+        another set (tiles of a frame, frames of a batch) without revisiting them.
+
+        Args:
+            count (int): The amount of pixels.
+            mean (float): Their mean.
+            m2 (float): The sum of squared differences from the mean.
+            minimum (int | float, optional): The smallest pixel.
+            maximum (int | float, optional): The largest pixel.
+            hist (np.ndarray, optional): 256 level counts, per channel for
+            multi-channel images, only kept for uint8 pixels.
+        """
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.minimum = minimum
+        self.maximum = maximum
+        self.hist = hist
+
+    @classmethod
+    def from_matrix(cls, matrix: np.ndarray) -> Moments:
+        """Computes the moments of a matrix.
+
+        uint8 pixels are counted into a histogram with a single pass, everything
+        else is then derived from the 256 bins.
+        """
+        if matrix.dtype != np.uint8:
+            values = matrix.astype(np.float64, copy=False)
+            mean = float(values.mean()) if values.size else 0.0
+            return cls(
+                values.size,
+                mean,
+                float(((values - mean) ** 2).sum()),
+                values.min() if values.size else None,
+                values.max() if values.size else None,
+            )
+
+        return cls.from_hist(channel_histograms(matrix))
+
+    @classmethod
+    def from_hist(cls, hist: np.ndarray) -> Moments:
+        """Computes the moments of the pixels counted in a 256 bins histogram, or in
+        one per channel.
+        """
+        hist = hist.astype(np.int64)
+        total = hist.reshape(-1, LEVELS).sum(axis=0)
+        count = int(total.sum())
+        if count == 0:
+            return cls(hist=hist)
+
+        levels = np.arange(LEVELS)
+        present = np.flatnonzero(total)
+        mean = int(total @ levels) / count
+        return cls(
+            count,
+            mean,
+            float(total @ (levels - mean) ** 2),
+            int(present[0]),
+            int(present[-1]),
+            hist,
+        )
+
+    def merge(self, other: Moments) -> Moments:
+        """Combines the moments of two disjoint sets of pixels (Chan et al.)."""
+        # the (empty) histogram of empty sets is kept, e.g. of an empty image
+        if not other.count and (self.count or other.hist is None):
+            return self
+        if not self.count:
+            return other
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        hist = None
+        if self.hist is not None and other.hist is not None:
+            hist = self.hist + other.hist
+
+        return Moments(
+            count,
+            self.mean + delta * other.count / count,
+            self.m2 + other.m2 + delta**2 * self.count * other.count / count,
+            min(self.minimum, other.minimum),
+            max(self.maximum, other.maximum),
+            hist,
+        )
+
+    __add__ = merge
+
+    @classmethod
+    def merge_all(cls, moments: Iterable[Moments]) -> Moments:
+        merged = cls()
+        for m in moments:
+            merged = merged.merge(m)
+
+        return merged
+
+    @property
+    def sum(self) -> int | float:
+        if self.hist is not None:
+            return int((self.hist @ np.arange(LEVELS)).sum())
+
+        return self.mean * self.count
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return sqrt(self.variance)
+
 
 class ImageStatistics:
     def __init__(self, img: Image) -> None:
         self.img = img
-        self.length = len(img.matrix) * len(img.matrix[0])
+        self.length = img.pixels.size
 
-    def sum(self) -> int:
-        sum = 0
-        for row in self.img.matrix:
-            for col in row:
-                sum += col
+    @property
+    def moments(self) -> Moments:
+        """All the statistics of the image, computed together in one pass and cached
+        on it until its pixels change.
+        """
+        return self.img.cached(
+            "moments",
+            lambda: Moments.merge_all(
+                Moments.from_matrix(tile.data) for tile in self.img.tiles()
+            ),
+        )
+
+    def histogram(self) -> np.ndarray | None:
+        return self.moments.hist
 
-        return sum
+    def sum(self) -> int:
+        return self.moments.sum
 
     def mean(self) -> float:
-        return self.sum() / self.length
+        return self.sum() / self.length if self.length else 0.0
 
     def variance(self) -> float:
-        m = self.mean()
-
-        sum = 0
-        for row in self.img.matrix:
-            for col in row:
-                sum += (col - m) ** 2
-
-        return sum / self.length
+        return self.moments.variance
 
     def std(self) -> float:
         return sqrt(self.variance())
 
     def minimum(self) -> int:
-        min_pixel = self.img.matrix[0][0]
-        for row in self.img.matrix:
-            for col in row:
-                min_pixel = min(col, min_pixel)
-
-        return min_pixel
+        return self.moments.minimum
 
     def maximum(self) -> int:
-        max_pixel = self.img.matrix[0][0]
-        for row in self.img.matrix:
-            for col in row:
-                max_pixel = max(col, max_pixel)
+        return self.moments.maximum
 
-        return max_pixel
+    def plot_hist(self, backend: str = "canvas") -> np.ndarray:
+        """Plots the histogram of the image.
 
-    def _hist(self):
-        if self.img.open_type in [uti.ImageType.COLOR, uti.ImageType.UNCHANGED]:
-            raise TypeError(
-                "Cannot create histogram of color image, Not yet implemented."
-            )
+        Args:
+            backend (str, optional): "canvas" rasterizes the plot directly, fast
+            enough for batches, "matplotlib" draws a prettier one if matplotlib is
+            installed. Defaults to "canvas".
+
+        Returns:
+            np.ndarray: The uint8 BGR plot.
+        """
+        hist = self.moments.hist
+        if hist is None:
+            raise TypeError(f"Cannot create histogram of {self.img.pixels.dtype} image")
+
+        kind = "Grayscale" if hist.ndim == 1 else "Color"
+        title = f"{uti.image_title(self.img.name)} {kind} Histogram".strip()
+        if backend == "canvas":
+            return render_histogram(hist, title)
+
+        if backend == "matplotlib":
+            return self._matplotlib_hist(hist, title)
 
-        hist = cv2.calcHist([self.img.cv], [0], None, [256], [0, 256])
-        plt.figure(uti.image_title(self.img.name))
-        plt.title("Grayscale Histogram")
-        plt.xlabel("Pixel Value")
-        plt.ylabel("Frequency")
-        plt.plot(hist, color="black")
-        plt.xlim([0, 256])
-        return plt
+        raise ValueError(f"Unknown histogram backend {backend!r}, not in {BACKENDS}")
 
-    def save_hist(self) -> None:
+    @staticmethod
+    def _matplotlib_hist(hist: np.ndarray, title: str) -> np.ndarray:
+        try:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+        except ImportError as error:
+            raise ImportError(
+                "The matplotlib histogram backend needs matplotlib installed"
+            ) from error
+
+        # a figure outside of pyplot, freed with its last reference
+        figure = Figure()
+        canvas = FigureCanvasAgg(figure)
+        axes = figure.add_subplot()
+        axes.set_xlabel("Pixel Value")
+        axes.set_ylabel("Frequency")
+        axes.set_title(title)
+        if hist.ndim == 1:
+            axes.plot(hist, color="black")
+        else:
+            for channel, color in zip(hist, ("blue", "green", "red", "gray")):
+                axes.plot(channel, color=color)
+
+        axes.set_xlim([0, 256])
+        canvas.draw()
+        return cv2.cvtColor(np.asarray(canvas.buffer_rgba()), cv2.COLOR_RGBA2BGR)
+
+    def save_hist(
+        self, writer: ImageWriter | None = None, backend: str = "canvas"
+    ) -> Future[str] | None:
         """
         Saves the histogram of the image to a file in the 'res/plt/' directory.
+
+        Args:
+            writer (ImageWriter, optional): Encode & write the plot in the
+            background instead of before returning.
+            backend (str, optional): How to plot it, see plot_hist().
+
+        Returns:
+            Future[str] | None: The pending write, when given a writer.
         """
-        hist_dir = uti.create_folder("res/plt/")
+        hist_dir = "res/plt/"
         _, extension = uti.get_basename_extension(self.img.path)
         add_on = "_hist"
-        hist_path = hist_dir + self.img.name + add_on + extension
+        hist_path = hist_dir + self.img.name + add_on + (extension or ".png")
         log.info(f"Saving histogram {self.img.name}{add_on} to -> {hist_dir} 💾 ...")
-        self._hist().savefig(hist_path, format=extension[1:])
+        plot = self.plot_hist(backend)
+        if writer is not None:
+            return writer.submit(hist_path, plot)
+
+        uti.create_folder(hist_dir)
+        write_image(hist_path, plot)
+        return None
 
-    def show_hist(self) -> None:
+    def show_hist(self, backend: str = "canvas") -> None:
         """
         Displays the histogram of the image.
         """
-        self._hist().show()
+        name = uti.image_title(self.img.name) + " Histogram"
+        cv2.imshow(name, self.plot_hist(backend))
+        cv2.waitKey(0)
+        cv2.destroyWindow(name)
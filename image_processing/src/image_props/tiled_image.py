@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import weakref
+
+import numpy as np
+
+from src.utils.files.file_utils import FileUtils as iuti
+
+from .image import Image
+
+
+class TiledImage(Image):
+    def __init__(
+        self,
+        path: str,
+        open_type=iuti.ImageType.GRAYSCALE,
+        tile_size: tuple[int, int] = (1024, 1024),
+    ) -> None:
+        """An image processed tile by tile, for frames larger than memory.
+
+        .npy files are memory-mapped rather than read, so only the tiles being
+        processed are paged in. Results are written to memory-mapped scratch files,
+        peak memory is bounded by the tile size instead of the image size.
+
+        Args:
+            path (str): The path to the image file.
+            open_type (ImageType): The type of the image, either grayscale or color.
+            tile_size (tuple[int, int], optional): Rows & columns of each tile.
+            Defaults to (1024, 1024).
+        """
+        super().__init__(path, open_type)
+        self.tile_size = tile_size
+
+    def empty_like(self) -> np.ndarray:
+        """Allocates a memory-mapped scratch file, removed once it is unreferenced."""
+        fd, path = tempfile.mkstemp(prefix=f"{self.name}_", suffix=".npy")
+        os.close(fd)
+        out = np.lib.format.open_memmap(
+            path, mode="w+", dtype=self.pixels.dtype, shape=self.pixels.shape
+        )
+        weakref.finalize(out, os.remove, path)
+        return out
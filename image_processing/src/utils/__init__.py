@@ -1,3 +1,5 @@
-from . import files, image_enhancement, image_props
+from .lazy import submodules
 
 __all__ = ["files", "image_props", "image_enhancement"]
+
+__getattr__, __dir__ = submodules(__name__, __all__)
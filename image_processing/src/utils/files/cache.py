@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from enum import Enum
+from typing import Any
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+EXTENSION = ".npz"
+# eviction frees space down to this fraction of the budget, so that it runs once per
+# many insertions rather than on every one
+LOW_WATER = 0.9
+
+
+def canonical(value: Any) -> Any:
+    """A JSON friendly form of a value that is equal for equal values, arrays are
+    replaced by a digest of their type, shape & bytes, other objects by the
+    canonical form of their cache_key(), if they have one.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+
+    if isinstance(value, Enum):
+        return [type(value).__name__, canonical(value.value)]
+
+    if isinstance(value, np.generic):
+        return value.item()
+
+    if isinstance(value, np.ndarray):
+        return {
+            "dtype": value.dtype.str,
+            "shape": list(value.shape),
+            "sha256": hashlib.sha256(np.ascontiguousarray(value).data).hexdigest(),
+        }
+
+    if isinstance(value, (tuple, list)):
+        return [canonical(item) for item in value]
+
+    if isinstance(value, dict):
+        return {str(key): canonical(item) for key, item in sorted(value.items())}
+
+    cache_key = getattr(value, "cache_key", None)
+    if callable(cache_key):
+        return [type(value).__name__, canonical(cache_key())]
+
+    raise TypeError(f"Can't derive a cache key from {type(value).__name__}")
+
+
+def file_fingerprint(path: str) -> list:
+    """Identifies the content of a file by its path, size & modification time,
+    without reading it.
+    """
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+
+def pixels_fingerprint(matrix: np.ndarray) -> dict:
+    """Identifies a frame by its pixels, whatever file or path they came from."""
+    return canonical(matrix)
+
+
+class ResultCache:
+    def __init__(self, directory: str, max_bytes: int = 1 << 30) -> None:
+        """An on-disk cache of computed frames, addressed by the hash of whatever
+        produced them (e.g. the input fingerprint & the recipe).
+
+        Entries are written to a temporary file & renamed into place, so readers,
+        concurrent writers or a crash never see a partial entry. Reading an entry
+        refreshes its modification time, the least recently used entries are
+        evicted once the cache grows past max_bytes. Copies of the cache in other
+        processes (e.g. batch workers) leave that to the process that created it,
+        see evict().
+
+        Args:
+            directory (str): Where to store the entries, created if missing.
+            max_bytes (int, optional): The size budget. Defaults to 1 GiB.
+        """
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self._bytes: int | None = None
+        self._pid = os.getpid()
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """The address of the result of parts, see canonical()."""
+        text = json.dumps(canonical(list(parts)), separators=(",", ":"))
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        # spread over 256 sub directories, to keep directories small on large corpora
+        return os.path.join(self.directory, key[:2], key + EXTENSION)
+
+    def __contains__(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def get(self, key: str) -> tuple[np.ndarray, dict[str, Any]] | None:
+        """Reads an entry.
+
+        Returns:
+            tuple[np.ndarray, dict] | None: The frame & its metadata, None on a miss.
+        """
+        path = self.path(key)
+        try:
+            with np.load(path) as entry:
+                matrix = entry["matrix"]
+                meta = json.loads(entry["meta"].item())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as error:
+            log.warning(f"Dropping unreadable cache entry {path}: {error}")
+            self._remove(path)
+            return None
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+        return matrix, meta
+
+    def put(self, key: str, matrix: np.ndarray, **meta: Any) -> str:
+        """Stores an entry atomically, then evicts old ones if over budget.
+
+        Args:
+            key (str): The address, see key().
+            matrix (np.ndarray): The frame.
+            meta: JSON serializable data to store with it, e.g. the image name.
+
+        Returns:
+            str: The entry path.
+        """
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        replaced = self._file_size(path)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                np.savez(file, matrix=matrix, meta=np.array(json.dumps(meta)))
+            os.replace(tmp, path)
+        except BaseException:
+            self._remove(tmp)
+            raise
+
+        if os.getpid() != self._pid:
+            # a copy in a worker, its size would be counted again in every one
+            return path
+
+        if self._bytes is not None:
+            self._bytes += os.path.getsize(path) - replaced
+        if self.size() > self.max_bytes:
+            self.evict()
+
+        return path
+
+    def _entries(self) -> list[os.DirEntry]:
+        entries = []
+        for shard in os.scandir(self.directory):
+            if shard.is_dir():
+                entries.extend(
+                    entry
+                    for entry in os.scandir(shard.path)
+                    if entry.name.endswith(EXTENSION)
+                )
+
+        return entries
+
+    def size(self) -> int:
+        """The bytes used by the entries, counted once & then kept up to date by
+        this process.
+        """
+        if self._bytes is None:
+            self._bytes = sum(entry.stat().st_size for entry in self._entries())
+
+        return self._bytes
+
+    def evict(self, max_bytes: int | None = None) -> int:
+        """Removes the least recently used entries until the cache fits the budget,
+        with some headroom, see LOW_WATER.
+
+        Args:
+            max_bytes (int, optional): The budget. Defaults to max_bytes.
+
+        Returns:
+            int: The amount of entries removed.
+        """
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+
+            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        if total > budget:
+            target = budget * LOW_WATER
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+
+                self._remove(path)
+                total -= size
+                removed += 1
+
+            log.info(f"Evicted {removed} cache entries, {total} bytes left")
+
+        self._bytes = total
+        return removed
+
+    def clear(self) -> None:
+        for entry in self._entries():
+            self._remove(entry.path)
+
+        self._bytes = 0
+
+    @staticmethod
+    def _file_size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -2,8 +2,6 @@ import logging
 import os
 from enum import Enum
 
-from screeninfo import get_monitors
-
 log = logging.getLogger(__name__)
 
 
@@ -47,17 +45,23 @@ class FileUtils:
 
     @staticmethod
     def create_folder(path: str) -> str:
-        if FileUtils.check_path_exists(path):
+        # a single mkdir in the common case, without racing other writers between
+        # an existence check & the creation
+        try:
+            os.makedirs(path)
+        except FileExistsError:
             log.debug(f"Directory {path} already exists.")
             return path
 
-        log.info("Creating directory: " + path + " ...")
-        os.mkdir(path)
+        log.info("Created directory: " + path)
         return path
 
     # bug
     @staticmethod
     def get_center_screen(window):
+        # a GUI only dependency, imported when a window is actually shown
+        from screeninfo import get_monitors
+
         monitor = get_monitors()[0]
         x_center = (monitor.width - window[2]) // 2
         y_center = (monitor.height - window[2]) // 2
@@ -0,0 +1,75 @@
+import logging
+import os
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+class MemmapStorage:
+    """Uncompressed uint8 frames on disk, opened with np.memmap.
+
+    Opening a frame neither decodes nor copies it: pages are read on first access
+    and shared between every process mapping the same file.
+    """
+
+    NPY = ".npy"
+    RAW_EXTENSIONS = (".raw", ".bin", ".gray")
+
+    @staticmethod
+    def supports(path: str) -> bool:
+        _, extension = os.path.splitext(path)
+        return extension in (MemmapStorage.NPY, *MemmapStorage.RAW_EXTENSIONS)
+
+    @staticmethod
+    def open(
+        path: str,
+        shape: tuple[int, ...] | None = None,
+        dtype: np.dtype = np.dtype(np.uint8),
+        mode: str = "r",
+    ) -> np.ndarray:
+        """Maps a frame into memory.
+
+        Args:
+            path (str): A .npy file, or raw pixels (.raw, .bin, .gray).
+            shape (tuple[int, ...], optional): The frame shape, required for raw pixels.
+            dtype (np.dtype, optional): The raw pixel type. Defaults to uint8.
+            mode (str, optional): "r" read-only, "r+" read-write or "c"
+            copy-on-write. Defaults to "r".
+
+        Returns:
+            np.ndarray: The memory-mapped frame.
+        """
+        _, extension = os.path.splitext(path)
+        if extension == MemmapStorage.NPY:
+            return np.load(path, mmap_mode=mode)
+
+        if extension not in MemmapStorage.RAW_EXTENSIONS:
+            raise ValueError(f"Cannot memory-map {extension} files")
+
+        if shape is None:
+            raise ValueError("The shape of raw frames must be given")
+
+        return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+    @staticmethod
+    def save(path: str, matrix: np.ndarray) -> str:
+        """Writes a frame so that it can be memory-mapped later.
+
+        Args:
+            path (str): The destination, its extension picks .npy or raw pixels.
+            matrix (np.ndarray): The frame.
+
+        Returns:
+            str: The destination path.
+        """
+        _, extension = os.path.splitext(path)
+        if extension == MemmapStorage.NPY:
+            np.save(path, matrix, allow_pickle=False)
+        elif extension in MemmapStorage.RAW_EXTENSIONS:
+            np.ascontiguousarray(matrix).tofile(path)
+        else:
+            raise ValueError(f"Cannot memory-map {extension} files")
+
+        log.debug(f"Stored {matrix.shape} {matrix.dtype} frame at {path}")
+        return path
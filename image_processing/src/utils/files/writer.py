@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import tempfile
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable
+
+import numpy as np
+
+from ..lazy import lazy_import
+from .storage import MemmapStorage
+
+cv2 = lazy_import("cv2")
+
+log = logging.getLogger(__name__)
+
+# what workers are told to exit with, queued once per worker by close()
+_STOP = None
+
+
+def encode_params(
+    extension: str, jpeg_quality: int | None = None, png_compression: int | None = None
+) -> list[int]:
+    """The cv2.imencode() flags of a format, empty to keep the OpenCV defaults.
+
+    Args:
+        extension (str): The format, e.g. ".jpg".
+        jpeg_quality (int, optional): 0 to 100, also used for WebP.
+        png_compression (int, optional): zlib level, 0 (fastest) to 9 (smallest).
+    """
+    extension = extension.lower()
+    params = []
+    if jpeg_quality is not None:
+        if not 0 <= jpeg_quality <= 100:
+            raise ValueError(f"JPEG quality must be within 0 & 100, not {jpeg_quality}")
+
+        if extension in (".jpg", ".jpeg"):
+            params += [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+        elif extension == ".webp":
+            params += [cv2.IMWRITE_WEBP_QUALITY, max(jpeg_quality, 1)]
+
+    if png_compression is not None:
+        if not 0 <= png_compression <= 9:
+            raise ValueError(
+                f"PNG compression must be within 0 & 9, not {png_compression}"
+            )
+
+        if extension == ".png":
+            params += [cv2.IMWRITE_PNG_COMPRESSION, png_compression]
+
+    return params
+
+
+def write_atomic(path: str, data: bytes | np.ndarray) -> str:
+    """Writes a file through a temporary one renamed into place, so readers never
+    see a partial file.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+    return path
+
+
+def write_image(path: str, matrix: np.ndarray, params: list[int] | None = None) -> str:
+    """Encodes a frame in the format of its extension & writes it.
+
+    .npy & raw frames are stored uncompressed, see MemmapStorage.
+    """
+    if MemmapStorage.supports(path):
+        return MemmapStorage.save(path, matrix)
+
+    _, extension = os.path.splitext(path)
+    ok, encoded = cv2.imencode(extension, matrix, params or [])
+    if not ok:
+        raise OSError(f"Could not encode {path}")
+
+    return write_atomic(path, encoded)
+
+
+class ImageWriter:
+    def __init__(
+        self,
+        workers: int = 2,
+        max_pending: int = 8,
+        jpeg_quality: int | None = None,
+        png_compression: int | None = None,
+    ) -> None:
+        """Encodes & writes images on a pool of background threads, cv2 releases the
+        GIL while encoding, so the caller carries on with the next frame meanwhile.
+
+        submit() blocks while max_pending writes are queued, bounding the frames
+        kept in memory when the caller produces them faster than they are written.
+        flush() waits for the queued writes, close() (or leaving a with block)
+        also stops the workers.
+
+        Args:
+            workers (int, optional): Threads encoding & writing. Defaults to 2.
+            max_pending (int, optional): Writes queued before submit() blocks.
+            Defaults to 8.
+            jpeg_quality (int, optional): JPEG & WebP quality, 0 to 100.
+            Defaults to the OpenCV one (95).
+            png_compression (int, optional): PNG zlib level, 0 to 9. Defaults to
+            the OpenCV one.
+        """
+        if workers < 1 or max_pending < 1:
+            raise ValueError("A writer needs at least a worker & a pending slot")
+
+        # validated once here rather than on every frame
+        encode_params(".jpg", jpeg_quality, png_compression)
+        self.jpeg_quality = jpeg_quality
+        self.png_compression = png_compression
+        self.written = 0
+        self._queue: queue.Queue = queue.Queue(max_pending)
+        self._errors: list[BaseException] = []
+        self._folders: set[str] = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._workers = [
+            threading.Thread(target=self._work, name=f"image-writer-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def params(self, extension: str) -> list[int]:
+        return encode_params(extension, self.jpeg_quality, self.png_compression)
+
+    def submit(
+        self, path: str, pixels: Any, timeout: float | None = None
+    ) -> Future[str]:
+        """Queues a frame to be written, blocking while the queue is full.
+
+        Args:
+            path (str): The destination, its extension picks the format.
+            pixels (np.ndarray | Image): The frame. An array must not be modified
+            until written, pass an Image copy (see Image.copy()) to snapshot it
+            without copying the pixels.
+            timeout (float, optional): How long to wait for room in the queue.
+
+        Raises:
+            queue.Full: When no room was made within timeout.
+
+        Returns:
+            Future[str]: Resolves to the path once written.
+        """
+
+        def encode() -> None:
+            matrix = getattr(pixels, "pixels", pixels)
+            write_image(path, matrix, self.params(os.path.splitext(path)[1]))
+
+        return self._put(path, encode, timeout)
+
+    def submit_encoded(
+        self,
+        path: str,
+        encode: Callable[[], bytes],
+        timeout: float | None = None,
+    ) -> Future[str]:
+        """Queues a file whose bytes are produced by encode(), on a worker, e.g. a
+        rendered plot. See submit().
+        """
+        return self._put(path, lambda: write_atomic(path, encode()), timeout)
+
+    def _put(
+        self, path: str, write: Callable[[], Any], timeout: float | None
+    ) -> Future[str]:
+        if self._closed:
+            raise RuntimeError("The writer is closed")
+
+        future: Future[str] = Future()
+        self._queue.put((path, write, future), timeout=timeout)
+        return future
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+
+                path, write, future = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                try:
+                    self._folder(path)
+                    write()
+                except BaseException as error:
+                    log.error(f"Failed to write {path}: {error}")
+                    with self._lock:
+                        self._errors.append(error)
+                    future.set_exception(error)
+                else:
+                    with self._lock:
+                        self.written += 1
+                    future.set_result(path)
+            finally:
+                # drop the job before flush() can return, a copy of an image keeps
+                # its pixels shared (& copied on the next write) while referenced
+                item = write = None
+                self._queue.task_done()
+
+    def _folder(self, path: str) -> None:
+        folder = os.path.dirname(path)
+        if folder and folder not in self._folders:
+            os.makedirs(folder, exist_ok=True)
+            self._folders.add(folder)
+
+    def flush(self) -> None:
+        """Waits for every queued write.
+
+        Raises:
+            The first error of the writes that failed since the last flush.
+        """
+        self._queue.join()
+        with self._lock:
+            errors, self._errors = self._errors, []
+
+        if errors:
+            raise errors[0]
+
+    def close(self) -> None:
+        """Flushes, then stops the workers. Idempotent."""
+        if self._closed:
+            return
+
+        self._closed = True
+        try:
+            self.flush()
+        finally:
+            for _ in self._workers:
+                self._queue.put(_STOP)
+            for worker in self._workers:
+                worker.join()
+
+    def __enter__(self) -> ImageWriter:
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -1,3 +1,5 @@
-from . import linear, non_linear
+from src.utils.lazy import submodules
 
 __all__ = ["linear", "non_linear"]
+
+__getattr__, __dir__ = submodules(__name__, __all__)
@@ -1,21 +1,54 @@
 from enum import Enum
 
+import numpy as np
+
 
 class BorderType(Enum):
     IGNORE = "ignore"
     REPEAT = "repeat"
     REFLECT = "reflect"
+    CONSTANT = "constant"
+    WRAP = "wrap"
 
 
 class BorderTreatment:
-    def ignore(self):
+    """Maps indices falling outside [0, size) back into the matrix, so border
+    pixels can be synthesized by indexing instead of padding the whole matrix.
+    """
+
+    # marks the indices that take the constant value
+    OUTSIDE = -1
+
+    @staticmethod
+    def ignore(index: np.ndarray, size: int) -> np.ndarray:
         """That is to copy the borders pixels as to the enhanced matrix"""
-        ...
+        return BorderTreatment.repeat(index, size)
 
-    def repeat(self):
+    @staticmethod
+    def repeat(index: np.ndarray, size: int) -> np.ndarray:
         """Consider as if the images continue the last row /column without changes"""
-        ...
+        return np.clip(index, 0, size - 1)
 
-    def reflect(self):
+    @staticmethod
+    def reflect(index: np.ndarray, size: int) -> np.ndarray:
         """Mirror The row/column across boarder"""
-        ...
+        if size == 1:
+            return np.zeros_like(index)
+
+        period = 2 * (size - 1)
+        index = np.abs(index) % period
+        return np.where(index < size, index, period - index)
+
+    @staticmethod
+    def constant(index: np.ndarray, size: int) -> np.ndarray:
+        """Surround the image with a constant value"""
+        return np.where((0 <= index) & (index < size), index, BorderTreatment.OUTSIDE)
+
+    @staticmethod
+    def wrap(index: np.ndarray, size: int) -> np.ndarray:
+        """Continue with the opposite side of the image, as if it tiled the plane"""
+        return index % size
+
+    @staticmethod
+    def remap(index: np.ndarray, size: int, border_type: BorderType) -> np.ndarray:
+        return getattr(BorderTreatment, border_type.value)(index, size)
@@ -0,0 +1,148 @@
+from enum import Enum
+
+import numpy as np
+
+from ....matrices.region_selection import border_bands, handle_border
+from ..border_treatment import BorderType
+
+# FFT convolution costs roughly this many operations per pixel and per log2(pixels)
+FFT_COST = 4
+
+
+class Strategy(Enum):
+    DIRECT = "direct"
+    SEPARABLE = "separable"
+    FFT = "fft"
+
+
+def separate(kernel: np.ndarray) -> tuple[np.ndarray, np.ndarray] | None:
+    """Splits a rank 1 kernel into a column & a row vector, kernel = outer(col, row).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray] | None: The vectors, None if not separable.
+    """
+    u, s, vt = np.linalg.svd(kernel)
+    if s[0] == 0 or (len(s) > 1 and s[1] > s[0] * 1e-10):
+        return None
+
+    scale = np.sqrt(s[0])
+    return (u[:, 0] * scale, vt[0] * scale)
+
+
+def choose_strategy(kernel: np.ndarray, shape: tuple[int, ...]) -> Strategy:
+    """Picks the cheapest way to convolve a frame of the given shape with the kernel.
+
+    Direct convolution costs k² multiply-adds per pixel, separable 2k and FFT about
+    log2 of the frame size, independently of the kernel.
+    """
+    k_m, k_n = kernel.shape
+    fft = FFT_COST * np.log2(max(shape[0] * shape[1], 2))
+    costs = {Strategy.DIRECT: k_m * k_n, Strategy.FFT: fft}
+    if separate(kernel) is not None:
+        costs[Strategy.SEPARABLE] = k_m + k_n
+
+    return min(costs, key=costs.get)
+
+
+def _direct(padded: np.ndarray, kernel: np.ndarray, shape: tuple) -> np.ndarray:
+    m, n = shape[:2]
+    out = np.zeros(padded[:m, :n].shape)
+    for (i, j), weight in np.ndenumerate(kernel):
+        if weight:
+            out += weight * padded[i : i + m, j : j + n]
+
+    return out
+
+
+def _separable(padded: np.ndarray, kernel: np.ndarray, shape: tuple) -> np.ndarray:
+    m, n = shape[:2]
+    col, row = separate(kernel)
+    rows = np.zeros(padded[:, :n].shape)
+    for j, weight in enumerate(row):
+        rows += weight * padded[:, j : j + n]
+
+    out = np.zeros(rows[:m].shape)
+    for i, weight in enumerate(col):
+        out += weight * rows[i : i + m]
+
+    return out
+
+
+def _fft(padded: np.ndarray, kernel: np.ndarray, shape: tuple) -> np.ndarray:
+    m, n = shape[:2]
+    k_m, k_n = kernel.shape
+    size = padded.shape[:2]
+    flipped = kernel[::-1, ::-1].reshape(kernel.shape + (1,) * (padded.ndim - 2))
+    spectrum = np.fft.rfft2(padded, size, axes=(0, 1)) * np.fft.rfft2(
+        flipped, size, axes=(0, 1)
+    )
+    # the circular wrap-around only reaches the first k - 1 rows & columns
+    full = np.fft.irfft2(spectrum, size, axes=(0, 1))
+    return full[k_m - 1 : k_m - 1 + m, k_n - 1 : k_n - 1 + n]
+
+
+STRATEGIES = {
+    Strategy.DIRECT: _direct,
+    Strategy.SEPARABLE: _separable,
+    Strategy.FFT: _fft,
+}
+
+
+def convolve(
+    matrix: np.ndarray,
+    kernel: np.ndarray,
+    border_type: BorderType = BorderType.IGNORE,
+    strategy: Strategy | None = None,
+) -> np.ndarray:
+    """Filters a frame with a kernel (correlation, as cv2.filter2D does).
+
+    Args:
+        matrix (np.ndarray): The frame, the kernel slides over its first two axes.
+        kernel (np.ndarray): An odd sized 2D kernel.
+        border_type (BorderType): How to treat the pixels the kernel doesn't fit
+        around. IGNORE copies them from the input unchanged, the others only
+        synthesize the border bands, the interior is read from the frame in place.
+        strategy (Strategy, optional): Force a strategy, chosen by cost otherwise.
+
+    Returns:
+        np.ndarray: The filtered frame, of the same shape & type.
+    """
+    k_m, k_n = kernel.shape
+    if k_m % 2 == 0 or k_n % 2 == 0:
+        raise ValueError("Kernel size must be odd.")
+
+    r_m, r_n = k_m // 2, k_n // 2
+    strategy = strategy or choose_strategy(kernel, matrix.shape)
+
+    m, n = matrix.shape[:2]
+    if m < k_m or n < k_n:
+        if border_type == BorderType.IGNORE:
+            return matrix.copy()
+
+        padded = handle_border(matrix, border_type, (r_m, r_n))
+        return _to_dtype(
+            STRATEGIES[strategy](padded, kernel, matrix.shape), matrix.dtype
+        )
+
+    # the interior is computed on the matrix itself, only the border is synthesized
+    out = matrix.copy() if border_type == BorderType.IGNORE else np.empty_like(matrix)
+    interior = (slice(r_m, m - r_m), slice(r_n, n - r_n))
+    shape = (m - 2 * r_m, n - 2 * r_n)
+    out[interior] = _to_dtype(STRATEGIES[strategy](matrix, kernel, shape), matrix.dtype)
+    if border_type == BorderType.IGNORE:
+        return out
+
+    for band, strip in border_bands(matrix, (r_m, r_n), border_type):
+        shape = (band[0].stop - band[0].start, band[1].stop - band[1].start)
+        out[band] = _to_dtype(STRATEGIES[strategy](strip, kernel, shape), matrix.dtype)
+
+    return out
+
+
+def _to_dtype(result: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    if not np.issubdtype(dtype, np.integer):
+        return result.astype(dtype)
+
+    # snap away float noise so every strategy rounds exact halves the same way
+    info = np.iinfo(dtype)
+    return np.clip(np.rint(np.round(result, 6)), info.min, info.max).astype(dtype)
@@ -4,20 +4,47 @@ import numpy as np
 
 
 class KernelName(Enum):
+    AVERAGING = "averaging"
     GAUSSIAN = "gaussian"
     CIRCULAR = "circular"
     PYRAMIDAL = "pyramidal"
     CONE = "cone"
+    CUSTOM = "custom"
 
 
-GAUSSIAN_KERNEL_3x3 = np.array([])
-GAUSSIAN_KERNEL_5x5 = np.array([])
+AVERAGING_KERNEL = np.ones((3, 3)) / 9
 
-CIRCULAR_KERNEL = np.array([])
-PYRAMIDAL_KERNEL = np.array([])
-CONE_KERNEL = np.array([])
+GAUSSIAN_KERNEL_3x3 = np.outer([1, 2, 1], [1, 2, 1]) / 16
+GAUSSIAN_KERNEL_5x5 = np.outer([1, 4, 6, 4, 1], [1, 4, 6, 4, 1]) / 256
+
+CIRCULAR_KERNEL = (
+    np.array(
+        [
+            [0, 1, 1, 1, 0],
+            [1, 1, 1, 1, 1],
+            [1, 1, 1, 1, 1],
+            [1, 1, 1, 1, 1],
+            [0, 1, 1, 1, 0],
+        ]
+    )
+    / 21
+)
+PYRAMIDAL_KERNEL = np.outer([1, 2, 3, 2, 1], [1, 2, 3, 2, 1]) / 81
+CONE_KERNEL = (
+    np.array(
+        [
+            [0, 0, 1, 0, 0],
+            [0, 2, 2, 2, 0],
+            [1, 2, 5, 2, 1],
+            [0, 2, 2, 2, 0],
+            [0, 0, 1, 0, 0],
+        ]
+    )
+    / 25
+)
 
 KERNEL_DICT = {
+    KernelName.AVERAGING: AVERAGING_KERNEL,
     KernelName.GAUSSIAN: {
         "3x3": GAUSSIAN_KERNEL_3x3,
         "5x5": GAUSSIAN_KERNEL_5x5,
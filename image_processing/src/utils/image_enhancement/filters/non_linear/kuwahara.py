@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import numpy as np
+
+from ....matrices.region_selection import border_bands, handle_border
+from ..border_treatment import BorderType
+
+
+def integral_image(matrix: np.ndarray) -> np.ndarray:
+    """The summed-area table of the matrix, with a leading row & column of zeros, so
+    that sat[i, j] is the sum of matrix[:i, :j].
+
+    Integer matrices are summed exactly as int64, others as float64.
+    """
+    dtype = np.int64 if np.issubdtype(matrix.dtype, np.integer) else np.float64
+    m, n = matrix.shape[:2]
+    sat = np.zeros((m + 1, n + 1) + matrix.shape[2:], dtype)
+    np.cumsum(matrix, axis=0, dtype=dtype, out=sat[1:, 1:])
+    np.cumsum(sat[1:, 1:], axis=1, out=sat[1:, 1:])
+    return sat
+
+
+def box_sums(
+    sat: np.ndarray, top: int, left: int, size: int, shape: tuple[int, int]
+) -> np.ndarray:
+    """Sums of the size x size boxes whose top left corners are at (top + i, left + j)
+    for every (i, j) of shape, with four lookups each whatever the size.
+    """
+    m, n = shape
+    bottom, right = top + size, left + size
+    return (
+        sat[bottom : bottom + m, right : right + n]
+        - sat[top : top + m, right : right + n]
+        - sat[bottom : bottom + m, left : left + n]
+        + sat[top : top + m, left : left + n]
+    )
+
+
+def _region_split(radius: int) -> list[tuple[int, int]]:
+    """The top left corners of the four (radius + 1) sized quadrants of a window,
+    relative to its own top left corner. They overlap on the center row & column.
+    """
+    return [(0, 0), (0, radius), (radius, 0), (radius, radius)]
+
+
+def _region_variance(sums: np.ndarray, squares: np.ndarray, count: int) -> np.ndarray:
+    """count² times the variance of each region, from its sum & sum of squares.
+
+    Exact for integer sums, summed over the channels of color images.
+    """
+    variance = count * squares - sums * sums
+    return variance.sum(axis=-1) if variance.ndim == 3 else variance
+
+
+def kuwahara(
+    matrix: np.ndarray,
+    radius: int = 2,
+    border_type: BorderType = BorderType.IGNORE,
+) -> np.ndarray:
+    """Edge preserving smoothing: replaces every pixel with the mean of the quadrant
+    of its (2 * radius + 1) window that has the lowest variance.
+
+    The means & variances are read from summed-area tables of the pixels & of their
+    squares, so the cost per pixel does not depend on the radius.
+
+    Args:
+        matrix (np.ndarray): The frame, the quadrant of color pixels is picked by the
+        variance summed over the channels.
+        radius (int): The window radius, the quadrants are radius + 1 pixels wide.
+        border_type (BorderType): How to fill the windows reaching outside, IGNORE
+        keeps the border pixels unchanged. The others only synthesize the border
+        bands, the interior is read from the frame in place.
+
+    Returns:
+        np.ndarray: The filtered frame, of the same shape & type.
+    """
+    if radius < 1:
+        raise ValueError("Radius must be at least 1.")
+
+    m, n = matrix.shape[:2]
+    if m <= 2 * radius or n <= 2 * radius:
+        if border_type == BorderType.IGNORE:
+            return matrix.copy()
+
+        padded = handle_border(matrix, border_type, radius)
+        return _kuwahara(padded, radius, (m, n))
+
+    # the interior is computed on the matrix itself, only the border is synthesized
+    out = matrix.copy() if border_type == BorderType.IGNORE else np.empty_like(matrix)
+    inner = (slice(radius, m - radius), slice(radius, n - radius))
+    out[inner] = _kuwahara(matrix, radius, (m - 2 * radius, n - 2 * radius))
+    if border_type == BorderType.IGNORE:
+        return out
+
+    for band, strip in border_bands(matrix, (radius, radius), border_type):
+        shape = (band[0].stop - band[0].start, band[1].stop - band[1].start)
+        out[band] = _kuwahara(strip, radius, shape)
+
+    return out
+
+
+def _kuwahara(padded: np.ndarray, radius: int, shape: tuple[int, int]) -> np.ndarray:
+    size = radius + 1
+    count = size * size
+    sat = integral_image(padded)
+    # squares of uint8 pixels fit in uint16, of others in the summing type
+    squared = padded.astype(np.uint16 if padded.dtype == np.uint8 else sat.dtype)
+    sat_squares = integral_image(squared * squared)
+
+    best_sums = best_variance = None
+    for top, left in _region_split(radius):
+        sums = box_sums(sat, top, left, size, shape)
+        variance = _region_variance(
+            sums, box_sums(sat_squares, top, left, size, shape), count
+        )
+        if best_sums is None:
+            best_sums, best_variance = sums, variance
+            continue
+
+        # ties keep the first quadrant
+        lower = variance < best_variance
+        best_variance = np.where(lower, variance, best_variance)
+        best_sums = np.where(
+            lower[..., None] if sums.ndim == 3 else lower, sums, best_sums
+        )
+
+    means = best_sums / count
+    if np.issubdtype(padded.dtype, np.integer):
+        info = np.iinfo(padded.dtype)
+        means = np.clip(np.rint(means), info.min, info.max)
+
+    return means.astype(padded.dtype)
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Callable
+
+import numpy as np
+
+from .... import profiling
+from ....matrices.region_selection import map_windows, synthesize
+from ..border_treatment import BorderType
+
+LEVELS = 256
+# the histograms are searched coarse to fine, 16 buckets of 16 levels each
+BUCKET = 16
+# output columns filtered at once, so that their histograms stay in cache
+STRIP = 512
+# up to this box size a selection network beats the running histograms
+NETWORK_MAX_SIZE = 15
+# window pixels expanded at once by the network & partition paths
+CHUNK = 1 << 22
+COUNT = np.int32
+
+
+def median(
+    matrix: np.ndarray,
+    box_size: int = 3,
+    border_type: BorderType = BorderType.IGNORE,
+) -> np.ndarray:
+    """Replaces every pixel with the median of the box_size x box_size region around.
+
+    uint8 frames use a histogram per column (Perreault & Hébert), updated by a
+    pixel in & a pixel out per row, the window histograms are differences of their
+    running sums across the columns & searched through coarse & fine levels, so the
+    cost per pixel doesn't depend on box_size. Small boxes go through a selection
+    network of min/max over whole shifted frames, other types partition every
+    window.
+
+    Args:
+        matrix (np.ndarray): The frame, each channel is filtered independently.
+        box_size (int): The odd size of the regions.
+        border_type (BorderType): How to fill the regions reaching outside, IGNORE
+        keeps the border pixels unchanged.
+
+    Returns:
+        np.ndarray: The filtered frame, of the same shape & type.
+    """
+    if box_size % 2 == 0:
+        raise ValueError("Box size must be odd.")
+
+    if box_size == 1:
+        return matrix.copy()
+
+    if box_size <= NETWORK_MAX_SIZE:
+        profiling.note(path="network")
+        return map_windows(matrix, _network_median, box_size, border_type)
+
+    if matrix.dtype != np.uint8:
+        profiling.note(path="partition")
+        return map_windows(matrix, _partition_median, box_size, border_type)
+
+    if matrix.ndim == 3:
+        out = np.empty_like(matrix)
+        for channel in range(matrix.shape[2]):
+            out[..., channel] = median(matrix[..., channel], box_size, border_type)
+
+        return out
+
+    profiling.note(path="histogram")
+    return _histogram_median(matrix, box_size, border_type)
+
+
+@lru_cache
+def selection_network(size: int, rank: int) -> tuple[tuple[int, int, bool, bool], ...]:
+    """The compare-exchanges of Batcher's odd-even merge sort that the rank-th
+    smallest of size values depends on.
+
+    Returns:
+        tuple: (i, j, keep min, keep max) of each compare-exchange, in order, after
+        which the i-th value is the min of the two & the j-th the max. The min or max
+        of an exchange is only computed when a later one (or the result) reads it.
+    """
+    pairs = []
+    width = 1 << (size - 1).bit_length()
+    p = 1
+    while p < width:
+        k = p
+        while k >= 1:
+            for j in range(k % p, width - k, 2 * k):
+                for i in range(min(k, width - j - k)):
+                    a, b = i + j, i + j + k
+                    # values past size are +inf padding, exchanges with them are no-ops
+                    if (a // (2 * p)) == (b // (2 * p)) and b < size:
+                        pairs.append((a, b))
+            k //= 2
+        p *= 2
+
+    needed, network = {rank}, []
+    for a, b in reversed(pairs):
+        if a in needed or b in needed:
+            network.append((a, b, a in needed, b in needed))
+            needed |= {a, b}
+
+    return tuple(reversed(network))
+
+
+def _network_median(block: np.ndarray) -> np.ndarray:
+    k = block.shape[-1]
+    network = selection_network(k * k, k * k // 2)
+    out = np.empty(block.shape[:-2], block.dtype)
+    for top, chunk in _chunks(block):
+        values = [chunk[..., i // k, i % k] for i in range(k * k)]
+        for a, b, low, high in network:
+            values[a], values[b] = (
+                np.minimum(values[a], values[b]) if low else None,
+                np.maximum(values[a], values[b]) if high else None,
+            )
+
+        out[top : top + len(chunk)] = values[k * k // 2]
+
+    return out
+
+
+def _partition_median(block: np.ndarray) -> np.ndarray:
+    k = block.shape[-1]
+    rank = k * k // 2
+    out = np.empty(block.shape[:-2], block.dtype)
+    for top, chunk in _chunks(block):
+        flat = chunk.reshape(chunk.shape[:-2] + (k * k,))
+        out[top : top + len(chunk)] = np.partition(flat, rank, axis=-1)[..., rank]
+
+    return out
+
+
+def _chunks(block: np.ndarray):
+    """Splits a block of windows by rows, bounding the memory of what they expand to."""
+    k = block.shape[-1]
+    rows = max(CHUNK // (k * k * max(block[0, ..., 0, 0].size, 1)), 1)
+    for top in range(0, len(block), rows):
+        yield top, block[top : top + rows]
+
+
+def _histogram_median(
+    matrix: np.ndarray, box_size: int, border_type: BorderType
+) -> np.ndarray:
+    m, n = matrix.shape
+    r = box_size // 2
+    if border_type == BorderType.IGNORE:
+        out = matrix.copy()
+        if m < box_size or n < box_size:
+            return out
+
+        out[r:-r, r:-r] = _running_median(lambda i: matrix[i], m - 2 * r, n - 2 * r, r)
+        return out
+
+    cols = range(-r, n + r)
+    return _running_median(
+        lambda i: synthesize(matrix, [i - r], cols, border_type)[0], m, n, r
+    )
+
+
+def _running_median(
+    row: Callable[[int], np.ndarray], m: int, n: int, r: int
+) -> np.ndarray:
+    """Slides a histogram per column down the rows, a strip of columns at a time.
+
+    Args:
+        row (Callable): The i-th row of the source, of n + 2r pixels, the median of
+        the output (i, j) pixel is taken over rows i to i + 2r & columns j to j + 2r.
+        m (int): The amount of output rows.
+        n (int): The amount of output columns.
+        r (int): The box radius.
+
+    Returns:
+        np.ndarray: The m x n medians.
+    """
+    out = np.empty((m, n), np.uint8)
+    for left in range(0, n, STRIP):
+        width = min(STRIP, n - left)
+        out[:, left : left + width] = _strip_median(
+            lambda i: row(i)[left : left + width + 2 * r], m, width, r
+        )
+
+    return out
+
+
+def _strip_median(
+    row: Callable[[int], np.ndarray], m: int, n: int, r: int
+) -> np.ndarray:
+    k = 2 * r + 1
+    rank = k * k // 2
+    columns = np.arange(n + 2 * r)
+    # the histograms of the k rows of every source column
+    fine = np.zeros((n + 2 * r, LEVELS), COUNT)
+    coarse = np.zeros((n + 2 * r, LEVELS // BUCKET), COUNT)
+    # their running sums across the columns, a window is the difference of two
+    fine_sums = np.zeros((n + 2 * r + 1, LEVELS), COUNT)
+    coarse_sums = np.zeros((n + 2 * r + 1, LEVELS // BUCKET), COUNT)
+
+    def count(pixels: np.ndarray, sign: int) -> None:
+        # a single pixel per histogram, so no index repeats within an update
+        fine[columns, pixels] += sign
+        coarse[columns, pixels // BUCKET] += sign
+
+    for i in range(k - 1):
+        count(row(i), 1)
+
+    out = np.empty((m, n), np.uint8)
+    for i in range(m):
+        count(row(i + k - 1), 1)
+        np.cumsum(fine, axis=0, out=fine_sums[1:])
+        np.cumsum(coarse, axis=0, out=coarse_sums[1:])
+        out[i] = _histogram_rank(fine_sums, coarse_sums[k:] - coarse_sums[:-k], k, rank)
+        count(row(i), -1)
+
+    return out
+
+
+def _histogram_rank(
+    fine_sums: np.ndarray, coarse: np.ndarray, k: int, rank: int
+) -> np.ndarray:
+    """The rank-th level of every window, found in the coarse histograms first,
+    then in the fine levels of that bucket only.
+    """
+    columns = np.arange(len(coarse))
+    below = np.cumsum(coarse, axis=1)
+    bucket = np.argmax(below > rank, axis=1)
+    rank = rank - (below[columns, bucket] - coarse[columns, bucket])
+
+    fine_sums = fine_sums.reshape(len(fine_sums), -1, BUCKET)
+    levels = fine_sums[columns + k, bucket] - fine_sums[columns, bucket]
+    level = np.argmax(np.cumsum(levels, axis=1) > rank[:, None], axis=1)
+    return (bucket * BUCKET + level).astype(np.uint8)
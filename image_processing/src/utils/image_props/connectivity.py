@@ -1,97 +1,279 @@
+from __future__ import annotations
+
 import numpy as np
 
+# membership of values up to this are looked up in a table, others with np.isin
+MAX_LUT_SIZE = 1 << 16
+
+
+class Pixel: ...
+
+
+class Components:
+    def __init__(
+        self,
+        labels: np.ndarray,
+        area: np.ndarray,
+        bbox: np.ndarray,
+        centroid: np.ndarray,
+    ) -> None:
+        """The connected components of a matrix.
+
+        Args:
+            labels (np.ndarray): The label of every pixel, 0 for the ones outside
+            of the connectivity set & 1 to len(self) for the components, numbered
+            in raster order of their first pixel.
+            area (np.ndarray): The amount of pixels of each component.
+            bbox (np.ndarray): (top, left, bottom, right) of each component, bottom &
+            right exclusive.
+            centroid (np.ndarray): (row, column) of each component.
 
-class Pixel:
-    ...
+        The stats of the component labelled k are at index k - 1.
+        """
+        self.labels = labels
+        self.area = area
+        self.bbox = bbox
+        self.centroid = centroid
+
+    def __len__(self) -> int:
+        return len(self.area)
+
+    def region(self, label: int) -> tuple[slice, slice]:
+        """The slices of the bounding box of the given component."""
+        top, left, bottom, right = self.bbox[label - 1]
+        return slice(top, bottom), slice(left, right)
+
+    def mask(self, label: int) -> np.ndarray:
+        return self.labels == label
 
 
 class Connectivity:
     def __init__(self, matrix: np.ndarray, connectivity_set: np.ndarray) -> None:
-        self.connectivity_set = connectivity_set
+        """Labels the pixels whose values are in the connectivity set by the
+        component they are connected to.
+
+        Args:
+            matrix (np.ndarray): A 2D matrix.
+            connectivity_set (np.ndarray): The values of the pixels to connect.
+        """
+        self.connectivity_set = np.asarray(connectivity_set)
         self.matrix = matrix
 
-    def nd(self):
-        # if i == 0:
-        #     pass
+    def membership(self) -> np.ndarray:
+        """The mask of the pixels in the connectivity set, looked up in a table of
+        every value rather than searching the set for each pixel.
+        """
+        matrix = self.matrix
+        values = self.connectivity_set
+        if (
+            np.issubdtype(matrix.dtype, np.integer)
+            and matrix.size
+            and 0 <= matrix.min()
+            and matrix.max() < MAX_LUT_SIZE
+        ):
+            lut = np.zeros(int(matrix.max()) + 1, bool)
+            values = values[(0 <= values) & (values < len(lut))]
+            lut[values.astype(np.intp)] = True
+            return lut[matrix]
+
+        return np.isin(matrix, values)
+
+    def n4(self) -> Components:
+        """Components of pixels connected through their top, bottom, left & right
+        neighbours.
+        """
+        return label(self.membership(), 4)
+
+    def n8(self) -> Components:
+        """Components of pixels connected through their 8 neighbours."""
+        return label(self.membership(), 8)
+
+    def nm(self) -> Components:
+        """Components of m-connected pixels: diagonal neighbours are only adjacent
+        when they share no 4-neighbour in the set, which removes the ambiguous
+        double paths of 8-connectivity without splitting any component.
+        """
+        return label(self.membership(), "m")
+
+
+def label(mask: np.ndarray, connectivity: int | str = 4) -> Components:
+    """Two pass connected-component labelling of a mask.
+
+    The first pass splits every row into runs of pixels, and finds the runs each
+    run touches in the row above. The equivalences are resolved in scan order: a
+    run joins the component of the first run it touches above, row after row, so
+    that only the runs merging several components are left to an array-backed
+    union-find. The second pass paints each pixel with the component of its run.
+
+    Args:
+        mask (np.ndarray): The pixels to label.
+        connectivity (int | str): 4, 8 or "m".
+
+    Returns:
+        Components: The label matrix & the stats of each component.
+    """
+    if connectivity not in (4, 8, "m"):
+        raise ValueError(f"Invalid connectivity {connectivity!r}")
+
+    mask = np.asarray(mask, bool)
+    m, n = mask.shape
+    starts = np.empty_like(mask)
+    starts[:, :1] = mask[:, :1]
+    np.greater(mask[:, 1:], mask[:, :-1], out=starts[:, 1:])
+    ends = np.empty_like(mask)
+    ends[:, -1:] = mask[:, -1:]
+    np.greater(mask[:, :-1], mask[:, 1:], out=ends[:, :-1])
+
+    # the amount of runs started up to each pixel, in raster order
+    started = np.cumsum(starts.ravel(), dtype=np.int32)
+    start = np.flatnonzero(starts)
+    rows, first = np.divmod(start, n)
+    last = np.flatnonzero(ends) - rows * n + 1
+
+    lo, count = _links(mask, started, start, first, last, 0 if connectivity == 4 else 1)
+    parent = _resolve(lo, count, np.searchsorted(start, np.arange(m + 1) * n))
+    # roots are the first run of their component, so numbering the roots in order
+    # numbers the components in raster order
+    roots = parent == np.arange(len(parent))
+    component = (np.cumsum(roots) - 1)[parent]
+
+    # every pixel takes the label of the last run started before it, if inside it
+    lut = np.zeros(len(component) + 1, np.int32)
+    lut[1:] = component + 1
+    labels = lut[started].reshape(m, n)
+    labels *= mask
+    return Components(labels, *_stats(component, rows, first, last))
+
 
-        # if j == 0:
-        #     pass
+def _links(
+    mask: np.ndarray,
+    started: np.ndarray,
+    start: np.ndarray,
+    first: np.ndarray,
+    last: np.ndarray,
+    reach: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """The runs each run touches in the row above.
 
-        # if j == self.matrix.shape[1] - 1:
-        #     pass
+    The runs of a row are sorted & disjoint, so the ones a run touches in the row
+    above are a contiguous range, from the run covering or following its first
+    column to the last one starting before its last column, read from the count
+    of runs started up to these pixels.
 
-        # if i == self.matrix.shape[0] - 1:
-        #     pass
+    m-adjacency links the same runs as 8-adjacency: two runs only touching by a
+    diagonal share no 4-neighbour in the set, otherwise they would be one run.
 
-        # neighbors = [
-        #     (x - 1, y - 1),
-        #     (x - 1, y + 1),
-        #     (x + 1, y + 1),
-        #     (x + 1, y - 1),
-        # ]
-        return np.ndarray([])
+    Args:
+        mask (np.ndarray): The labelled mask.
+        started (np.ndarray): The amount of runs started up to each pixel.
+        start (np.ndarray): The flat index of the first pixel of each run.
+        first, last (np.ndarray): The columns of the runs, last exclusive.
+        reach (int): 0 to touch by an edge, 1 by an edge or a corner.
 
-    def n4(self):
-        # x, y = 3, 3
-        row_length, col_length = self.matrix.shape
-        label = 1
-        neighbors = {}
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The first run touched above & the amount of
+        runs touched, 0 for the runs of the first row.
+    """
+    n = mask.shape[1]
+    lo = np.zeros(len(start), np.intp)
+    count = np.zeros(len(start), np.intp)
+    below = np.searchsorted(start, n)
+    above = start[below:] - first[below:] - n
+    left = above + np.maximum(first[below:] - reach, 0)
+    right = above + np.minimum(last[below:] + reach, n) - 1
+    lo[below:] = started[left] - mask.ravel()[left]
+    count[below:] = started[right] - lo[below:]
+    return lo, count
 
-        for row in range(row_length):
-            for col in range(col_length):
-                pixel = self.matrix[row, col]
 
-                if pixel not in self.connectivity_set:
-                    continue
+def _resolve(lo: np.ndarray, count: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    """Resolves the equivalences between the runs & the runs they touch above.
 
-                if row == 0 and col == 0:  # top-left corner
-                    # (x+1, y)
-                    neighbors[f"lbl{label}"] = [pixel]
+    Args:
+        lo, count (np.ndarray): See _links().
+        bounds (np.ndarray): The index of the first run of every row, & the amount
+        of runs.
 
-                # elif row == 0 and col == col_length - 1:  # top-right corner
-                #     # (x-1, y)
-                #     ...
+    Returns:
+        np.ndarray: The root of every run, the first run of its component.
+    """
+    parent = np.arange(len(lo))
+    # in scan order, the runs of a row join the root of the first run they touch,
+    # already resolved with the row above
+    up = np.where(count > 0, lo, parent)
+    for top, bottom in zip(bounds[1:-1], bounds[2:]):
+        parent[top:bottom] = parent[up[top:bottom]]
 
-                elif row == 0:
-                    # (x-1, y)
-                    if self.matrix[row, col - 1] in self.connectivity_set:
-                        neighbors[f"lbl{label}"] += [pixel]
-                    else:
-                        label += 1
-                        neighbors[f"lbl{label}"] = [pixel]
+    # the other runs touched above may belong to other components, the j-th one
+    # above of all the runs touching more than j
+    ra, rb = [], []
+    runs = np.flatnonzero(count > 1)
+    j = 1
+    while len(runs):
+        ra.append(parent[lo[runs] + j])
+        rb.append(parent[runs])
+        j += 1
+        runs = runs[count[runs] > j]
+    ra, rb = np.concatenate(ra or [runs]), np.concatenate(rb or [runs])
+    merged = ra != rb
+    if not merged.any():
+        return parent
 
-                elif row == row_length - 1 and col == 0:  # bottom-left corner
-                    # (x+1, y) & (x, y-1)
-                    ...
+    # merge these roots among themselves, numbered in order, then flatten once
+    ra, rb = ra[merged], rb[merged]
+    used = np.zeros(len(lo), bool)
+    used[ra] = used[rb] = True
+    nodes = np.flatnonzero(used)
+    index = np.cumsum(used) - 1
+    root = np.arange(len(lo))
+    root[nodes] = nodes[_union_find(len(nodes), index[ra], index[rb])]
+    return root[parent]
 
-                elif (
-                    row == row_length - 1 and col == col_length - 1
-                ):  # bottom-right corner
-                    # (x-1, y) & (x, y-1)
-                    ...
 
-                    ...
+def _union_find(size: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Resolves the equivalences between the pairs of a & b.
 
-                elif row == row_length - 1:
-                    # (x+1, y) & (x-1, y) & (x, y-1)
-                    ...
+    Returns:
+        np.ndarray: The root of every node, the smallest node of its set.
+    """
+    parent = np.arange(size)
+    while True:
+        ra, rb = parent[a], parent[b]
+        linked = ra != rb
+        if not linked.any():
+            return parent
 
-                elif col == 0:
-                    # (x+1, y) & (x, y-1)
-                    ...
+        a, b, ra, rb = a[linked], b[linked], ra[linked], rb[linked]
+        np.minimum.at(parent, np.maximum(ra, rb), np.minimum(ra, rb))
+        # path compression, every node jumps to its root
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
 
-                elif col == col_length - 1:
-                    # (x-1, y) & (x, y-1)
-                    ...
 
-                else:
-                    label += 1
-                    neighbors[f"lbl{label}"] = [pixel]
+def _stats(
+    component: np.ndarray, rows: np.ndarray, first: np.ndarray, last: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    count = component.max() + 1 if len(component) else 0
+    length = last - first
+    area = np.bincount(component, length, count).astype(np.int64)
 
-        return neighbors
+    bbox = np.empty((count, 4), np.int64)
+    bbox[:, :2] = np.iinfo(np.int64).max
+    bbox[:, 2:] = 0
+    np.minimum.at(bbox[:, 0], component, rows)
+    np.minimum.at(bbox[:, 1], component, first)
+    np.maximum.at(bbox[:, 2], component, rows + 1)
+    np.maximum.at(bbox[:, 3], component, last)
 
-    def n8(self):
-        return self.n4() + self.nd()
+    centroid = np.empty((count, 2))
+    centroid[:, 0] = np.bincount(component, length * rows, count) / area
+    # the columns of a run sum to length * (first + last - 1) / 2
+    centroid[:, 1] = np.bincount(component, length * (first + last - 1) / 2, count)
+    centroid[:, 1] /= area
+    return area, bbox, centroid
 
 
 def main():
@@ -108,7 +290,7 @@ def main():
     )
 
     connectivity_set = np.array([198, 199, 200, 201])
-    print(Connectivity(img, connectivity_set).n4())
+    print(Connectivity(img, connectivity_set).n4().labels)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import numpy as np
+
+from ..lazy import lazy_import
+
+cv2 = lazy_import("cv2")
+
+# BGR, like the frames they are drawn on
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+GRID = (225, 225, 225)
+CHANNEL_COLORS = ((255, 0, 0), (0, 160, 0), (0, 0, 255), (128, 128, 128))
+
+LEVEL_TICKS = (0, 64, 128, 192, 255)
+Y_TICKS = 4
+# room for the title & tick labels around the plot area, in pixels
+MARGINS = (36, 16, 40, 64)  # top, right, bottom, left
+
+
+def _text(
+    canvas: np.ndarray,
+    text: str,
+    origin: tuple[int, int],
+    scale: float = 0.4,
+    align: str = "left",
+) -> None:
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    (width, _), _ = cv2.getTextSize(text, font, scale, 1)
+    x, y = origin
+    if align == "center":
+        x -= width // 2
+    elif align == "right":
+        x -= width
+
+    cv2.putText(canvas, text, (x, y), font, scale, BLACK, 1, cv2.LINE_AA)
+
+
+def _label(count: float) -> str:
+    for factor, suffix in ((1e9, "G"), (1e6, "M"), (1e3, "k")):
+        if count >= factor:
+            return f"{count / factor:.3g}{suffix}"
+
+    return f"{count:.3g}"
+
+
+def render_histogram(
+    hist: np.ndarray,
+    title: str = "",
+    size: tuple[int, int] = (480, 640),
+) -> np.ndarray:
+    """Rasterizes a histogram plot straight into a BGR frame, axes, ticks & a
+    curve per channel, in well under a millisecond & without any figure state.
+
+    Args:
+        hist (np.ndarray): 256 counts, or channels x 256 (B, G, R order).
+        title (str, optional): Drawn above the plot.
+        size (tuple[int, int], optional): (height, width) of the frame.
+        Defaults to (480, 640).
+
+    Returns:
+        np.ndarray: The uint8 BGR plot, ready for cv2.imencode() or cv2.imshow().
+    """
+    hist = np.atleast_2d(hist)
+    if hist.ndim != 2 or hist.shape[1] < 2:
+        raise ValueError(f"Cannot plot a histogram of shape {hist.shape}")
+
+    height, width = size
+    top, right, bottom, left = MARGINS
+    x0, x1, y0, y1 = left, width - right, top, height - bottom
+    if x1 - x0 < 2 or y1 - y0 < 2:
+        raise ValueError(f"A {size} canvas is too small to plot on")
+
+    canvas = np.full((height, width, 3), 255, np.uint8)
+    bins = hist.shape[1]
+    peak = float(hist.max()) or 1.0
+
+    for tick in range(Y_TICKS + 1):
+        y = y1 - round(tick * (y1 - y0) / Y_TICKS)
+        cv2.line(canvas, (x0, y), (x1, y), GRID, 1)
+        _text(canvas, _label(peak * tick / Y_TICKS), (x0 - 6, y + 4), align="right")
+
+    for level in LEVEL_TICKS:
+        x = x0 + round(level * (x1 - x0) / (bins - 1))
+        cv2.line(canvas, (x, y1), (x, y1 + 4), BLACK, 1)
+        _text(canvas, str(level), (x, y1 + 18), align="center")
+
+    xs = x0 + np.arange(bins) * (x1 - x0) / (bins - 1)
+    colors = [BLACK] if len(hist) == 1 else CHANNEL_COLORS
+    for channel, color in zip(hist, colors):
+        ys = y1 - channel.astype(np.float64) * (y1 - y0) / peak
+        points = np.round(np.stack([xs, ys], axis=1)).astype(np.int32)
+        cv2.polylines(canvas, [points], False, color, 1, cv2.LINE_AA)
+
+    cv2.rectangle(canvas, (x0, y0), (x1, y1), BLACK, 1)
+    _text(canvas, "Pixel Value", ((x0 + x1) // 2, height - 6), align="center")
+    _text(canvas, "Frequency", (4, y0 - 8))
+    if title:
+        _text(canvas, title, (width // 2, 22), 0.55, align="center")
+
+    return canvas
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import importlib
+import sys
+import types
+from typing import Any, Callable, Iterable
+
+
+class LazyModule(types.ModuleType):
+    def __init__(self, name: str) -> None:
+        """Stands in for a module until one of its attributes is used, only then
+        importing it.
+
+        Attributes are looked up on the real module every time rather than copied,
+        so patching the real module (e.g. in tests) is seen through the proxy.
+
+        Args:
+            name (str): The module to import, e.g. "cv2".
+        """
+        super().__init__(name)
+
+    def __getattr__(self, attr: str) -> Any:
+        name = self.__name__
+        module = sys.modules.get(name) or importlib.import_module(name)
+        return getattr(module, attr)
+
+    def __repr__(self) -> str:
+        loaded = "loaded" if self.__name__ in sys.modules else "not loaded yet"
+        return f"<lazy module {self.__name__!r}, {loaded}>"
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """The module if it's already imported, a LazyModule otherwise.
+
+    >>> cv2 = lazy_import("cv2")
+    """
+    return sys.modules.get(name) or LazyModule(name)
+
+
+def submodules(
+    package: str, names: Iterable[str]
+) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    """The module __getattr__ & __dir__ of a package whose submodules are only
+    imported once accessed (PEP 562), instead of by the package __init__.
+
+    >>> __getattr__, __dir__ = submodules(__name__, __all__)
+
+    Args:
+        package (str): The package name, __name__ of its __init__.
+        names (Iterable[str]): The submodules exposed as attributes.
+    """
+    names = list(names)
+
+    def __getattr__(name: str) -> Any:
+        if name not in names:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+
+        # binds the submodule to the package, later lookups don't get here
+        return importlib.import_module("." + name, package)
+
+    def __dir__() -> list[str]:
+        return sorted(set(vars(sys.modules[package])) | set(names))
+
+    return __getattr__, __dir__
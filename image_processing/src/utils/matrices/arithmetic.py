@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import numpy as np
+
+from ..lazy import lazy_import
+
+cv2 = lazy_import("cv2")
+
+# the types the operations saturate in, results are clipped to their range
+SATURATING_TYPES = (np.uint8, np.uint16, np.int16)
+
+
+def _check(a: np.ndarray, b: np.ndarray, out: np.ndarray | None) -> None:
+    if a.dtype != b.dtype or a.dtype.type not in SATURATING_TYPES:
+        raise TypeError(
+            f"Expected two matrices of one of {[t.__name__ for t in SATURATING_TYPES]},"
+            f" got {a.dtype} & {b.dtype}"
+        )
+
+    if a.shape != b.shape:
+        raise ValueError(f"Shapes {a.shape} & {b.shape} don't match")
+
+    if out is not None and (out.shape != a.shape or out.dtype != a.dtype):
+        raise ValueError(
+            f"Can't write {a.shape} {a.dtype} results into {out.shape} {out.dtype}"
+        )
+
+
+def _result(result: np.ndarray, out: np.ndarray | None) -> np.ndarray:
+    if out is None or result is out:
+        return result
+
+    out[...] = result
+    return out
+
+
+def subtract(a: np.ndarray, b: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    """a - b, saturated to the range of their type (negative uint8 differences are 0).
+
+    Args:
+        a (np.ndarray): The minuend.
+        b (np.ndarray): The subtrahend, of the same shape & type.
+        out (np.ndarray, optional): Where to write the result, may be a or b.
+
+    Returns:
+        np.ndarray: The difference.
+    """
+    _check(a, b, out)
+    return _result(cv2.subtract(a, b, dst=out), out)
+
+
+def add(a: np.ndarray, b: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    """a + b, saturated to the range of their type, see subtract()."""
+    _check(a, b, out)
+    return _result(cv2.add(a, b, dst=out), out)
+
+
+def absdiff(a: np.ndarray, b: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    """|a - b|, the change between two frames whichever way it goes, see subtract()."""
+    _check(a, b, out)
+    return _result(cv2.absdiff(a, b, dst=out), out)
+
+
+def blend(
+    a: np.ndarray, b: np.ndarray, weight: float, out: np.ndarray | None = None
+) -> np.ndarray:
+    """weight * a + (1 - weight) * b, rounded & saturated, see subtract().
+
+    Args:
+        a (np.ndarray): The first matrix.
+        b (np.ndarray): The second matrix, of the same shape & type.
+        weight (float): The weight of a.
+        out (np.ndarray, optional): Where to write the result, may be a or b.
+
+    Returns:
+        np.ndarray: The blend.
+    """
+    _check(a, b, out)
+    return _result(cv2.addWeighted(a, weight, b, 1 - weight, 0, dst=out), out)
+
+
+class ReferenceFrame:
+    def __init__(self, reference: np.ndarray) -> None:
+        """A frame to compare a stream of frames against, e.g. the empty scene.
+
+        The results are written into a buffer allocated with the reference and
+        reused by every call, so they are only valid until the next one, unless
+        they are written into an out buffer of the caller.
+
+        Args:
+            reference (np.ndarray): The reference frame.
+        """
+        self.reference = reference
+        self.buffer = np.empty_like(reference)
+
+    def subtract(self, frame: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """frame - reference, see subtract()."""
+        return subtract(frame, self.reference, self.buffer if out is None else out)
+
+    def absdiff(self, frame: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """|frame - reference|, see absdiff()."""
+        return absdiff(frame, self.reference, self.buffer if out is None else out)
+
+    def blend(
+        self, frame: np.ndarray, weight: float, out: np.ndarray | None = None
+    ) -> np.ndarray:
+        """weight * frame + (1 - weight) * reference, see blend()."""
+        return blend(frame, self.reference, weight, self.buffer if out is None else out)
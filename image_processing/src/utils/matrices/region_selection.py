@@ -1,27 +1,112 @@
+from __future__ import annotations
+
+from typing import Callable, Iterator
+
 import numpy as np
 
-from ..image_enhancement.filters.border_treatment import BorderType
+from ..image_enhancement.filters.border_treatment import BorderTreatment, BorderType
+
+
+def synthesize(
+    matrix: np.ndarray,
+    rows: range,
+    cols: range,
+    border_type: BorderType,
+    value: int = 0,
+) -> np.ndarray:
+    """
+    Builds the block of the matrix spanning the given rows & columns, which may
+    reach outside of it, by remapping out of range indices per the border type.
+
+    Args:
+        matrix (np.ndarray): The source matrix.
+        rows (range): The rows of the block, possibly negative or past the end.
+        cols (range): The columns of the block, possibly negative or past the end.
+        border_type (BorderType): How to fill what is outside of the matrix.
+        value (int): The fill value of BorderType.CONSTANT.
+
+    Returns:
+        np.ndarray: The block, a copy of only len(rows) x len(cols) pixels.
+    """
+    m, n = matrix.shape[:2]
+    row_index = BorderTreatment.remap(np.asarray(rows), m, border_type)
+    col_index = BorderTreatment.remap(np.asarray(cols), n, border_type)
+    outside = BorderTreatment.OUTSIDE
+    block = matrix[np.ix_(np.maximum(row_index, 0), np.maximum(col_index, 0))]
+    if border_type == BorderType.CONSTANT:
+        block[row_index == outside] = value
+        block[:, col_index == outside] = value
 
+    return block
 
-def handle_border(matrix: np.ndarray, border_type: BorderType):
+
+def border_bands(
+    matrix: np.ndarray, width: tuple[int, int], border_type: BorderType
+) -> list[tuple[tuple[slice, slice], np.ndarray]]:
+    """
+    Synthesizes only what a neighbourhood operation needs around the border.
+
+    A (2r + 1) sized neighbourhood fits entirely inside the matrix for every pixel
+    of matrix[r:-r, r:-r], so those can be computed on the matrix itself. Each of
+    the four bands of pixels around it needs a strip of 3r rows (or columns) with
+    its missing neighbours filled in.
+
+    Args:
+        matrix (np.ndarray): The source matrix.
+        width (tuple[int, int]): The neighbourhood radius along rows & columns.
+        border_type (BorderType): How to fill what is outside of the matrix.
+
+    Returns:
+        list: (band, strip) pairs, band is the region of the output a strip covers,
+        strip holds the band plus its neighbourhood radius on every side.
+    """
+    m, n = matrix.shape[:2]
+    r_m, r_n = width
+    bands = []
+    if r_m:
+        cols = range(-r_n, n + r_n)
+        for top in (0, m - r_m):
+            rows = range(top - r_m, top + 2 * r_m)
+            band = (slice(top, top + r_m), slice(0, n))
+            bands.append((band, synthesize(matrix, rows, cols, border_type)))
+
+    if r_n:
+        # the rows are all inside the matrix, only the columns are remapped
+        rows = range(0, m)
+        for left in (0, n - r_n):
+            cols = range(left - r_n, left + 2 * r_n)
+            band = (slice(r_m, m - r_m), slice(left, left + r_n))
+            bands.append((band, synthesize(matrix, rows, cols, border_type)))
+
+    return bands
+
+
+def handle_border(
+    matrix: np.ndarray, border_type: BorderType, width: int | tuple[int, int] = 1
+):
     """
     Handles the border of the given matrix according to the given border type.
 
+    Prefer border_bands for neighbourhood operations, this copies the whole matrix.
+
     Args:
         matrix (np.ndarray): The matrix whose border is to be handled.
         border_type (BorderType): The type of border to be used.
+        width (int | tuple[int, int]): How many rows & columns to add on each side.
 
     Returns:
         np.ndarray: The matrix with the handled border.
     """
+    if not isinstance(border_type, BorderType):
+        raise ValueError("Invalid border type.")
     if border_type == BorderType.IGNORE:
         return matrix
-    elif border_type == BorderType.REPEAT:
-        return np.pad(matrix, 1, mode="edge")
-    elif border_type == BorderType.REFLECT:
-        return np.pad(matrix, 1, mode="reflect")
-    else:
-        raise ValueError("Invalid border type.")
+
+    m, n = matrix.shape[:2]
+    rows, cols = (width, width) if isinstance(width, int) else width
+    return synthesize(
+        matrix, range(-rows, m + rows), range(-cols, n + cols), border_type
+    )
 
 
 def select_region(
@@ -37,14 +122,116 @@ def select_region(
         matrix (np.ndarray): The matrix from which the region is to be selected.
         pos (tuple): The position of the center of the region.
         box_size (int): The size of the region to be selected.
+        border_type (BorderType): How to fill the part of the region outside of
+        the matrix.
 
     Returns:
-        np.ndarray: The selected region.
+        np.ndarray: The selected region, a view when it lies inside the matrix.
     """
     if box_size % 2 == 0:
         raise ValueError("Box size must be odd.")
 
-    matrix = handle_border(matrix, border_type)
     x, y = pos
+    r = box_size // 2
+    rows, cols = range(x - r, x + r + 1), range(y - r, y + r + 1)
+    m, n = matrix.shape[:2]
+    if rows.start >= 0 and cols.start >= 0 and rows.stop <= m and cols.stop <= n:
+        return matrix[rows.start : rows.stop, cols.start : cols.stop]
+
+    if border_type == BorderType.IGNORE:
+        raise IndexError(f"The region around {pos} doesn't fit inside the matrix")
+
+    return synthesize(matrix, rows, cols, border_type)
+
+
+def windows(
+    matrix: np.ndarray, box_size: int = 3, border_type: BorderType = BorderType.IGNORE
+) -> np.ndarray:
+    """
+    All the box_size x box_size regions of the matrix, as one strided view.
+
+    windows(matrix)[i, j] is the region centered at (i + r, j + r), r = box_size // 2,
+    so reducing over the last two axes filters the whole matrix at once, e.g.
+    windows(matrix, 3).mean(axis=(-2, -1)) is the 3x3 average of the interior.
+
+    Args:
+        matrix (np.ndarray): The matrix, the windows slide over its first two axes.
+        box_size (int): The size of the regions.
+        border_type (BorderType): IGNORE gives the regions inside the matrix only,
+        without copying it. The others pad the matrix (a copy) so that there is a
+        region centered at every pixel, see neighbourhoods() to avoid the copy.
+
+    Returns:
+        np.ndarray: A read-only view of shape (m', n', [channels,] box, box).
+    """
+    if box_size % 2 == 0:
+        raise ValueError("Box size must be odd.")
+
+    matrix = handle_border(matrix, border_type, box_size // 2)
+    return np.lib.stride_tricks.sliding_window_view(
+        matrix, (box_size, box_size), axis=(0, 1)
+    )
+
+
+def neighbourhoods(
+    matrix: np.ndarray, box_size: int = 3, border_type: BorderType = BorderType.IGNORE
+) -> Iterator[tuple[tuple[slice, slice], np.ndarray]]:
+    """
+    Iterates over the regions of the matrix in a few large blocks of windows.
+
+    The interior block is a view of the matrix, only the windows of the border
+    bands are built from synthesized strips (nothing is yielded for them when
+    ignoring the border).
+
+    Args:
+        matrix (np.ndarray): The matrix.
+        box_size (int): The size of the regions.
+        border_type (BorderType): How to fill the regions reaching outside.
+
+    Yields:
+        tuple: (region, windows), windows[i, j] is centered at the (i, j) pixel of
+        matrix[region].
+    """
+    if box_size % 2 == 0:
+        raise ValueError("Box size must be odd.")
+
+    r = box_size // 2
+    m, n = matrix.shape[:2]
+    if m < box_size or n < box_size:
+        if border_type != BorderType.IGNORE:
+            yield (slice(0, m), slice(0, n)), windows(matrix, box_size, border_type)
+        return
+
+    yield (slice(r, m - r), slice(r, n - r)), windows(matrix, box_size)
+    if border_type == BorderType.IGNORE:
+        return
+
+    for band, strip in border_bands(matrix, (r, r), border_type):
+        yield band, windows(strip, box_size)
+
+
+def map_windows(
+    matrix: np.ndarray,
+    func: Callable[[np.ndarray], np.ndarray],
+    box_size: int = 3,
+    border_type: BorderType = BorderType.IGNORE,
+) -> np.ndarray:
+    """
+    Replaces every pixel with func of the region around it.
+
+    Args:
+        matrix (np.ndarray): The matrix.
+        func (Callable): Reduces a block of windows over its last two axes, e.g.
+        lambda w: np.median(w, axis=(-2, -1)).
+        box_size (int): The size of the regions.
+        border_type (BorderType): How to fill the regions reaching outside, IGNORE
+        keeps the border pixels unchanged.
+
+    Returns:
+        np.ndarray: A new matrix of the same shape & type.
+    """
+    out = matrix.copy() if border_type == BorderType.IGNORE else np.empty_like(matrix)
+    for region, block in neighbourhoods(matrix, box_size, border_type):
+        out[region] = func(block)
 
-    return np.zeros((3, 3), np.uint8)
+    return out
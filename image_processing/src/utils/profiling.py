@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from abc import ABC, abstractmethod
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from enum import Enum
+from typing import IO, Any, Callable, Iterator
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+class Span:
+    def __init__(
+        self,
+        operation: str,
+        params: dict[str, Any] | None = None,
+        shape: tuple[int, ...] | None = None,
+        parent: Span | None = None,
+    ) -> None:
+        """The record of one operation.
+
+        Args:
+            operation (str): The operation name, e.g. "ImageEnhancement.median".
+            params (dict, optional): Its parameters, made JSON friendly.
+            shape (tuple, optional): The shape of the pixels it ran on.
+            parent (Span, optional): The operation it ran within.
+
+        Once finished, seconds holds its wall time, bytes the peak of memory it
+        allocated (when memory is traced, None otherwise) and notes what it
+        reported about itself, e.g. {"cache": "hit"} or {"path": "lazy"}.
+        """
+        self.operation = operation
+        self.params = params or {}
+        self.shape = shape
+        self.parent = parent
+        self.depth = parent.depth + 1 if parent else 0
+        self.seconds = 0.0
+        self.bytes: int | None = None
+        self.notes: dict[str, Any] = {}
+        self._start = 0.0
+        self._memory = 0
+        self._peak = 0
+
+    def note(self, **notes: Any) -> None:
+        self.notes.update({key: _jsonable(value) for key, value in notes.items()})
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "operation": self.operation,
+            "params": self.params,
+            "shape": list(self.shape) if self.shape is not None else None,
+            "seconds": self.seconds,
+            "bytes": self.bytes,
+            "notes": self.notes,
+            "depth": self.depth,
+            "parent": self.parent.operation if self.parent else None,
+        }
+
+    def __repr__(self) -> str:
+        return f"Span({self.operation!r}, {self.seconds * 1e3:.3f} ms)"
+
+
+class Sink(ABC):
+    """Receives the finished spans."""
+
+    @abstractmethod
+    def emit(self, span: Span) -> None: ...
+
+    def close(self) -> None:
+        pass
+
+
+class LoggingSink(Sink):
+    def __init__(self, logger: logging.Logger = log, level: int = logging.INFO):
+        self.logger = logger
+        self.level = level
+
+    def emit(self, span: Span) -> None:
+        memory = "" if span.bytes is None else f" {span.bytes / 2**20:.1f} MiB"
+        self.logger.log(
+            self.level,
+            f"{'  ' * span.depth}{span.operation} {span.shape} "
+            f"{span.seconds * 1e3:.3f} ms{memory} {span.params} {span.notes}",
+        )
+
+
+class JsonLinesSink(Sink):
+    def __init__(self, file: str | IO[str]) -> None:
+        """Writes a JSON object per span, one per line.
+
+        Args:
+            file (str | IO[str]): A path to append to, or an open text file.
+        """
+        self._owned = isinstance(file, str)
+        self.file = open(file, "a") if self._owned else file
+        self._lock = threading.Lock()
+
+    def emit(self, span: Span) -> None:
+        line = json.dumps(span.to_dict())
+        with self._lock:
+            self.file.write(line + "\n")
+
+    def close(self) -> None:
+        if self._owned:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+class Aggregator(Sink):
+    def __init__(self) -> None:
+        """Totals the spans per operation, in memory."""
+        self.totals: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def emit(self, span: Span) -> None:
+        with self._lock:
+            total = self.totals.setdefault(
+                span.operation, {"count": 0, "seconds": 0.0, "max": 0.0, "bytes": 0}
+            )
+            total["count"] += 1
+            total["seconds"] += span.seconds
+            total["max"] = max(total["max"], span.seconds)
+            total["bytes"] = max(total["bytes"], span.bytes or 0)
+            for key, value in span.notes.items():
+                notes = total.setdefault("notes", {})
+                notes[f"{key}={value}"] = notes.get(f"{key}={value}", 0) + 1
+
+    def summary(self) -> str:
+        """A table of the operations, the most expensive first."""
+        rows = sorted(self.totals.items(), key=lambda item: -item[1]["seconds"])
+        lines = [f"{'operation':<40} {'count':>7} {'total ms':>10} {'max ms':>9}"]
+        for operation, total in rows:
+            lines.append(
+                f"{operation:<40} {total['count']:>7} "
+                f"{total['seconds'] * 1e3:>10.2f} {total['max'] * 1e3:>9.2f}"
+            )
+
+        return "\n".join(lines)
+
+
+# the profiler is off while there are no sinks, operations then only pay a check
+_sinks: tuple[Sink, ...] = ()
+_trace_memory = False
+# whether enable() started tracemalloc, which is left running otherwise
+_started_tracing = False
+_local = threading.local()
+
+
+def enable(*sinks: Sink, trace_memory: bool = False) -> None:
+    """Starts emitting spans to the sinks.
+
+    Args:
+        sinks (Sink): Where to send the spans.
+        trace_memory (bool, optional): Record the peak memory of every span with
+        tracemalloc, which slows the traced code down. Defaults to False.
+    """
+    global _sinks, _trace_memory, _started_tracing
+    if not sinks:
+        raise ValueError("Profiling needs at least one sink")
+
+    _sinks = sinks
+    _trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracing = True
+
+
+def disable() -> None:
+    """Stops profiling & closes the sinks."""
+    global _sinks, _trace_memory, _started_tracing
+    sinks, _sinks = _sinks, ()
+    if _started_tracing and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+    _trace_memory = _started_tracing = False
+    for sink in sinks:
+        sink.close()
+
+
+def enabled() -> bool:
+    return bool(_sinks)
+
+
+@contextmanager
+def profile(*sinks: Sink, trace_memory: bool = False) -> Iterator[tuple[Sink, ...]]:
+    """Profiles a block, see enable().
+
+    >>> with profile(Aggregator()) as (aggregator,):
+    ...     ImageEnhancement(img).median(5)
+    """
+    enable(*sinks, trace_memory=trace_memory)
+    try:
+        yield sinks
+    finally:
+        disable()
+
+
+def current() -> Span | None:
+    """The innermost span running on this thread, None when profiling is off."""
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else None
+
+
+def note(**notes: Any) -> None:
+    """Adds notes to the current span, e.g. note(cache="hit"), a no-op when off."""
+    if _sinks:
+        span = current()
+        if span is not None:
+            span.note(**notes)
+
+
+class _SpanContext:
+    def __init__(
+        self, operation: str, shape: tuple[int, ...] | None, params: dict[str, Any]
+    ) -> None:
+        self.operation = operation
+        self.shape = shape
+        self.params = params
+        self.span: Span | None = None
+
+    def __enter__(self) -> Span:
+        params = {key: _jsonable(value) for key, value in self.params.items()}
+        self.span = _start(self.operation, params, self.shape)
+        return self.span
+
+    def __exit__(self, *exc: Any) -> None:
+        _finish(self.span)
+
+
+_OFF = nullcontext()
+
+
+def span(
+    operation: str, shape: tuple[int, ...] | None = None, **params: Any
+) -> AbstractContextManager[Span | None]:
+    """Records a block as an operation, when profiling is on.
+
+    >>> with span("decode", path=path):
+    ...     ...
+    """
+    if not _sinks:
+        return _OFF
+
+    return _SpanContext(operation, shape, params)
+
+
+def profiled(func: Callable | None = None, *, name: str | None = None) -> Callable:
+    """Decorates a method to run in a span named after its class & itself, with
+    its arguments as parameters & the shape of self.img (or the first array
+    argument) as the input shape.
+    """
+    if func is None:
+        return functools.partial(profiled, name=name)
+
+    signature = inspect.signature(func)
+    operation = name or func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if not _sinks:
+            return func(*args, **kwargs)
+
+        bound = signature.bind(*args, **kwargs)
+        params = {
+            key: _jsonable(value)
+            for key, value in bound.arguments.items()
+            if key not in ("self", "cls")
+        }
+        span = _start(operation, params, _shape(args))
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _finish(span)
+
+    return wrapper
+
+
+def _start(
+    operation: str, params: dict[str, Any], shape: tuple[int, ...] | None
+) -> Span:
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+
+    span = Span(operation, params, shape, stack[-1] if stack else None)
+    if _trace_memory and tracemalloc.is_tracing():
+        memory, peak = tracemalloc.get_traced_memory()
+        # the peak is reset for every span, the enclosing ones keep theirs aside
+        if span.parent is not None:
+            span.parent._peak = max(span.parent._peak, peak)
+        tracemalloc.reset_peak()
+        span._memory = memory
+
+    stack.append(span)
+    span._start = time.perf_counter()
+    return span
+
+
+def _finish(span: Span) -> None:
+    span.seconds = time.perf_counter() - span._start
+    stack = _local.stack
+    stack.pop()
+    if _trace_memory and tracemalloc.is_tracing():
+        peak = max(tracemalloc.get_traced_memory()[1], span._peak)
+        span.bytes = max(peak - span._memory, 0)
+        if span.parent is not None:
+            span.parent._peak = max(span.parent._peak, peak)
+
+    for sink in _sinks:
+        try:
+            sink.emit(span)
+        except Exception:
+            log.exception(f"Profiling sink {sink!r} failed")
+
+
+def _shape(args: tuple) -> tuple[int, ...] | None:
+    for arg in args:
+        img = getattr(arg, "img", arg)
+        matrix = getattr(img, "_buffer", None)
+        if matrix is not None:
+            return tuple(matrix.array.shape)
+
+        if isinstance(arg, np.ndarray):
+            return arg.shape
+
+    return None
+
+
+def _jsonable(value: Any) -> Any:
+    """A JSON friendly summary of a parameter, arrays are reduced to their shape."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+
+    if isinstance(value, Enum):
+        return value.value
+
+    if isinstance(value, np.generic):
+        return value.item()
+
+    if isinstance(value, np.ndarray):
+        return f"array{value.shape}"
+
+    if isinstance(value, (tuple, list)):
+        return [_jsonable(item) for item in value]
+
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+
+    return type(value).__name__
@@ -0,0 +1,99 @@
+import json
+
+import numpy as np
+import pytest
+
+from benchmarks import cases  # noqa: F401
+from benchmarks.harness import (
+    CASES,
+    DTYPES,
+    Frame,
+    Measurement,
+    compare,
+    load_baselines,
+    run,
+    save_baselines,
+    select,
+)
+
+
+def test_frame_spec():
+    frame = Frame(0.25, "uint16", 3)
+    matrix = frame.make()
+
+    assert frame.key == "0.25MP-uint16-c3"
+    assert matrix.shape == frame.shape == (433, 577, 3)
+    assert matrix.dtype == np.uint16
+    assert abs(frame.pixels - 250_000) < 1000
+    assert np.array_equal(matrix, frame.make())
+
+
+@pytest.mark.parametrize("channels", [1, 3])
+@pytest.mark.parametrize("dtype", DTYPES)
+def test_every_case_runs(dtype, channels):
+    frame = Frame(0.002, dtype, channels)
+    supported = [case for case in CASES.values() if case.supports(frame)]
+
+    measurements = list(run(CASES.values(), [frame], repeat=1))
+
+    assert [m.case for m in measurements] == [case.name for case in supported]
+    assert all(m.seconds > 0 and m.peak_bytes >= 0 for m in measurements)
+
+
+def test_every_area_is_covered():
+    areas = {name.split(".")[0] for name in CASES}
+    assert areas == {
+        "enhance",
+        "contrast",
+        "filter",
+        "stats",
+        "connectivity",
+        "arithmetic",
+    }
+
+
+def test_select():
+    names = [case.name for case in select(["filter.median.*", "stats.moments"])]
+    assert names == [
+        "filter.median.3x3",
+        "filter.median.9x9",
+        "filter.median.21x21",
+        "filter.median.51x51",
+        "stats.moments",
+    ]
+
+
+def test_baselines_round_trip(tmp_path):
+    path = str(tmp_path / "baselines.json")
+    old = Measurement("a", "1MP-uint8-c1", 0.5, 10**6, 2**22)
+    save_baselines(path, [old])
+    save_baselines(path, [Measurement("b", "1MP-uint8-c1", 0.1, 10**6, 0)])
+
+    baselines = load_baselines(path)
+    assert set(baselines["results"]) == {"a@1MP-uint8-c1", "b@1MP-uint8-c1"}
+    assert baselines["results"]["a@1MP-uint8-c1"]["megapixels_per_second"] == 2
+    assert json.load(open(path)) == baselines
+
+
+def test_compare_flags_regressions():
+    baselines = {
+        "results": {
+            "a@f": {"seconds": 1.0, "peak_bytes": 2**24},
+            "b@f": {"seconds": 1.0, "peak_bytes": 2**24},
+            "tiny@f": {"seconds": 1e-5, "peak_bytes": 10},
+        }
+    }
+    measurements = [
+        Measurement("a", "f", 1.2, 1, 2**24),
+        Measurement("b", "f", 1.5, 1, 2**25),
+        Measurement("tiny", "f", 5e-5, 1, 1000),
+        Measurement("new", "f", 9.0, 1, 2**30),
+    ]
+
+    regressions = compare(measurements, baselines, threshold=0.25)
+
+    assert [(r.key, r.metric) for r in regressions] == [
+        ("b@f", "seconds"),
+        ("b@f", "peak_bytes"),
+    ]
+    assert regressions[0].ratio == 1.5
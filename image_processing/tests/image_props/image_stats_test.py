@@ -47,5 +47,6 @@ def test_hist(img_path):
 
 def test_hist_with_color_image():
     stats = ImageStatistics(Image(uti.sample_images["dog"], uti.ImageType.COLOR))
-    with pytest.raises(TypeError):
-        stats.show_hist()
+    assert stats.histogram().shape == (3, 256)
+    stats.save_hist()
+    assert uti.check_path_exists("./res/plt/dog_hist.jpg")
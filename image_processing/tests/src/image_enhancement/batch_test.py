@@ -0,0 +1,145 @@
+import os
+import pickle
+
+import cv2
+import numpy as np
+import pytest
+
+from src.image_enhancement.batch import BatchRunner, Recipe, enhance
+from src.image_enhancement.ie import Contrast, ImageEnhancement
+from src.image_enhancement.point_ops import PointOperation
+from src.image_props.image import Image
+from src.utils.files.cache import ResultCache
+from src.utils.files.file_utils import FileUtils as uti
+
+RECIPE = Recipe().stretch_contrast(20).image_negative().histogram_equalization()
+
+
+def test_recipe_records_calls():
+    ie = RECIPE.apply(ImageEnhancement(Image(uti.sample_images["dog"])))
+    expected = (
+        ImageEnhancement(Image(uti.sample_images["dog"]))
+        .stretch_contrast(20)
+        .image_negative()
+        .histogram_equalization()
+    )
+
+    assert len(RECIPE) == 3
+    assert ie.filters == expected.filters
+    assert np.array_equal(ie.img.matrix, expected.img.matrix)
+    assert pickle.loads(pickle.dumps(RECIPE)).steps == RECIPE.steps
+
+
+def test_recipe_rejects_unknown_operations():
+    with pytest.raises(AttributeError):
+        Recipe().sharpen()
+
+
+def test_collect_directory():
+    paths = list(BatchRunner.collect("res/img"))
+    assert sorted(map(os.path.basename, paths)) == sorted(
+        os.path.basename(path) for path in uti.sample_images.values()
+    )
+
+
+def test_batch_run(tmp_path, monkeypatch):
+    paths = [os.path.abspath(path) for path in uti.sample_images.values()]
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "res").mkdir()
+
+    report = BatchRunner(RECIPE, workers=2, max_in_flight=2).run(
+        paths + [str(tmp_path / "missing.png")]
+    )
+
+    assert len(report.results) == len(paths) + 1
+    assert [result.path for result in report.failed] == [str(tmp_path / "missing.png")]
+    assert "FileNotFoundError" in report.failed[0].error
+    assert report.megapixels_per_second > 0
+
+    suffix = "_contrast_stretch_negative_histogram_equalized"
+    for path in paths:
+        name, extension = uti.get_basename_extension(path)
+        assert (tmp_path / "res" / "filt" / f"{name}{suffix}{extension}").exists()
+
+
+@pytest.mark.parametrize("fingerprint", ["stat", "pixels"])
+def test_enhance_through_cache(tmp_path, fingerprint):
+    cache = ResultCache(str(tmp_path))
+    path = uti.sample_images["dog"]
+
+    first, first_cached = enhance(path, RECIPE, cache=cache, fingerprint=fingerprint)
+    again, again_cached = enhance(path, RECIPE, cache=cache, fingerprint=fingerprint)
+    other, other_cached = enhance(
+        path, Recipe().image_negative(), cache=cache, fingerprint=fingerprint
+    )
+
+    assert (first_cached, again_cached, other_cached) == (False, True, False)
+    assert np.array_equal(again.img.matrix, first.compute().img.matrix)
+    assert again.img.name == first.img.name
+    assert again.filters == first.filters
+    with pytest.raises(ValueError):
+        enhance(path, RECIPE, cache=cache, fingerprint="mtime")
+
+
+def test_reset_cached_results(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    path = uti.sample_images["dog"]
+
+    miss, _ = enhance(path, RECIPE, cache=cache, fingerprint="pixels")
+    hit, cached = enhance(path, RECIPE, cache=cache, fingerprint="pixels")
+
+    assert cached
+    assert np.array_equal(hit.reset().img.matrix, miss.reset().img.matrix)
+    assert np.array_equal(hit.img.matrix, Image(path).matrix)
+    assert hit.filters == miss.filters == []
+
+    enhance(path, RECIPE, cache=cache)
+    hit, cached = enhance(path, RECIPE, cache=cache)
+    assert cached
+    with pytest.raises(RuntimeError):
+        hit.reset()
+
+
+def test_point_operations_in_cache_keys(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    path = uti.sample_images["dog"]
+    op = Contrast.negative_op()
+
+    enhance(path, Recipe().apply_point_op(op), cache=cache)
+    same = Recipe().apply_point_op(PointOperation(op.lut.copy(), op.name))
+    other = Recipe().apply_point_op(PointOperation.identity())
+
+    assert enhance(path, same, cache=cache)[1]
+    assert not enhance(path, other, cache=cache)[1]
+
+
+def test_cache_follows_file_changes(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    path = tmp_path / "frame.png"
+    cv2.imwrite(str(path), np.full((8, 8), 50, np.uint8))
+    enhance(str(path), RECIPE, cache=cache)
+
+    cv2.imwrite(str(path), np.full((8, 8), 60, np.uint8))
+    os.utime(path, ns=(1, 1))
+    ie, cached = enhance(str(path), RECIPE, cache=cache)
+
+    assert not cached
+    assert np.array_equal(
+        ie.compute().img.matrix,
+        RECIPE.apply(ImageEnhancement(Image(str(path)))).img.matrix,
+    )
+
+
+def test_batch_run_serves_cached_results(tmp_path, monkeypatch):
+    paths = [os.path.abspath(path) for path in uti.sample_images.values()]
+    cache = ResultCache(str(tmp_path / "cache"))
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "res").mkdir()
+    runner = BatchRunner(RECIPE, workers=2, cache=cache)
+
+    first = runner.run(paths)
+    second = runner.run(paths)
+
+    assert (first.cached, second.cached) == (0, len(paths))
+    assert not second.failed
+    assert "cached" in str(second)
@@ -0,0 +1,313 @@
+import cv2
+import numpy as np
+import pytest
+
+from src.image_enhancement.filters.filters import LinearFilter
+from src.image_enhancement.ie import ImageEnhancement
+from src.image_props.image import Image
+from src.utils.files.file_utils import FileUtils as uti
+from src.utils.image_enhancement.filters.border_treatment import BorderType
+from src.utils.image_enhancement.filters.linear.convolution import (
+    Strategy,
+    choose_strategy,
+    convolve,
+    separate,
+)
+from src.utils.image_enhancement.filters.linear.kernels import KERNEL_DICT, KernelName
+from src.utils.image_enhancement.filters.non_linear.kuwahara import kuwahara
+from src.utils.image_enhancement.filters.non_linear.median import (
+    median,
+    selection_network,
+)
+from src.utils.matrices.region_selection import (
+    handle_border,
+    map_windows,
+    neighbourhoods,
+    select_region,
+    windows,
+)
+
+CV_BORDERS = {
+    BorderType.REPEAT: cv2.BORDER_REPLICATE,
+    BorderType.REFLECT: cv2.BORDER_REFLECT_101,
+    BorderType.CONSTANT: cv2.BORDER_CONSTANT,
+}
+NP_PAD_MODES = {
+    BorderType.REPEAT: "edge",
+    BorderType.REFLECT: "reflect",
+    BorderType.CONSTANT: "constant",
+    BorderType.WRAP: "wrap",
+}
+KERNELS = [
+    KERNEL_DICT[KernelName.AVERAGING],
+    KERNEL_DICT[KernelName.GAUSSIAN]["3x3"],
+    KERNEL_DICT[KernelName.GAUSSIAN]["5x5"],
+    KERNEL_DICT[KernelName.CIRCULAR],
+    KERNEL_DICT[KernelName.PYRAMIDAL],
+    KERNEL_DICT[KernelName.CONE],
+]
+
+
+@pytest.mark.parametrize("kernel", KERNELS)
+@pytest.mark.parametrize("border_type", CV_BORDERS)
+def test_convolve_matches_cv2(kernel, border_type):
+    matrix = Image(uti.sample_images["monalisa"]).matrix
+    expected = cv2.filter2D(
+        matrix.astype(np.float64), -1, kernel, borderType=CV_BORDERS[border_type]
+    )
+    result = convolve(matrix, kernel, border_type)
+
+    assert np.abs(result - expected).max() <= 0.5 + 1e-6
+
+
+@pytest.mark.parametrize("kernel", KERNELS + [np.random.default_rng(0).random((9, 7))])
+def test_strategies_agree(kernel):
+    matrix = Image(uti.sample_images["eagle"]).matrix
+    strategies = [Strategy.DIRECT, Strategy.FFT]
+    if separate(kernel) is not None:
+        strategies.append(Strategy.SEPARABLE)
+
+    results = [convolve(matrix, kernel, BorderType.REFLECT, s) for s in strategies]
+    assert all(np.array_equal(results[0], result) for result in results[1:])
+
+
+def test_strategy_choice():
+    shape = (4000, 5000)
+    assert choose_strategy(KERNEL_DICT[KernelName.CIRCULAR], shape) == Strategy.DIRECT
+    assert choose_strategy(np.ones((15, 15)), shape) == Strategy.SEPARABLE
+    assert choose_strategy(np.random.random((31, 31)), shape) == Strategy.FFT
+
+
+def test_ignore_border_keeps_border_pixels():
+    img = Image(uti.sample_images["dog"])
+    original = img.matrix.copy()
+    LinearFilter(img, KernelName.GAUSSIAN, BorderType.IGNORE, "5x5").apply()
+
+    border = np.ones(original.shape, bool)
+    border[2:-2, 2:-2] = False
+    assert np.array_equal(img.matrix[border], original[border])
+
+
+def test_averaging():
+    ie = ImageEnhancement(Image(uti.sample_images["coins"]))
+    expected = convolve(ie.img.matrix, np.ones((3, 3)) / 9)
+    ie.averaging()
+
+    assert ie.filters == ["averaged"]
+    assert np.array_equal(ie.img.matrix, expected)
+
+
+@pytest.mark.parametrize("border_type", NP_PAD_MODES)
+@pytest.mark.parametrize("width", [1, (2, 3), (7, 1)])
+def test_handle_border_matches_np_pad(border_type, width):
+    matrix = np.arange(30, dtype=np.uint8).reshape(5, 6)
+    rows, cols = (width, width) if isinstance(width, int) else width
+    expected = np.pad(matrix, ((rows, rows), (cols, cols)), NP_PAD_MODES[border_type])
+    assert np.array_equal(handle_border(matrix, border_type, width), expected)
+
+
+@pytest.mark.parametrize("border_type", NP_PAD_MODES)
+@pytest.mark.parametrize("size", [(3, 3), (5, 5), (9, 7), (1, 5)])
+def test_border_bands_match_full_padding(border_type, size):
+    matrix = Image(uti.sample_images["coins"]).matrix
+    kernel = np.random.default_rng(1).random(size)
+    kernel /= kernel.sum()
+    padded = handle_border(matrix, border_type, (size[0] // 2, size[1] // 2))
+    expected = cv2.filter2D(padded.astype(np.float64), -1, kernel)[
+        size[0] // 2 : size[0] // 2 + matrix.shape[0],
+        size[1] // 2 : size[1] // 2 + matrix.shape[1],
+    ]
+
+    result = convolve(matrix, kernel, border_type, Strategy.DIRECT)
+    assert np.abs(result - expected).max() <= 0.5 + 1e-6
+
+
+def test_small_frame_falls_back_to_padding():
+    matrix = np.arange(12, dtype=np.uint8).reshape(3, 4)
+    kernel = np.ones((5, 5)) / 25
+    padded = np.pad(matrix, 2, "wrap").astype(np.float64)
+    expected = cv2.filter2D(padded, -1, kernel)[2:-2, 2:-2]
+
+    result = convolve(matrix, kernel, BorderType.WRAP)
+    assert np.abs(result - expected).max() <= 0.5 + 1e-6
+
+
+@pytest.mark.parametrize("border_type", NP_PAD_MODES)
+def test_select_region(border_type):
+    matrix = np.arange(30, dtype=np.uint8).reshape(5, 6)
+    padded = np.pad(matrix, 2, NP_PAD_MODES[border_type])
+
+    inside = select_region(matrix, (2, 3), 3, border_type)
+    assert np.shares_memory(inside, matrix)
+    assert np.array_equal(inside, matrix[1:4, 2:5])
+    for pos in [(0, 0), (4, 5), (1, 5)]:
+        region = select_region(matrix, pos, 5, border_type)
+        assert np.array_equal(region, padded[pos[0] : pos[0] + 5, pos[1] : pos[1] + 5])
+
+
+def test_select_region_ignore_outside():
+    with pytest.raises(IndexError):
+        select_region(np.zeros((5, 5)), (0, 0), 3)
+
+
+def test_windows_are_views():
+    matrix = Image(uti.sample_images["eagle"]).matrix
+    regions = windows(matrix, 5)
+
+    assert regions.shape == (matrix.shape[0] - 4, matrix.shape[1] - 4, 5, 5)
+    assert np.shares_memory(regions, matrix)
+    assert np.array_equal(regions[10, 20], select_region(matrix, (12, 22), 5))
+
+
+def test_color_windows():
+    matrix = Image(uti.sample_images["parrot"], uti.ImageType.COLOR).matrix
+    regions = windows(matrix, 3)
+
+    assert regions.shape == (matrix.shape[0] - 2, matrix.shape[1] - 2, 3, 3, 3)
+    assert np.array_equal(regions[0, 0, 2], matrix[:3, :3, 2])
+
+
+@pytest.mark.parametrize("border_type", BorderType)
+def test_neighbourhoods_cover_the_matrix(border_type):
+    matrix = Image(uti.sample_images["coins"]).matrix
+    covered = np.zeros(matrix.shape, int)
+    for region, block in neighbourhoods(matrix, 7, border_type):
+        covered[region] += 1
+        assert block.shape[:2] == covered[region].shape
+
+    expected = np.ones(matrix.shape, int)
+    if border_type == BorderType.IGNORE:
+        expected[:3] = expected[-3:] = expected[:, :3] = expected[:, -3:] = 0
+
+    assert np.array_equal(covered, expected)
+
+
+@pytest.mark.parametrize("border_type", CV_BORDERS)
+def test_map_windows_matches_convolution(border_type):
+    matrix = Image(uti.sample_images["monalisa"]).matrix
+    expected = convolve(matrix, np.ones((5, 5)) / 25, border_type)
+
+    result = map_windows(
+        matrix, lambda w: np.rint(w.mean(axis=(-2, -1))), 5, border_type
+    )
+    assert np.abs(result.astype(int) - expected).max() <= 1
+
+
+@pytest.mark.parametrize("box_size", [3, 5, 9, 17, 41])
+def test_median_matches_cv2(box_size):
+    matrix = Image(uti.sample_images["eagle"]).matrix
+    expected = cv2.medianBlur(matrix, box_size)
+    assert np.array_equal(median(matrix, box_size, BorderType.REPEAT), expected)
+
+
+@pytest.mark.parametrize("box_size", [5, 17])
+@pytest.mark.parametrize("border_type", NP_PAD_MODES)
+def test_median_border_types(box_size, border_type):
+    matrix = Image(uti.sample_images["coins"]).matrix[:60, :80]
+    r = box_size // 2
+    padded = handle_border(matrix, border_type, r)
+    expected = np.median(windows(padded, box_size), axis=(-2, -1))
+    assert np.array_equal(median(matrix, box_size, border_type), expected)
+
+
+@pytest.mark.parametrize("box_size", [3, 17])
+def test_median_ignore_keeps_border(box_size):
+    matrix = Image(uti.sample_images["dog"]).matrix
+    result = median(matrix, box_size)
+    r = box_size // 2
+
+    assert np.array_equal(result[:r], matrix[:r])
+    assert np.array_equal(result[:, -r:], matrix[:, -r:])
+    assert np.array_equal(
+        result[r:-r, r:-r], cv2.medianBlur(matrix, box_size)[r:-r, r:-r]
+    )
+
+
+def test_median_removes_salt_and_pepper():
+    rng = np.random.default_rng(0)
+    img = Image(uti.sample_images["monalisa"])
+    clean = cv2.medianBlur(img.matrix, 3)
+    noisy = img.matrix.copy()
+    noise = rng.random(noisy.shape)
+    noisy[noise < 0.02], noisy[noise > 0.98] = 0, 255
+    img.matrix = noisy
+
+    ie = ImageEnhancement(img).median(3, BorderType.REPEAT)
+    assert ie.filters == ["median"]
+    assert np.mean(ie.img.matrix != clean) < np.mean(noisy != img.matrix) / 4
+
+
+def test_median_of_floats_and_colors():
+    rng = np.random.default_rng(0)
+    floats = rng.random((40, 50))
+    expected = np.median(windows(floats, 19, BorderType.REFLECT), axis=(-2, -1))
+    assert np.array_equal(median(floats, 19, BorderType.REFLECT), expected)
+
+    color = Image(uti.sample_images["parrot"], uti.ImageType.COLOR).matrix
+    assert np.array_equal(
+        median(color, 17, BorderType.REPEAT), cv2.medianBlur(color, 17)
+    )
+
+
+def test_selection_network_selects_the_median():
+    values = np.random.default_rng(0).integers(0, 256, (49, 1000))
+    network = selection_network(49, 24)
+    wires = list(values)
+    for a, b, low, high in network:
+        wires[a], wires[b] = np.minimum(wires[a], wires[b]), np.maximum(
+            wires[a], wires[b]
+        )
+
+    assert np.array_equal(wires[24], np.median(values, axis=0))
+
+
+def naive_kuwahara(matrix: np.ndarray, radius: int) -> np.ndarray:
+    out = matrix.copy()
+    m, n = matrix.shape[:2]
+    for i in range(radius, m - radius):
+        for j in range(radius, n - radius):
+            quadrants = [
+                matrix[i + di : i + di + radius + 1, j + dj : j + dj + radius + 1]
+                for di in (-radius, 0)
+                for dj in (-radius, 0)
+            ]
+            # exact integer variances, float ones break ties at random
+            flat = [q.reshape(-1, *q.shape[2:]).astype(np.int64) for q in quadrants]
+            variances = [(len(q) * (q * q).sum(0) - q.sum(0) ** 2).sum() for q in flat]
+            mean = quadrants[int(np.argmin(variances))].mean((0, 1))
+            out[i, j] = np.rint(mean)
+
+    return out
+
+
+@pytest.mark.parametrize("radius", [1, 2, 4])
+def test_kuwahara_matches_naive(radius):
+    matrix = Image(uti.sample_images["coins"]).matrix[40:90, 60:130]
+    assert np.array_equal(kuwahara(matrix, radius), naive_kuwahara(matrix, radius))
+
+
+def test_color_kuwahara_matches_naive():
+    matrix = Image(uti.sample_images["parrot"], uti.ImageType.COLOR).matrix[:30, :40]
+    assert np.array_equal(kuwahara(matrix, 2), naive_kuwahara(matrix, 2))
+
+
+@pytest.mark.parametrize("rows", [40, 5])
+@pytest.mark.parametrize("border_type", NP_PAD_MODES)
+def test_kuwahara_border_types(border_type, rows):
+    # frames shorter than the window are padded whole
+    matrix = Image(uti.sample_images["eagle"]).matrix[:rows, :50]
+    padded = handle_border(matrix, border_type, 3)
+    expected = naive_kuwahara(padded, 3)[3:-3, 3:-3]
+    assert np.array_equal(kuwahara(matrix, 3, border_type), expected)
+
+
+def test_kuwahara_preserves_edges():
+    step = np.zeros((40, 40), np.uint8)
+    step[:, 20:] = 200
+    noisy = step + np.random.default_rng(0).integers(0, 10, step.shape, np.uint8)
+    img = Image(uti.sample_images["coins"])
+    img.matrix = noisy
+
+    ie = ImageEnhancement(img).kuwahara(5, BorderType.REFLECT)
+    assert ie.filters == ["kuwahara"]
+    assert np.all(ie.img.matrix[:, :19] < 20) and np.all(ie.img.matrix[:, 21:] > 190)
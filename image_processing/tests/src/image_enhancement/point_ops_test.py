@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from src.image_enhancement.ie import Contrast, ImageEnhancement
+from src.image_enhancement.point_ops import PointOperation
+from src.image_props.image import Image
+from src.image_props.image_stats import ImageStatistics
+from src.utils.files.file_utils import FileUtils as uti
+
+
+@pytest.mark.parametrize("img_path", uti.sample_images.values())
+def test_gray_level_slicing(img_path):
+    img = Image(img_path)
+    inside = (img.matrix > 50) & (img.matrix < 120)
+    expected = np.where(inside, 255, img.matrix)
+    Contrast.gray_level_slicing(img, (np.uint8(50), np.uint8(120)))
+    assert np.array_equal(img.matrix, expected)
+
+
+@pytest.mark.parametrize("plane", range(1, 9))
+def test_bit_plane_slicing(plane):
+    img = Image(uti.sample_images["monalisa"])
+    expected = img.matrix & ((1 << (plane - 1)) - 1)
+    Contrast.bit_plane_slicing(img, plane)
+    assert np.array_equal(img.matrix, expected)
+
+
+def test_bit_plane_slicing_out_of_range():
+    with pytest.raises(ValueError):
+        Contrast.bit_plane_slicing_op(9)
+
+
+def test_composed_operations_match_sequential():
+    ie = ImageEnhancement(Image(uti.sample_images["eagle"]))
+    original = ie.img.matrix.copy()
+    negative = Contrast.negative_op()
+    slicing = Contrast.gray_level_slicing_op((np.uint8(100), np.uint8(200)))
+
+    ie.image_negative().gray_level_slicing((np.uint8(100), np.uint8(200)))
+    assert np.array_equal(negative.then(slicing).apply(original), ie.img.matrix)
+
+
+def test_negative_twice_is_identity():
+    negative = Contrast.negative_op()
+    assert negative.then(negative) == PointOperation.identity()
+
+
+def test_lut_must_have_256_entries():
+    with pytest.raises(ValueError):
+        PointOperation(np.arange(10))
+
+
+def test_point_operation_leaves_copies_untouched():
+    img = Image(uti.sample_images["parrot"])
+    snapshot = img.copy()
+    expected = 255 - img.matrix
+
+    Contrast.negative_op()(img)
+    assert np.array_equal(img.matrix, expected)
+    assert np.array_equal(snapshot.matrix, 255 - expected)
+
+
+def test_per_channel_lut():
+    img = Image(uti.sample_images["parrot"], uti.ImageType.COLOR)
+    original = img.matrix.copy()
+    negative = Contrast.negative_op()
+    op = PointOperation.per_channel(negative, PointOperation.identity(), negative)
+
+    op(img)
+    assert np.array_equal(img.matrix[..., 0], 255 - original[..., 0])
+    assert np.array_equal(img.matrix[..., 1], original[..., 1])
+    assert np.array_equal(img.matrix[..., 2], 255 - original[..., 2])
+
+
+def test_per_channel_composition():
+    matrix = Image(uti.sample_images["dog"], uti.ImageType.COLOR).matrix
+    shared = Contrast.gray_level_slicing_op((np.uint8(40), np.uint8(90)))
+    split = PointOperation.per_channel(
+        Contrast.negative_op(), Contrast.bit_plane_slicing_op(6), shared
+    )
+
+    for first, second in [(shared, split), (split, shared), (split, split)]:
+        expected = second.apply(first.apply(matrix))
+        assert np.array_equal(first.then(second).apply(matrix), expected)
+
+
+def test_color_statistics_remapped():
+    img = Image(uti.sample_images["dog"], uti.ImageType.COLOR)
+    ImageStatistics(img).histogram()
+    op = PointOperation.per_channel(
+        Contrast.negative_op(),
+        Contrast.bit_plane_slicing_op(5),
+        PointOperation.identity(),
+    )
+
+    remapped = ImageStatistics(op(img)).histogram()
+    img.update()
+    assert np.array_equal(remapped, ImageStatistics(img).histogram())
+
+
+def test_channels_mismatch():
+    op = PointOperation.per_channel(Contrast.negative_op(), Contrast.negative_op())
+    with pytest.raises(ValueError):
+        op.apply(Image(uti.sample_images["dog"], uti.ImageType.COLOR).matrix)
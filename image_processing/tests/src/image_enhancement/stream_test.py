@@ -0,0 +1,150 @@
+import cv2
+import numpy as np
+import pytest
+
+from src.image_enhancement.batch import Recipe
+from src.image_enhancement.ie import ImageEnhancement
+from src.image_enhancement.stream import (
+    BackgroundModel,
+    FrameReader,
+    FrameSource,
+    FrameStream,
+    SequenceSource,
+    VideoSource,
+)
+from src.image_props.image import Image
+from src.utils.files.file_utils import FileUtils as uti
+from src.utils.files.writer import ImageWriter
+
+RECIPE = Recipe().stretch_contrast(20).image_negative()
+
+
+def frames(count=6, shape=(48, 64)):
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, shape, dtype=np.uint8) for _ in range(count)]
+
+
+def write_sequence(tmp_path, frames):
+    for i, frame in enumerate(frames):
+        cv2.imwrite(str(tmp_path / f"frame_{i:03}.png"), frame)
+
+    return str(tmp_path)
+
+
+def test_sequence_stream_matches_recipe(tmp_path):
+    expected = frames()
+    stream = FrameStream(SequenceSource(write_sequence(tmp_path, expected)), RECIPE)
+
+    results = [img.matrix.copy() for img in stream]
+
+    assert len(results) == len(expected) == stream.frames
+    assert stream.fps > 0
+    for frame, result in zip(expected, results):
+        ie = RECIPE.apply(ImageEnhancement(Image.from_array(frame.copy())))
+        assert np.array_equal(result, ie.img.matrix)
+
+
+def test_stream_reuses_buffers(tmp_path):
+    stream = FrameStream(
+        SequenceSource(write_sequence(tmp_path, frames(10))), RECIPE, buffers=3
+    )
+
+    buffers = {img.matrix.ctypes.data for img in stream}
+
+    assert len(buffers) <= 3
+
+
+def test_copies_outlive_the_ring(tmp_path, monkeypatch):
+    expected = frames(9)
+    (tmp_path / "in").mkdir()
+    source = SequenceSource(write_sequence(tmp_path / "in", expected))
+    monkeypatch.chdir(tmp_path)
+    stream = FrameStream(source, Recipe().image_negative(), buffers=2)
+
+    kept, saved = [], []
+    with ImageWriter(workers=1) as writer:
+        for img in stream:
+            kept.append(img.copy())
+            saved.append(ImageEnhancement(img).save_img(".png", writer))
+
+    for frame, img, future in zip(expected, kept, saved):
+        assert np.array_equal(img.matrix, 255 - frame)
+        written = cv2.imread(future.result(), cv2.IMREAD_GRAYSCALE)
+        assert np.array_equal(written, 255 - frame)
+
+
+def test_stream_rejects_resolution_changes(tmp_path):
+    write_sequence(tmp_path, frames(2) + frames(1, (32, 32)))
+
+    with pytest.raises(ValueError):
+        FrameStream(SequenceSource(str(tmp_path))).run()
+
+
+def test_frame_source_is_abstract():
+    with pytest.raises(TypeError):
+        FrameSource()
+
+
+def test_frame_reader_needs_a_ring():
+    with pytest.raises(ValueError):
+        FrameReader(SequenceSource([]), buffers=1)
+
+
+def test_background_model_subtracts_running_average():
+    model = BackgroundModel(alpha=0.5)
+    still = np.full((4, 4), 100, np.uint8)
+    moving = still.copy()
+    moving[1, 1] = 250
+    moving[2, 2] = 10
+
+    assert not model.apply(still).any()
+    foreground = model.apply(moving)
+
+    expected = np.zeros_like(still)
+    expected[1, 1] = 150
+    assert np.array_equal(foreground, expected)
+    assert model.levels[1, 1] == 175
+    assert model.levels[2, 2] == 55
+
+
+def test_background_model_matches_image_subtracting():
+    a, b = frames(2)
+    model = BackgroundModel(alpha=1)
+    model.apply(a)
+    out = b.copy()
+
+    model.apply(out, out=out)
+
+    ie = ImageEnhancement(Image.from_array(b.copy())).image_subtracting(
+        Image.from_array(a)
+    )
+    assert np.array_equal(out, ie.img.matrix)
+
+
+def test_video_stream_with_background(tmp_path):
+    path = str(tmp_path / "conveyor.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    if not writer.isOpened():
+        pytest.skip("No MJPG video writer")
+
+    for i in range(8):
+        frame = np.full((48, 64, 3), 60, np.uint8)
+        # a bright box moving across a static belt
+        frame[16:32, 8 * i : 8 * i + 16] = 220
+        writer.write(frame)
+    writer.release()
+
+    stream = FrameStream(VideoSource(path), background=BackgroundModel(0.1))
+    foregrounds = [img.matrix.copy() for img in stream]
+
+    assert len(foregrounds) == 8
+    assert foregrounds[0].shape == (48, 64)
+    assert not foregrounds[0].any()
+    last = foregrounds[-1]
+    assert last[24, 60] > 100
+    assert last[5, 5] < 10
+
+
+def test_video_source_missing_file():
+    with pytest.raises(FileNotFoundError):
+        VideoSource("missing.avi")
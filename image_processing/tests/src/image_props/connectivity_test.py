@@ -0,0 +1,109 @@
+import cv2
+import numpy as np
+import pytest
+
+from src.image_props.image import Image
+from src.utils.files.file_utils import FileUtils as uti
+from src.utils.image_props.connectivity import Connectivity, label
+
+SAMPLE = np.array(
+    [
+        [0, 0, 200, 200, 0, 0],
+        [0, 200, 200, 201, 0, 0],
+        [0, 0, 0, 199, 199, 0],
+        [199, 200, 200, 198, 199, 0],
+        [0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 199, 199, 200],
+        [0, 0, 0, 201, 201, 199],
+    ]
+)
+SAMPLE_SET = np.array([198, 199, 200, 201])
+
+
+def cv2_components(mask: np.ndarray, connectivity: int):
+    """cv2 stats, renumbered in raster order of the first pixel of each component."""
+    _, labels, stats, centroids = cv2.connectedComponentsWithStats(
+        mask.astype(np.uint8), connectivity=connectivity, ltype=cv2.CV_32S
+    )
+    _, first = np.unique(labels.ravel(), return_index=True)
+    order = np.argsort(first[1:]) + 1
+    renumber = np.zeros(len(first), np.int32)
+    renumber[order] = np.arange(1, len(first))
+    return renumber[labels], stats[order], centroids[order]
+
+
+def test_sample():
+    components = Connectivity(SAMPLE, SAMPLE_SET).n4()
+    expected = np.zeros(SAMPLE.shape, int)
+    expected[:4][SAMPLE[:4] > 0] = 1
+    expected[4:][SAMPLE[4:] > 0] = 2
+
+    assert len(components) == 2
+    assert np.array_equal(components.labels, expected)
+    assert components.area.tolist() == [12, 6]
+    assert components.bbox.tolist() == [[0, 0, 4, 5], [5, 3, 7, 6]]
+    assert np.allclose(components.centroid[1], (5.5, 4))
+
+
+@pytest.mark.parametrize("density", [0.3, 0.5, 0.7])
+@pytest.mark.parametrize("connectivity", [4, 8])
+def test_matches_cv2(density, connectivity):
+    mask = np.random.default_rng(0).random((120, 170)) < density
+    labels, stats, centroids = cv2_components(mask, connectivity)
+    components = label(mask, connectivity)
+
+    assert np.array_equal(components.labels, labels)
+    assert np.array_equal(components.area, stats[:, cv2.CC_STAT_AREA])
+    assert np.array_equal(components.bbox[:, 0], stats[:, cv2.CC_STAT_TOP])
+    assert np.array_equal(components.bbox[:, 1], stats[:, cv2.CC_STAT_LEFT])
+    assert np.array_equal(
+        components.bbox[:, 3], stats[:, cv2.CC_STAT_LEFT] + stats[:, cv2.CC_STAT_WIDTH]
+    )
+    assert np.allclose(components.centroid[:, ::-1], centroids)
+
+
+@pytest.mark.parametrize("connectivity", [4, 8])
+def test_runs_merging_components(connectivity):
+    # combs whose teeth are only joined below, by one run or through another comb
+    mask = np.zeros((9, 40), bool)
+    mask[:4, ::3] = True
+    mask[4, 1:-1] = True
+    mask[5:, 2::4] = True
+    mask[-1, 20:] = True
+    labels, _, _ = cv2_components(mask, connectivity)
+
+    assert np.array_equal(label(mask, connectivity).labels, labels)
+
+
+def test_m_connectivity_keeps_8_connected_components():
+    mask = np.random.default_rng(1).random((80, 90)) < 0.4
+    assert np.array_equal(label(mask, "m").labels, label(mask, 8).labels)
+
+
+def test_diagonal_touch():
+    mask = np.eye(4, dtype=bool)
+    assert len(label(mask, 4)) == 4
+    assert len(label(mask, 8)) == 1
+    assert len(label(mask, "m")) == 1
+
+
+def test_image_regions():
+    matrix = Image(uti.sample_images["coins"]).matrix
+    components = Connectivity(matrix, np.arange(100, 256)).n8()
+
+    assert np.array_equal(components.labels > 0, matrix >= 100)
+    for k in range(1, len(components) + 1):
+        region = components.region(k)
+        assert components.mask(k)[region].sum() == components.area[k - 1]
+
+
+def test_membership_of_values_outside_the_table():
+    matrix = np.array([[-5, 3], [3, 70000]])
+    components = Connectivity(matrix, [-5, 70000]).n4()
+    assert components.labels.tolist() == [[1, 0], [0, 2]]
+
+
+def test_empty_mask():
+    components = label(np.zeros((5, 5), bool), 8)
+    assert len(components) == 0
+    assert not components.labels.any()
@@ -1,8 +1,9 @@
 import numpy as np
 import pytest
 
-from src.image_props.image import Image
-from src.image_props.image_stats import ImageStatistics
+from src.image_enhancement.ie import ImageEnhancement
+from src.image_props.image import Buffer, Image
+from src.image_props.image_stats import ImageStatistics, Moments
 from src.utils.files.file_utils import FileUtils as uti
 
 
@@ -46,6 +47,134 @@ def test_hist(img_path):
 
 
 def test_hist_with_color_image():
-    stats = ImageStatistics(Image(uti.sample_images["dog"], uti.ImageType.COLOR))
+    img = Image(uti.sample_images["dog"], uti.ImageType.COLOR)
+    stats = ImageStatistics(img)
+    hist = stats.histogram()
+
+    assert hist.shape == (3, 256)
+    for channel in range(3):
+        expected = np.bincount(img.matrix[..., channel].ravel(), minlength=256)
+        assert np.array_equal(hist[channel], expected)
+
+    assert stats.sum() == img.matrix.sum()
+    assert np.isclose(stats.std(), img.matrix.std())
+    stats.save_hist()
+    assert uti.check_path_exists("./res/plt/dog_hist.jpg")
+
+
+def test_plot_hist():
+    ramp = np.repeat(np.arange(256, dtype=np.uint8), 4).reshape(32, 32)
+    gray = ImageStatistics(Image.from_array(ramp, "ramp")).plot_hist()
+    assert gray.shape == (480, 640, 3) and gray.dtype == np.uint8
+    # a flat histogram is a horizontal line along the top of the plot
+    assert (gray[36, 70:570] < 128).all()
+
+    color = ImageStatistics(
+        Image.from_array(np.dstack([ramp, ramp, ramp // 2]), "ramp")
+    )
+    plot = color.plot_hist()
+    blue, green, red = (plot[..., c] for c in range(3))
+    assert ((red > 200) & (green < 60) & (blue < 60)).any()
+
+    with pytest.raises(ValueError):
+        color.plot_hist("svg")
     with pytest.raises(TypeError):
-        stats.show_hist()
+        ImageStatistics(Image.from_array(ramp.astype(np.float32))).plot_hist()
+
+
+def test_plot_hist_with_matplotlib():
+    plt = pytest.importorskip("matplotlib.pyplot")
+    figures = plt.get_fignums()
+    stats = ImageStatistics(Image(uti.sample_images["dog"], uti.ImageType.COLOR))
+    plot = stats.plot_hist("matplotlib")
+    assert plot.ndim == 3 and plot.shape[2] == 3
+    assert plt.get_fignums() == figures
+
+
+@pytest.mark.parametrize("img_path", uti.sample_images.values())
+def test_moments_merged_over_tiles(img_path):
+    matrix = Image(img_path).matrix
+    tiles = [
+        tile
+        for band in np.array_split(matrix, 3)
+        for tile in np.array_split(band, 4, axis=1)
+    ]
+    merged = Moments.merge_all(Moments.from_matrix(tile) for tile in tiles)
+
+    assert merged.count == matrix.size
+    assert merged.sum == matrix.sum()
+    assert np.isclose(merged.mean, np.mean(matrix))
+    assert np.isclose(merged.std, np.std(matrix))
+    assert (merged.minimum, merged.maximum) == (matrix.min(), matrix.max())
+    assert np.array_equal(merged.hist, np.bincount(matrix.ravel(), minlength=256))
+
+
+def test_moments_merged_over_batch():
+    matrices = [Image(path).matrix for path in uti.sample_images.values()]
+    merged = Moments.merge_all(Moments.from_matrix(m) for m in matrices)
+    values = np.concatenate([m.ravel() for m in matrices])
+
+    assert np.isclose(merged.mean, values.mean())
+    assert np.isclose(merged.variance, values.var())
+
+
+def test_moments_of_float_matrix():
+    matrix = np.linspace(-1, 1, 101)
+    moments = Moments.from_matrix(matrix)
+    assert moments.hist is None
+    assert np.isclose(moments.std, matrix.std())
+
+
+def test_statistics_cached_until_update():
+    img = Image(uti.sample_images["eagle"])
+    stats = ImageStatistics(img)
+    assert stats.moments is ImageStatistics(img).moments
+
+    img.mutable_matrix()[:] = 7
+    img.update()
+    assert stats.maximum() == 7
+
+
+def test_statistics_do_not_copy_the_pixels(monkeypatch):
+    img = Image(uti.sample_images["eagle"])
+    monkeypatch.setattr(Buffer, "detach", lambda *args: pytest.fail("copied"))
+    stats = ImageStatistics(img)
+
+    assert stats.length == img.pixels.size
+    assert stats.minimum() <= stats.mean() <= stats.maximum()
+    assert stats.histogram().sum() == stats.length
+
+
+def test_update_bumps_version():
+    img = Image(uti.sample_images["coins"])
+    version = img.version
+    img.cache["key"] = "stale"
+
+    img.update()
+    assert img.version == version + 1
+    assert "key" not in img.cache
+    assert img.cached("key", lambda: "fresh") == "fresh"
+
+
+def test_point_operations_carry_statistics_over(monkeypatch):
+    scans = []
+    from_matrix = Moments.from_matrix.__func__
+    monkeypatch.setattr(
+        Moments,
+        "from_matrix",
+        classmethod(lambda cls, m: scans.append(m.shape) or from_matrix(cls, m)),
+    )
+
+    # a freshly decoded frame, not one whose statistics other tests already counted
+    Image.decode_cache.clear()
+    ie = ImageEnhancement(Image(uti.sample_images["monalisa"]))
+    ie.stretch_contrast(20).image_negative().histogram_equalization()
+    stats = ImageStatistics(ie.img)
+    remapped = (stats.histogram(), stats.minimum(), stats.maximum(), stats.std())
+    assert len(scans) == 1
+
+    ie.img.update()
+    expected = ImageStatistics(ie.img)
+    assert np.array_equal(remapped[0], expected.histogram())
+    assert remapped[1:3] == (expected.minimum(), expected.maximum())
+    assert np.isclose(remapped[3], expected.std())
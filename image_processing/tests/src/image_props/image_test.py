@@ -1,6 +1,12 @@
+import os
+
+import cv2
+import numpy as np
 import pytest
 
-from src.image_props.image import Image
+from src.image_enhancement.ie import ImageEnhancement
+from src.image_props.image import DecodeCache, Image
+from src.image_props.image_stats import ImageStatistics
 from src.utils.files.file_utils import FileUtils as uti
 
 
@@ -17,10 +23,181 @@ def test_file_not_found():
 @pytest.mark.parametrize("img_path", uti.sample_images.values())
 def test_image_levels(img_path):
     assert Image(img_path, uti.ImageType.GRAYSCALE).levels == 256
-    assert Image(img_path, uti.ImageType.COLOR).levels == 16777216
+    assert Image(img_path, uti.ImageType.COLOR).levels == 256
 
 
 @pytest.mark.parametrize("img_path", uti.sample_images.values())
 def test_levels_wrong_open_type(img_path):
     with pytest.raises(ValueError):
         assert Image(img_path, uti.ImageType.UNCHANGED).levels == 16777216
+
+
+def test_copy_does_not_read_from_disk(monkeypatch):
+    img = Image(uti.sample_images["eagle"])
+
+    def imread(*args):
+        raise AssertionError("copy() decoded the file again")
+
+    monkeypatch.setattr(cv2, "imread", imread)
+    new = img.copy()
+    assert new == img
+    assert np.shares_memory(new.pixels, img.pixels)
+
+
+def test_copy_on_write():
+    img = Image(uti.sample_images["eagle"])
+    original = img.matrix.copy()
+    new = img.copy()
+
+    assert not img.writeable and not new.writeable
+    with pytest.raises(ValueError):
+        new.pixels[0, 0] = 0
+
+    new.matrix[0, 0] = original[0, 0] + 1
+    assert np.array_equal(img.pixels, original)
+    assert not np.shares_memory(new.pixels, img.pixels)
+    assert img.writeable
+
+
+def test_decoded_once_per_file(monkeypatch):
+    monkeypatch.setattr(Image, "decode_cache", DecodeCache())
+    img = Image(uti.sample_images["eagle"])
+
+    def imread(*args):
+        raise AssertionError("the file was decoded again")
+
+    monkeypatch.setattr(cv2, "imread", imread)
+    ie = ImageEnhancement(Image(uti.sample_images["eagle"])).image_negative()
+    other = Image(img.path)
+    other.matrix[0, 0] = ~img.matrix[0, 0]
+    assert other.matrix[0, 0] != img.matrix[0, 0]
+    assert not np.array_equal(ie.img.matrix, img.matrix)
+    assert np.array_equal(ie.reset().img.matrix, img.matrix)
+    assert (Image.decode_cache.hits, Image.decode_cache.misses) == (2, 1)
+
+
+def test_decode_cache_keys(monkeypatch, tmp_path):
+    monkeypatch.setattr(Image, "decode_cache", DecodeCache())
+    path = str(tmp_path / "frame.png")
+    cv2.imwrite(path, np.zeros((4, 4), np.uint8))
+    gray = Image(path)
+    assert Image(path, uti.ImageType.COLOR).channels == 3
+
+    cv2.imwrite(path, np.full((4, 4), 7, np.uint8))
+    os.utime(path, ns=(0, 0))
+    assert Image(path).matrix[0, 0] == 7
+    assert gray.matrix[0, 0] == 0
+    assert Image.decode_cache.misses == 3
+
+
+def test_decode_cache_budget(monkeypatch):
+    paths = [uti.sample_images[name] for name in ("eagle", "dog", "parrot")]
+    frames = [Image(path).matrix.nbytes for path in paths]
+    cache = DecodeCache(max_bytes=frames[0] + frames[1] + frames[2] - 1)
+    monkeypatch.setattr(Image, "decode_cache", cache)
+
+    for path in paths:
+        Image(path)
+    assert len(cache) == 2
+    assert cache.nbytes == frames[1] + frames[2]
+
+    Image(paths[1])
+    Image(paths[0])
+    assert cache.nbytes == frames[1] + frames[0]
+
+    cache.max_bytes = 0
+    Image(paths[2])
+    assert len(cache) == 2
+    cache.clear()
+    assert (len(cache), cache.nbytes) == (0, 0)
+
+
+def test_sharing_leaves_the_callers_array_alone():
+    matrix = np.zeros((4, 4), np.uint8)
+    img = Image.from_array(matrix)
+    # the caller can still write to the array, so the copy gets a snapshot
+    new = img.copy()
+
+    assert matrix.flags.writeable and img.writeable
+    matrix[0, 0] = 1
+    assert new.pixels[0, 0] == 0
+    new.mutable_matrix()[0, 0] = 2
+    assert matrix[0, 0] == 1
+    img.mutable_matrix()[0, 0] = 3
+    assert matrix[0, 0] == 3
+
+
+def test_cv_shares_memory_with_matrix():
+    img = Image(uti.sample_images["dog"])
+    assert np.shares_memory(img.cv, img.matrix)
+    cv2.circle(img.cv, (10, 10), 5, 255, -1)
+    img.update()
+    assert img.matrix[10, 10] == 255
+
+    new = img.copy()
+    cv2.circle(img.cv, (10, 10), 5, 0, -1)
+    img.update()
+    assert img.pixels[10, 10] == 0 and new.pixels[10, 10] == 255
+
+
+def test_views_taken_before_a_copy():
+    path = uti.sample_images["dog"]
+    img = Image(path)
+    view, rows = img.cv, img.matrix[:20]
+    ie = ImageEnhancement(img)
+    new = img.copy()
+
+    cv2.circle(view, (10, 10), 5, 255, -1)
+    rows[15] = 0
+    img.update()
+    assert img.pixels[10, 10] == 255 and not img.pixels[15].any()
+    assert new == Image(path)
+    assert ie.reset().img == Image(path)
+
+
+def test_writing_the_matrix_of_a_wrapped_image():
+    path = uti.sample_images["eagle"]
+    img = Image(path)
+    ie = ImageEnhancement(img)
+
+    img.matrix[0, 0] = ~img.matrix[0, 0]
+    img.update()
+    assert ie.img.pixels[0, 0] == img.pixels[0, 0]
+    assert ie.reset().img == Image(path)
+
+
+def test_write_access_is_back_once_the_copy_is_dropped():
+    img = Image.from_array(np.zeros((4, 4), np.uint8))
+    address = img.pixels.__array_interface__["data"][0]
+    new = img.copy()
+    assert not img.writeable
+
+    del new
+    assert img.matrix.flags.writeable
+    assert img.matrix.__array_interface__["data"][0] == address
+
+
+@pytest.mark.parametrize("shape", [(0, 5), (5, 0), (0, 0), (0, 4, 3)])
+def test_empty_images(shape):
+    img = Image.from_array(np.zeros(shape, np.uint8))
+    assert [tile.data.shape for tile in img.tiles()] == [shape]
+
+    ie = ImageEnhancement(img).image_negative().histogram_equalization().median(3)
+    assert ie.img.pixels.shape == shape
+    stats = ImageStatistics(ie.img)
+    assert stats.mean() == stats.std() == stats.histogram().sum() == 0
+
+
+def test_opened_images_are_writeable():
+    img = Image(uti.sample_images["eagle"])
+    img.matrix[0, 0] = ~img.matrix[0, 0]
+    img.update()
+    assert Image(uti.sample_images["eagle"]).matrix[0, 0] != img.matrix[0, 0]
+
+
+def test_color_resolution():
+    gray = Image(uti.sample_images["parrot"])
+    color = Image(uti.sample_images["parrot"], uti.ImageType.COLOR)
+
+    assert color.resolution == gray.resolution
+    assert (gray.channels, color.channels) == (1, 3)
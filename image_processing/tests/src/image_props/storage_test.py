@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from src.image_enhancement.ie import ImageEnhancement
+from src.image_props.image import Image
+from src.utils.files.file_utils import FileUtils as uti
+from src.utils.files.storage import MemmapStorage
+
+
+@pytest.mark.parametrize("img_path", uti.sample_images.values())
+def test_npy_images_are_memory_mapped(img_path, tmp_path):
+    expected = Image(img_path).matrix
+    path = MemmapStorage.save(str(tmp_path / "frame.npy"), expected)
+    img = Image(path)
+
+    assert isinstance(img.matrix, np.memmap)
+    assert np.array_equal(img.matrix, expected)
+
+
+def test_raw_images(tmp_path):
+    expected = Image(uti.sample_images["dog"]).matrix
+    path = MemmapStorage.save(str(tmp_path / "dog.raw"), expected)
+    img = Image.from_raw(path, expected.shape)
+
+    assert img.name == "dog"
+    assert np.array_equal(img.matrix, expected)
+    with pytest.raises(ValueError):
+        Image(path)
+
+
+def test_writing_a_mapped_image_leaves_the_file_untouched(tmp_path):
+    expected = Image(uti.sample_images["coins"]).matrix
+    path = MemmapStorage.save(str(tmp_path / "coins.npy"), expected)
+
+    ie = ImageEnhancement(Image(path)).image_negative()
+    assert np.array_equal(ie.img.matrix, 255 - expected)
+    assert np.array_equal(np.load(path), expected)
+
+
+def test_save_img_as_npy(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "res").mkdir()
+    matrix = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    ie = ImageEnhancement(Image.from_array(matrix.copy(), "ramp", "ramp.png"))
+    ie.image_negative().save_img(".npy")
+
+    saved = Image("res/filt/ramp_negative.npy")
+    assert np.array_equal(saved.matrix, 255 - matrix)
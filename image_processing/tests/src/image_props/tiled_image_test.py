@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from src.image_enhancement.filters.filters import LinearFilter
+from src.image_enhancement.ie import ImageEnhancement
+from src.image_props.image import Image
+from src.image_props.image_stats import ImageStatistics
+from src.image_props.tiled_image import TiledImage
+from src.utils.files.file_utils import FileUtils as uti
+from src.utils.image_enhancement.filters.border_treatment import BorderType
+from src.utils.image_enhancement.filters.linear.kernels import KernelName
+
+
+@pytest.fixture
+def npy_path(tmp_path):
+    path = str(tmp_path / "eagle.npy")
+    np.save(path, Image(uti.sample_images["eagle"]).matrix)
+    return path
+
+
+def box_blur(block: np.ndarray) -> np.ndarray:
+    padded = np.pad(block.astype(np.int32), 1, mode="edge")
+    m, n = block.shape
+    total = sum(padded[i : i + m, j : j + n] for i in range(3) for j in range(3))
+    return (total // 9).astype(np.uint8)
+
+
+def test_tiles_cover_the_image(npy_path):
+    img = TiledImage(npy_path, tile_size=(64, 100))
+    covered = np.zeros(img.matrix.shape, int)
+    for tile in img.tiles(halo=2):
+        covered[tile.region] += 1
+        assert np.array_equal(tile.data[tile.inner], img.matrix[tile.region])
+
+    assert np.all(covered == 1)
+
+
+def test_tiled_point_operations(npy_path):
+    tiled = ImageEnhancement(TiledImage(npy_path, tile_size=(50, 70)))
+    whole = ImageEnhancement(Image(uti.sample_images["eagle"]))
+    for ie in (tiled, whole):
+        ie.stretch_contrast(30).image_negative().histogram_equalization()
+
+    assert isinstance(tiled.img.matrix, np.memmap)
+    assert np.array_equal(tiled.img.matrix, whole.img.matrix)
+
+
+def test_tiled_statistics(npy_path):
+    tiled = ImageStatistics(TiledImage(npy_path, tile_size=(33, 47)))
+    whole = ImageStatistics(Image(uti.sample_images["eagle"]))
+
+    assert tiled.sum() == whole.sum()
+    assert np.isclose(tiled.std(), whole.std())
+    assert np.array_equal(tiled.histogram(), whole.histogram())
+
+
+def test_neighbourhood_operation_with_halo(npy_path):
+    img = TiledImage(npy_path, tile_size=(40, 40))
+    expected = box_blur(np.asarray(img.matrix))
+    img.map_tiles(box_blur, halo=1)
+
+    assert np.array_equal(img.matrix, expected)
+
+
+def test_source_file_is_not_modified(npy_path):
+    img = TiledImage(npy_path, tile_size=(64, 64))
+    ImageEnhancement(img).image_negative()
+
+    assert np.array_equal(np.load(npy_path), 255 - img.matrix)
+
+
+@pytest.mark.parametrize("border_type", BorderType)
+def test_tiled_linear_filter(npy_path, border_type):
+    tiled = TiledImage(npy_path, tile_size=(45, 60))
+    whole = Image(uti.sample_images["eagle"])
+    for img in (tiled, whole):
+        LinearFilter(img, KernelName.GAUSSIAN, border_type, "5x5").apply()
+
+    assert np.array_equal(tiled.matrix, whole.matrix)
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from src.utils.matrices import arithmetic
+from src.utils.matrices.arithmetic import ReferenceFrame
+
+RNG = np.random.default_rng(0)
+
+
+def pair(dtype, shape=(40, 50)):
+    info = np.iinfo(dtype)
+    return (
+        RNG.integers(info.min, info.max, shape, dtype=dtype, endpoint=True)
+        for _ in range(2)
+    )
+
+
+def saturate(result, dtype):
+    info = np.iinfo(dtype)
+    return np.clip(result, info.min, info.max).astype(dtype)
+
+
+@pytest.mark.parametrize("dtype", arithmetic.SATURATING_TYPES)
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("subtract", lambda a, b: a - b),
+        ("add", lambda a, b: a + b),
+        ("absdiff", lambda a, b: np.abs(a - b)),
+    ],
+)
+def test_saturating(dtype, name, expected):
+    a, b = pair(dtype)
+    wide = expected(a.astype(np.int64), b.astype(np.int64))
+
+    result = getattr(arithmetic, name)(a, b)
+
+    assert result.dtype == dtype
+    assert np.array_equal(result, saturate(wide, dtype))
+
+
+@pytest.mark.parametrize("name", ["subtract", "add", "absdiff"])
+def test_in_place(name):
+    a, b = pair(np.uint8, (20, 30, 3))
+    expected = getattr(arithmetic, name)(a, b)
+    frame = np.zeros((30, 40, 3), np.uint8)
+    view = frame[5:25, 5:35]
+
+    a_copy, b_copy = a.copy(), b.copy()
+    assert getattr(arithmetic, name)(a_copy, b, out=a_copy) is a_copy
+    assert getattr(arithmetic, name)(a, b_copy, out=b_copy) is b_copy
+    assert getattr(arithmetic, name)(a, b, out=view) is view
+    for result in (a_copy, b_copy, frame[5:25, 5:35]):
+        assert np.array_equal(result, expected)
+
+    assert not frame[:5].any()
+
+
+def test_blend():
+    a, b = pair(np.uint8)
+    expected = saturate(np.rint(0.25 * a + 0.75 * b), np.uint8)
+
+    assert np.abs(arithmetic.blend(a, b, 0.25).astype(int) - expected).max() <= 1
+
+
+def test_rejects_mismatches():
+    a = np.zeros((4, 4), np.uint8)
+    with pytest.raises(TypeError):
+        arithmetic.subtract(a, a.astype(np.int16))
+    with pytest.raises(TypeError):
+        arithmetic.add(a.astype(int), a.astype(int))
+    with pytest.raises(ValueError):
+        arithmetic.absdiff(a, a[:2])
+    with pytest.raises(ValueError):
+        arithmetic.subtract(a, a, out=np.zeros((4, 4), np.int16))
+
+
+def test_reference_frame_reuses_its_buffer():
+    reference, frame = pair(np.uint8)
+    ref = ReferenceFrame(reference)
+
+    first = ref.subtract(frame)
+    assert first is ref.buffer
+    assert np.array_equal(first, arithmetic.subtract(frame, reference))
+    assert ref.absdiff(frame) is ref.buffer
+    assert np.array_equal(ref.buffer, arithmetic.absdiff(frame, reference))
+
+    out = np.empty_like(frame)
+    assert ref.blend(frame, 0.5, out=out) is out
@@ -0,0 +1,139 @@
+import os
+import pickle
+import threading
+
+import numpy as np
+import pytest
+
+from src.utils.files.cache import ResultCache, canonical, file_fingerprint
+from src.utils.files.file_utils import FileUtils as uti
+from src.utils.image_enhancement.filters.border_treatment import BorderType
+
+
+def frame(value, shape=(32, 32)):
+    return np.full(shape, value, np.uint8)
+
+
+def test_keys_are_content_addressed():
+    kernel = np.ones((3, 3)) / 9
+
+    assert ResultCache.key("a", kernel) == ResultCache.key("a", kernel.copy())
+    assert ResultCache.key("a", kernel) != ResultCache.key("a", kernel * 2)
+    assert ResultCache.key({"b": 1, "a": 2}) == ResultCache.key({"a": 2, "b": 1})
+    assert ResultCache.key(BorderType.WRAP) != ResultCache.key("wrap")
+    assert canonical((np.uint8(3), [1.5])) == [3, [1.5]]
+    with pytest.raises(TypeError):
+        ResultCache.key(object())
+
+
+def test_file_fingerprint_follows_changes(tmp_path):
+    path = tmp_path / "img.raw"
+    path.write_bytes(b"1234")
+    before = file_fingerprint(str(path))
+
+    path.write_bytes(b"12345")
+
+    assert file_fingerprint(str(path)) != before
+
+
+def test_put_get(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = cache.key("input", "recipe")
+
+    assert cache.get(key) is None
+    cache.put(key, frame(7), name="dog_negative", filters=["negative"])
+
+    matrix, meta = cache.get(key)
+    assert key in cache
+    assert np.array_equal(matrix, frame(7))
+    assert meta == {"name": "dog_negative", "filters": ["negative"]}
+    assert not [
+        name
+        for _, _, names in os.walk(tmp_path)
+        for name in names
+        if name.endswith(".tmp")
+    ]
+
+
+def test_lru_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=1 << 30)
+    keys = [cache.key(i) for i in range(6)]
+    for i, key in enumerate(keys):
+        cache.put(key, frame(i, (64, 64)))
+        os.utime(cache.path(key), ns=(i * 10**9, i * 10**9))
+
+    entry = cache.size() // len(keys)
+    # reading an entry makes it the most recently used
+    cache.get(keys[0])
+    cache.max_bytes = 4 * entry
+    cache.put(cache.key("new"), frame(9, (64, 64)))
+
+    # down to 90% of the budget, the 3 most recently used entries
+    remaining = [key for key in keys if key in cache]
+    assert remaining == [keys[0], keys[5]]
+    assert cache.key("new") in cache
+    assert cache.size() <= cache.max_bytes
+
+
+def test_unreadable_entries_are_dropped(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = cache.key("broken")
+    os.makedirs(os.path.dirname(cache.path(key)))
+    with open(cache.path(key), "wb") as file:
+        file.write(b"not an entry")
+
+    assert cache.get(key) is None
+    assert key not in cache
+
+
+def test_concurrent_writers(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = cache.key("same work")
+
+    threads = [
+        threading.Thread(target=cache.put, args=(key, frame(i, (256, 256))))
+        for i in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    matrix, _ = cache.get(key)
+    # whichever writer won, the entry is whole
+    assert len(np.unique(matrix)) == 1
+
+
+def test_clear(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put(cache.key(1), frame(1))
+    cache.clear()
+
+    assert cache.size() == 0
+    assert cache.key(1) not in cache
+
+
+def test_size_is_counted_once(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path))
+    scans = []
+    entries = cache._entries
+    monkeypatch.setattr(cache, "_entries", lambda: scans.append(1) or entries())
+    for i in range(5):
+        cache.put(cache.key(i), frame(i, (16 + i, 16)))
+    # overwriting an entry replaces its bytes rather than adding to them
+    cache.put(cache.key(0), frame(0, (64, 64)))
+
+    assert len(scans) == 1
+    assert cache.size() == ResultCache(str(tmp_path)).size()
+
+
+def test_copies_in_workers_leave_the_budget_to_the_owner(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path), max_bytes=1)
+    worker = pickle.loads(pickle.dumps(cache))
+    monkeypatch.setattr(os, "getpid", lambda: -1)
+    monkeypatch.setattr(worker, "_entries", lambda: pytest.fail("scanned"))
+    for i in range(3):
+        worker.put(worker.key(i), frame(i))
+
+    assert all(worker.key(i) in worker for i in range(3))
+    assert cache.evict() == 3
@@ -0,0 +1,74 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.utils.lazy import LazyModule, lazy_import
+
+ROOT = Path(__file__).parents[3]
+# seconds to import the package on top of numpy, a few times what it takes on a
+# workstation so that a busy machine doesn't fail it, while eager imports of cv2 &
+# friends (or an expensive import time computation) still do
+IMPORT_BUDGET = 0.25
+HEAVY = ("cv2", "matplotlib", "screeninfo", "multiprocessing")
+
+
+def imports(statement: str) -> tuple[float, list[str]]:
+    """Runs an import in a fresh interpreter, returning its time & the heavy
+    modules it loaded.
+    """
+    script = f"""
+import json, sys, time
+import numpy
+start = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - start
+print(json.dumps([seconds, [name for name in {HEAVY!r} if name in sys.modules]]))
+"""
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    seconds, loaded = json.loads(output.splitlines()[-1])
+    return seconds, loaded
+
+
+def test_lazy_module(monkeypatch):
+    import colorsys
+
+    module = LazyModule("colorsys")
+    assert module.rgb_to_hsv(1, 0, 0) == colorsys.rgb_to_hsv(1, 0, 0)
+    monkeypatch.setattr(colorsys, "rgb_to_hsv", lambda *rgb: "patched")
+    assert module.rgb_to_hsv(1, 0, 0) == "patched"
+    assert lazy_import("colorsys") is colorsys
+    with pytest.raises(AttributeError):
+        module.missing
+
+
+def test_submodules_load_on_access():
+    import src
+
+    assert "image_props" in dir(src)
+    assert src.image_props.image_stats.ImageStatistics
+    with pytest.raises(AttributeError):
+        src.missing
+
+
+@pytest.mark.parametrize(
+    "statement, allowed",
+    [
+        ("import src", ()),
+        ("from src.image_props.image_stats import ImageStatistics", ()),
+        ("from src.image_enhancement.ie import ImageEnhancement", ()),
+        ("from src.image_enhancement.batch import BatchRunner", ("multiprocessing",)),
+    ],
+)
+def test_import_budget(statement, allowed):
+    seconds, loaded = min(imports(statement) for _ in range(3))
+    assert set(loaded) <= set(allowed)
+    assert seconds < IMPORT_BUDGET
@@ -0,0 +1,120 @@
+import io
+import json
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from src.image_enhancement.ie import ImageEnhancement
+from src.image_props.image import Image
+from src.utils import profiling
+from src.utils.files.file_utils import FileUtils as uti
+from src.utils.image_enhancement.filters.border_treatment import BorderType
+
+
+@pytest.fixture(autouse=True)
+def off():
+    yield
+    profiling.disable()
+
+
+def test_off_by_default():
+    assert not profiling.enabled()
+    assert profiling.current() is None
+    with profiling.span("anything") as span:
+        assert span is None
+
+    ImageEnhancement(Image(uti.sample_images["dog"])).image_negative()
+
+
+def test_spans_of_a_recipe():
+    Image.decode_cache.clear()
+    img = Image(uti.sample_images["dog"])
+    with profiling.profile(profiling.Aggregator()) as (aggregator,):
+        ie = ImageEnhancement(img, lazy=True).stretch_contrast(20).image_negative()
+        ie.histogram_equalization().median(3, BorderType.REFLECT)
+
+    assert not profiling.enabled()
+    totals = aggregator.totals
+    assert totals["ImageEnhancement.median"]["count"] == 1
+    assert totals["ImageEnhancement.median"]["notes"] == {"path=network": 1}
+    assert totals["ImageEnhancement.image_negative"]["notes"] == {"path=lazy": 1}
+    assert totals["ImageEnhancement.compute"]["notes"]["path=fused"] == 1
+    # the histogram is counted once, then remapped through the pending operations
+    assert totals["ImageEnhancement.histogram"]["notes"] == {
+        "cache.moments=miss": 1,
+        "cache.moments=hit": 1,
+    }
+    assert "ImageEnhancement.median" in aggregator.summary()
+
+
+def test_json_lines_sink():
+    file = io.StringIO()
+    img = Image(uti.sample_images["dog"])
+    with profiling.profile(profiling.JsonLinesSink(file), trace_memory=True):
+        ImageEnhancement(img).median(5)
+
+    spans = [json.loads(line) for line in file.getvalue().splitlines()]
+    median = spans[-1]
+    assert median["operation"] == "ImageEnhancement.median"
+    assert median["params"] == {"box_size": 5}
+    assert median["shape"] == list(img.matrix.shape)
+    assert median["seconds"] > 0
+    assert median["bytes"] >= img.matrix.nbytes
+    assert median["depth"] == 0
+    assert {span["parent"] for span in spans[:-1]} == {"ImageEnhancement.median"}
+
+
+def test_nested_spans():
+    spans = []
+
+    class Collect(profiling.Sink):
+        def emit(self, span):
+            spans.append(span)
+
+    with profiling.profile(Collect()):
+        with profiling.span("outer", kernel=np.ones((3, 3)), border=BorderType.WRAP):
+            with profiling.span("inner", (2, 2)):
+                profiling.note(cache="hit")
+
+    inner, outer = spans
+    assert inner.parent is outer and inner.depth == 1
+    assert inner.notes == {"cache": "hit"} and inner.shape == (2, 2)
+    assert outer.params == {"kernel": "array(3, 3)", "border": "wrap"}
+    assert outer.seconds >= inner.seconds
+
+
+def test_failing_sink_does_not_break_operations():
+    class Broken(profiling.Sink):
+        def emit(self, span):
+            raise RuntimeError("broken sink")
+
+    with profiling.profile(Broken()):
+        ie = ImageEnhancement(Image(uti.sample_images["dog"])).image_negative()
+
+    assert ie.filters == ["negative"]
+
+
+def test_enable_needs_a_sink():
+    with pytest.raises(ValueError):
+        profiling.enable()
+
+
+def test_sink_is_abstract():
+    with pytest.raises(TypeError):
+        profiling.Sink()
+
+
+def test_tracing_started_elsewhere_is_left_running():
+    tracemalloc.start()
+    try:
+        with profiling.profile(profiling.Aggregator(), trace_memory=True):
+            ImageEnhancement(Image(uti.sample_images["dog"])).image_negative()
+
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+    with profiling.profile(profiling.Aggregator(), trace_memory=True):
+        assert tracemalloc.is_tracing()
+    assert not tracemalloc.is_tracing()
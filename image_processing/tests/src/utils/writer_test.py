@@ -0,0 +1,121 @@
+import os
+import queue
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+from src.image_enhancement.ie import ImageEnhancement
+from src.image_props.image import Image
+from src.image_props.image_stats import ImageStatistics
+from src.utils.files.writer import ImageWriter, encode_params, write_image
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    ramp = np.add.outer(np.arange(64), np.arange(96)).astype(np.uint8)
+    return ramp + rng.integers(0, 8, ramp.shape, dtype=np.uint8)
+
+
+def test_writes_in_the_background(tmp_path, frame):
+    paths = [str(tmp_path / "out" / f"{i}.png") for i in range(6)]
+    with ImageWriter(workers=3) as writer:
+        futures = [writer.submit(path, frame + i) for i, path in enumerate(paths)]
+
+    assert [future.result() for future in futures] == paths
+    assert writer.written == len(paths)
+    for i, path in enumerate(paths):
+        assert np.array_equal(cv2.imread(path, cv2.IMREAD_GRAYSCALE), frame + i)
+    assert not [name for name in os.listdir(tmp_path / "out") if name.endswith("tmp")]
+
+
+def test_encode_params(tmp_path, frame):
+    assert encode_params(".png", jpeg_quality=50) == []
+    assert encode_params(".JPG", jpeg_quality=50) == [cv2.IMWRITE_JPEG_QUALITY, 50]
+    with pytest.raises(ValueError):
+        ImageWriter(png_compression=10)
+
+    sizes = {}
+    for quality in (10, 95):
+        with ImageWriter(jpeg_quality=quality, png_compression=0) as writer:
+            for extension in (".jpg", ".png"):
+                writer.submit(str(tmp_path / f"{quality}{extension}"), frame)
+
+        for extension in (".jpg", ".png"):
+            sizes[quality, extension] = os.path.getsize(
+                tmp_path / f"{quality}{extension}"
+            )
+
+    assert sizes[10, ".jpg"] < sizes[95, ".jpg"]
+    assert sizes[10, ".png"] == sizes[95, ".png"]
+    write_image(str(tmp_path / "default.png"), frame)
+    assert os.path.getsize(tmp_path / "default.png") < sizes[95, ".png"]
+
+
+def test_backpressure(tmp_path, frame):
+    release = threading.Event()
+    writer = ImageWriter(workers=1, max_pending=1)
+    blocked = writer.submit_encoded(
+        str(tmp_path / "blocked.bin"), lambda: release.wait() and b"done"
+    )
+    while not blocked.running():
+        pass
+
+    writer.submit(str(tmp_path / "queued.png"), frame)
+    with pytest.raises(queue.Full):
+        writer.submit(str(tmp_path / "rejected.png"), frame, timeout=0.01)
+
+    release.set()
+    writer.close()
+    assert blocked.result() and (tmp_path / "queued.png").exists()
+    assert not (tmp_path / "rejected.png").exists()
+    with pytest.raises(RuntimeError):
+        writer.submit(str(tmp_path / "closed.png"), frame)
+
+
+def test_flush_raises_failed_writes(tmp_path, frame):
+    with ImageWriter() as writer:
+        failed = writer.submit(str(tmp_path / "frame.unknown"), frame)
+        with pytest.raises(Exception):
+            writer.flush()
+
+        assert failed.exception() is not None
+        writer.submit(str(tmp_path / "frame.png"), frame)
+        writer.flush()
+
+
+def test_save_img_snapshots_the_pixels(tmp_path, monkeypatch, frame):
+    monkeypatch.chdir(tmp_path)
+    release = threading.Event()
+    ie = ImageEnhancement(Image.from_array(frame.copy(), "frame", "frame.png"))
+    with ImageWriter(workers=1) as writer:
+        writer.submit_encoded(
+            str(tmp_path / "wait.bin"), lambda: release.wait() and b""
+        )
+        saved = ie.save_img(writer=writer)
+        ie.image_negative()
+        release.set()
+
+    assert saved.result().endswith("res/filt/frame.png")
+    assert np.array_equal(cv2.imread(saved.result(), cv2.IMREAD_GRAYSCALE), frame)
+    assert np.array_equal(ie.img.matrix, 255 - frame)
+
+
+def test_written_copies_are_released(tmp_path, frame):
+    img = Image.from_array(frame.copy(), "frame")
+    with ImageWriter(workers=1) as writer:
+        for i in range(3):
+            writer.submit(str(tmp_path / f"{i}.png"), img.copy())
+            writer.flush()
+            assert img.writeable
+
+
+def test_save_hist_in_the_background(tmp_path, monkeypatch, frame):
+    monkeypatch.chdir(tmp_path)
+    stats = ImageStatistics(Image.from_array(frame, "frame", "frame.png"))
+    with ImageWriter() as writer:
+        saved = stats.save_hist(writer)
+
+    assert cv2.imread(saved.result()).shape[2] == 3